@@ -0,0 +1,214 @@
+"""
+Overhead of the API clients measured against the local stub server.
+
+Reports requests per second, p50/p99 latency and the peak memory allocated per call for every public
+method, calling it sequentially, from a thread pool and, when httpx is installed, with asyncio.
+
+The package must be importable: install the checkout with ``pip install -e .`` or set
+``PYTHONPATH=src``.
+
+    PYTHONPATH=src python benchmarks/bench_client.py
+    PYTHONPATH=src python benchmarks/bench_client.py --latency 0.02 --calls 200 --workers 16
+    PYTHONPATH=src python benchmarks/bench_client.py --cassette bench.jsonl
+    PYTHONPATH=src python benchmarks/bench_client.py --transport requests httpx --only status
+
+With ``--cassette`` the sync client is benchmarked over a recorded cassette, recorded from the stub on
+the first run, so the results do not depend on sockets or the server. ``--transport`` runs the sync
+benchmarks once per HTTP backend. The stub is a standard library HTTP/1.1 server, so the httpx
+backend runs over HTTP/1.1 there: the comparison shows the overhead of each backend, and HTTP/2
+multiplexing and its connection reuse are not measured.
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List
+
+from nowpayments_api import AsyncNOWPaymentsAPI, HTTPXTransport, NOWPaymentsAPI
+from nowpayments_api.cassette import CassetteAdapter
+from nowpayments_api.concurrency import aiter_concurrently, run_concurrently
+from nowpayments_api.testing import StubServer
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+
+def sync_methods(api: Any, payment_id: int, invoice_id: int) -> Dict[str, Callable]:
+    return {
+        "status": api.status,
+        "auth": api.auth,
+        "currencies": api.currencies,
+        "currencies_full": api.currencies_full,
+        "currencies_checked": api.currencies_checked,
+        "minimum_payment_amount": lambda: api.minimum_payment_amount("usd", "btc"),
+        "estimate_price": lambda: api.estimate_price(100, "usd", "btc"),
+        "create_payment": lambda: api.create_payment(100, "usd", "btc"),
+        "create_invoice": lambda: api.create_invoice(100, "usd", "btc"),
+        "create_payment_by_invoice": lambda: api.create_payment_by_invoice(
+            invoice_id, "btc"
+        ),
+        "payment_status": lambda: api.payment_status(payment_id),
+        "update_payment_estimate": lambda: api.update_payment_estimate(payment_id),
+        "list_of_payments": lambda: api.list_of_payments(limit=10),
+    }
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(
+    mode: str, name: str, latencies: List[float], wall: float, peak: int = None
+) -> None:
+    allocated = "" if peak is None else f" {peak / 1024:>8.1f} KiB/call"
+    print(
+        f"{mode:<16} {name:<26} {len(latencies) / wall:>9,.0f} req/s"
+        f" p50 {percentile(latencies, 0.5) * 1e3:>7.2f} ms"
+        f" p99 {percentile(latencies, 0.99) * 1e3:>7.2f} ms{allocated}"
+    )
+
+
+def allocated_per_call(func: Callable[[], Any], calls: int = 20) -> int:
+    """Average peak of memory traced by tracemalloc during one call."""
+    func()
+    tracemalloc.start()
+    total = 0
+    try:
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            func()
+            total += tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return total // calls
+
+
+def timed(func: Callable[[], Any]) -> Callable[[Any], float]:
+    def call(_: Any) -> float:
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+    return call
+
+
+def bench_sync(
+    name: str, func: Callable[[], Any], calls: int, backend: str = "requests"
+) -> None:
+    peak = allocated_per_call(func)
+    call = timed(func)
+    start = time.perf_counter()
+    latencies = [call(None) for _ in range(calls)]
+    report(f"sync/{backend}", name, latencies, time.perf_counter() - start, peak)
+
+
+def bench_threads(
+    name: str,
+    func: Callable[[], Any],
+    calls: int,
+    workers: int,
+    backend: str = "requests",
+) -> None:
+    start = time.perf_counter()
+    results = run_concurrently(timed(func), range(calls), max_workers=workers)
+    wall = time.perf_counter() - start
+    errors = [result.error for result in results if not result.ok]
+    if errors:
+        raise errors[0]
+    report(f"threads/{backend}", name, [result.value for result in results], wall)
+
+
+async def bench_async(
+    name: str, func: Callable[[], Awaitable[Any]], calls: int, workers: int
+) -> None:
+    async def call(_: Any) -> float:
+        start = time.perf_counter()
+        await func()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = []
+    async for result in aiter_concurrently(call, range(calls), workers):
+        if not result.ok:
+            raise result.error
+        latencies.append(result.value)
+    report("async", name, latencies, time.perf_counter() - start)
+
+
+async def run_async(server: StubServer, args: argparse.Namespace, ids: tuple) -> None:
+    async with AsyncNOWPaymentsAPI(
+        server.state.api_key, server.state.email, server.state.password
+    ) as api:
+        api.api_uri = server.url
+        for name, func in sync_methods(api, *ids).items():
+            if args.only and name not in args.only:
+                continue
+            await bench_async(name, func, args.calls, args.workers)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=500, help="calls per method")
+    parser.add_argument("--workers", type=int, default=10, help="concurrent calls")
+    parser.add_argument("--latency", type=float, default=0.0, help="server latency")
+    parser.add_argument("--only", nargs="*", help="methods to benchmark")
+    parser.add_argument("--cassette", help="record once, then replay this cassette")
+    parser.add_argument(
+        "--transport",
+        nargs="+",
+        choices=("requests", "httpx"),
+        default=["requests"],
+        help="HTTP backends of the sync client",
+    )
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency) as server:
+        state = server.state
+        ids = None
+        for backend in args.transport:
+            if backend == "httpx" and (httpx is None or args.cassette):
+                continue
+            transport = None
+            if backend == "httpx":
+                transport = HTTPXTransport(
+                    http2=False,
+                    max_connections=args.workers,
+                    max_keepalive_connections=args.workers,
+                )
+            api = NOWPaymentsAPI(
+                state.api_key,
+                state.email,
+                state.password,
+                pool_maxsize=args.workers,
+                adapter=(
+                    CassetteAdapter(args.cassette, mode="once")
+                    if args.cassette
+                    else None
+                ),
+                transport=transport,
+            )
+            api.api_uri = server.url
+            if ids is None:
+                ids = (
+                    int(api.create_payment(100, "usd", "btc")["payment_id"]),
+                    int(api.create_invoice(100, "usd", "btc")["id"]),
+                )
+
+            for name, func in sync_methods(api, *ids).items():
+                if args.only and name not in args.only:
+                    continue
+                bench_sync(name, func, args.calls, backend)
+                bench_threads(name, func, args.calls, args.workers, backend)
+            if transport is not None:
+                transport.close()
+        if httpx is not None and not args.cassette:
+            asyncio.run(run_async(server, args, ids))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Local conversions compared to one estimate request per price, against the local stub server.
+
+    PYTHONPATH=src python benchmarks/bench_conversion.py
+"""
+
+import time
+import timeit
+
+from nowpayments_api import ConversionEngine, NOWPaymentsAPI
+from nowpayments_api.testing import StubServer
+
+CRYPTOS = ["btc", "eth", "ltc", "xmr", "doge", "usdttrc20"]
+
+
+def main(number: int = 200_000) -> None:
+    with StubServer() as server:
+        api = NOWPaymentsAPI("test")
+        api.api_uri = server.url
+        engine = ConversionEngine(api, ["usd", "eur"], CRYPTOS)
+
+        start = time.perf_counter()
+        engine.refresh()
+        print(
+            f"{'refresh':<24} {len(engine.pairs)} pairs in"
+            f" {(time.perf_counter() - start) * 1e3:.1f} ms"
+        )
+
+        seconds = min(
+            timeit.repeat(
+                lambda: api.estimate_price(100, "usd", "btc"), number=200, repeat=3
+            )
+        )
+        print(f"{'estimate_price':<24} {seconds / 200 * 1e6:>10.2f} us/price")
+        seconds = min(
+            timeit.repeat(
+                lambda: engine.convert(100, "usd", "btc"), number=number, repeat=3
+            )
+        )
+        print(f"{'convert':<24} {seconds / number * 1e6:>10.2f} us/price")
+        amounts = [float(amount) for amount in range(1, 10_001)]
+        seconds = min(
+            timeit.repeat(
+                lambda: engine.convert_many(amounts, "usd", "btc"), number=100, repeat=3
+            )
+        )
+        print(
+            f"{'convert_many':<24} {seconds / 100 / len(amounts) * 1e6:>10.3f} us/price"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Throughput of IPN callback verification.
+
+    PYTHONPATH=src python benchmarks/bench_ipn.py
+"""
+
+import json
+import timeit
+
+from nowpayments_api.ipn import IPNVerifier
+
+PAYLOAD = {
+    "payment_id": 5077125051,
+    "invoice_id": None,
+    "payment_status": "finished",
+    "pay_address": "0xd1cDE08A07cD25adEbEd35c3867a59228C09B606",
+    "price_amount": 170,
+    "price_currency": "usd",
+    "pay_amount": 155.38559757,
+    "actually_paid": 155.38559757,
+    "actually_paid_at_fiat": 170,
+    "pay_currency": "mana",
+    "order_id": "2",
+    "order_description": "Apple Macbook Pro 2019 x 1",
+    "purchase_id": "6084744717",
+    "created_at": "2021-04-12T14:22:54.942Z",
+    "updated_at": "2021-04-12T14:23:06.244Z",
+    "outcome_amount": 1131.7812095,
+    "outcome_currency": "trx",
+    "fee": {
+        "currency": "btc",
+        "depositFee": 0.09853637216235617,
+        "withdrawalFee": 0,
+        "serviceFee": 0,
+    },
+}
+
+
+def main(number: int = 50_000) -> None:
+    verifier = IPNVerifier("benchmark-secret")
+    body = json.dumps(PAYLOAD).encode()
+    signature = verifier.sign(PAYLOAD)
+    assert verifier.verify(body, signature)
+
+    for name, func in (
+        ("verify", lambda: verifier.verify(body, signature)),
+        ("parse", lambda: verifier.parse(body, signature)),
+        ("verify (bad signature)", lambda: verifier.verify(body, "0" * 128)),
+    ):
+        seconds = min(timeit.repeat(func, number=number, repeat=3))
+        print(
+            f"{name:<24} {number / seconds:>10,.0f} callbacks/s"
+            f" {seconds / number * 1e6:>8.2f} us/callback"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Cost of building request payloads from the models, compared with the previous implementation that
+called ``inspect.signature`` on every call, and of reading responses through the lazy response
+classes compared with converting every field eagerly.
+
+    PYTHONPATH=src python benchmarks/bench_models.py
+"""
+
+import timeit
+from datetime import datetime
+from decimal import Decimal
+from inspect import signature
+
+from nowpayments_api.models.payment import InvoiceData, Payment, PaymentData
+from nowpayments_api.testing import StubState
+
+
+def legacy_clean_data_to_dict(model) -> dict:
+    data = {}
+    for field in signature(model.__class__).parameters:
+        if getattr(model, field):
+            data[field] = getattr(model, field)
+    return data
+
+
+def main(number: int = 100_000) -> None:
+    payment = PaymentData(
+        price_amount=100,
+        price_currency="usd",
+        pay_currency="btc",
+        order_id="Order_123456789",
+        order_description="Roland TR-8S",
+        ipn_callback_url="https://example.org",
+        is_fixed_rate=True,
+    )
+    invoice = InvoiceData(price_amount=100, price_currency="usd", pay_currency="btc")
+
+    for name, model in (("PaymentData", payment), ("InvoiceData", invoice)):
+        legacy = min(
+            timeit.repeat(lambda: legacy_clean_data_to_dict(model), number=number)
+        )
+        current = min(timeit.repeat(model.clean_data_to_dict, number=number))
+        print(
+            f"{name:<12} legacy {legacy / number * 1e6:6.2f} us"
+            f"  current {current / number * 1e6:6.2f} us"
+            f"  speedup {legacy / current:5.1f}x"
+        )
+
+
+def eager_payment(raw: dict) -> dict:
+    converted = dict(raw)
+    for key in ("price_amount", "pay_amount", "actually_paid", "outcome_amount"):
+        if raw.get(key) is not None:
+            converted[key] = Decimal(str(raw[key]))
+    for key in ("created_at", "updated_at", "expiration_estimate_date"):
+        converted[key] = datetime.fromisoformat(raw[key].replace("Z", "+00:00"))
+    return converted
+
+
+def bench_responses(number: int = 100_000) -> None:
+    raw = StubState("test", "", "").create_payment(
+        {"price_amount": 100, "price_currency": "usd", "pay_currency": "btc"}
+    )
+    for name, func in (
+        ("eager conversion, read status", lambda: eager_payment(raw)["payment_status"]),
+        ("Payment, read status", lambda: Payment(raw).payment_status),
+        ("Payment, read all fields", lambda: _read_all(Payment(raw))),
+    ):
+        seconds = min(timeit.repeat(func, number=number))
+        print(f"{name:<32} {seconds / number * 1e6:6.2f} us")
+
+
+def _read_all(payment: Payment) -> None:
+    for name in (
+        "payment_id",
+        "price_amount",
+        "pay_amount",
+        "created_at",
+        "updated_at",
+    ):
+        getattr(payment, name)
+
+
+if __name__ == "__main__":
+    main()
+    bench_responses()
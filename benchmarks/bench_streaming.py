@@ -0,0 +1,66 @@
+"""
+Peak memory and throughput of streamed against fully decoded list_of_payments pages.
+
+    PYTHONPATH=src python benchmarks/bench_streaming.py
+"""
+
+import json
+import time
+import tracemalloc
+
+from nowpayments_api import _json
+from nowpayments_api.streaming import STREAM_CHUNK_SIZE, iter_json_array
+from nowpayments_api.testing import StubState
+
+
+def page(records: int) -> bytes:
+    state = StubState("test", "test@example.org", "password")
+    for index in range(records):
+        state.create_payment(
+            {"price_amount": index + 1, "price_currency": "usd", "pay_currency": "btc"}
+        )
+    payments = list(state.payments.values())
+    return json.dumps({"data": payments, "pagesCount": 1}).encode()
+
+
+def measure(name: str, body: bytes, consume) -> None:
+    chunks = [
+        body[start : start + STREAM_CHUNK_SIZE]
+        for start in range(0, len(body), STREAM_CHUNK_SIZE)
+    ]
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = consume(chunks)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(
+        f"{name:<24} {records / seconds:>10,.0f} records/s {peak / 1024:>10,.0f} KiB peak"
+    )
+
+
+def decode_all(chunks) -> int:
+    count = 0
+    for _ in _json.loads(b"".join(chunks))["data"]:
+        count += 1
+    return count
+
+
+def stream(chunks) -> int:
+    count = 0
+    for _ in iter_json_array(chunks, "data"):
+        count += 1
+    return count
+
+
+def main() -> None:
+    print(f"JSON backend: {_json.BACKEND}")
+    for records in (500, 20_000):
+        body = page(records)
+        print(f"{records} records, {len(body) / 1024:,.0f} KiB body")
+        measure("decode whole body", body, decode_all)
+        measure("stream records", body, stream)
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,91 @@
-from .nowpayments_api import NOWPaymentsAPI, NowPaymentsException
+"""
+A Python wrapper for the NOWPayments API.
+
+The public names are imported from their modules on first access, so that ``import nowpayments_api``
+stays cheap and e.g. verifying IPN callbacks does not import requests or httpx.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+from .exceptions import NowPaymentsException
+
+_EXPORTS = {
+    "NOWPaymentsAPI": "nowpayments_api",
+    "AsyncNOWPaymentsAPI": "async_api",
+    "CircuitBreaker": "circuit",
+    "CircuitOpenError": "circuit",
+    "BatchResult": "concurrency",
+    "ConversionEngine": "conversion",
+    "CurrencyCatalog": "currencies",
+    "Hooks": "hooks",
+    "MetricsCollector": "hooks",
+    "RequestEvent": "hooks",
+    "MemoryIdempotencyStore": "idempotency",
+    "OutcomeUnknown": "idempotency",
+    "RequestInProgress": "idempotency",
+    "SQLiteIdempotencyStore": "idempotency",
+    "IPNVerifier": "ipn",
+    "InvalidSignature": "ipn",
+    "PaymentEvent": "ipn",
+    "PaymentCursor": "pagination",
+    "NOWPaymentsClientPool": "pool",
+    "AsyncQuoteCache": "quotes",
+    "QuoteCache": "quotes",
+    "RateLimit": "ratelimit",
+    "RateLimiter": "ratelimit",
+    "RateLimitExceeded": "ratelimit",
+    "NO_RETRY": "retry",
+    "RetryPolicy": "retry",
+    "MemoryPaymentStore": "sync",
+    "PaymentSync": "sync",
+    "SQLitePaymentStore": "sync",
+    "SyncResult": "sync",
+    "TokenManager": "tokens",
+    "HTTPXTransport": "transport",
+    "RequestsTransport": "transport",
+    "Transport": "transport",
+    "PaymentWatcher": "watcher",
+    "StatusChange": "watcher",
+}
+
+__all__ = ["NowPaymentsException", *_EXPORTS]
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .nowpayments_api import NOWPaymentsAPI
+    from .async_api import AsyncNOWPaymentsAPI
+    from .circuit import CircuitBreaker, CircuitOpenError
+    from .concurrency import BatchResult
+    from .conversion import ConversionEngine
+    from .currencies import CurrencyCatalog
+    from .hooks import Hooks, MetricsCollector, RequestEvent
+    from .idempotency import (
+        MemoryIdempotencyStore,
+        OutcomeUnknown,
+        RequestInProgress,
+        SQLiteIdempotencyStore,
+    )
+    from .ipn import IPNVerifier, InvalidSignature, PaymentEvent
+    from .pagination import PaymentCursor
+    from .pool import NOWPaymentsClientPool
+    from .quotes import AsyncQuoteCache, QuoteCache
+    from .ratelimit import RateLimit, RateLimiter, RateLimitExceeded
+    from .retry import NO_RETRY, RetryPolicy
+    from .sync import MemoryPaymentStore, PaymentSync, SQLitePaymentStore, SyncResult
+    from .tokens import TokenManager
+    from .transport import HTTPXTransport, RequestsTransport, Transport
+    from .watcher import PaymentWatcher, StatusChange
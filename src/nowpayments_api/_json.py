@@ -0,0 +1,23 @@
+"""
+JSON decoding backend: orjson or ujson when installed, the standard library otherwise.
+"""
+
+import json
+from typing import Any, Callable, Union
+
+loads: Callable[[Union[bytes, str]], Any]
+
+try:
+    import orjson
+
+    loads = orjson.loads
+    BACKEND = "orjson"
+except ImportError:  # pragma: no cover
+    try:
+        import ujson
+
+        loads = ujson.loads
+        BACKEND = "ujson"
+    except ImportError:
+        loads = json.loads
+        BACKEND = "json"
@@ -0,0 +1,505 @@
+"""
+asyncio flavour of the NOWPayments API wrapper.
+
+Requires ``httpx`` (``pip install nowpayments-api[async]``).
+"""
+
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, FrozenSet, Iterable, List, Tuple, Union
+
+from .circuit import CircuitBreaker
+from .concurrency import BatchResult, aiter_concurrently
+from .currencies import AsyncCurrencyCatalog
+from .hooks import (
+    AFTER_RESPONSE,
+    BEFORE_REQUEST,
+    ON_ERROR,
+    Hooks,
+    RequestEvent,
+    endpoint_template,
+)
+from .models.payment import PaymentData, InvoicePaymentData, InvoiceData
+from .pagination import AsyncPaymentIterator, PaymentCursor
+from .nowpayments_api import (
+    NOWPaymentsAPI,
+    NowPaymentsException,
+    _estimate_endpoint,
+    _invoice_batch,
+    _key_namespace,
+    _list_of_payments_endpoint,
+    _min_amount_endpoint,
+    _validate_payment_id,
+    _validate_price,
+)
+from .quotes import AsyncQuoteCache, scale_estimate
+from .streaming import STREAM_CHUNK_SIZE, aiter_json_array
+from .tokens import AsyncTokenManager
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+
+def _raise_for_status(response: "httpx.Response") -> None:
+    """Raise the same error as :meth:`requests.Response.raise_for_status`."""
+    if response.status_code < 400:
+        return
+    from requests import HTTPError  # pylint: disable=import-outside-toplevel
+
+    kind = "Client" if response.status_code < 500 else "Server"
+    raise HTTPError(
+        f"{response.status_code} {kind} Error: {response.reason_phrase} for url: {response.url}",
+        response=response,
+    )
+
+
+def _reject_idempotency_key(idempotency_key: str = None) -> None:
+    if idempotency_key is not None:
+        raise NowPaymentsException(
+            "AsyncNOWPaymentsAPI does not support idempotency_key, "
+            "use NOWPaymentsAPI with an idempotency_store"
+        )
+
+
+class AsyncNOWPaymentsAPI:
+    """
+    Async client with the same methods, validation and models as :class:`NOWPaymentsAPI`.
+
+    All requests of one instance share a single ``httpx.AsyncClient`` and thus one pool of keep-alive
+    connections. Close it with :meth:`aclose` or use the instance as an async context manager.
+
+    :param str api_key: API key
+    :param float currency_ttl: Seconds the list of available currencies used for validation is cached.
+    :param int max_connections: Maximum number of open connections in the pool.
+    :param int max_keepalive_connections: Maximum number of idle connections kept alive.
+    :param float timeout: Request timeout in seconds.
+    :param client: Pre-built ``httpx.AsyncClient`` to use instead of creating one.
+    :param Hooks hooks: Callbacks fired around every request.
+    :param AsyncQuoteCache quote_cache: Short-lived cache for estimates and minimum amounts.
+    :param CircuitBreaker circuit_breaker: Fails calls to a failing endpoint fast, can be shared with a
+        :class:`NOWPaymentsAPI`.
+    :param bool merchant_currencies: Validate currencies against the coins enabled in the merchant's
+        settings.
+    :param bool http2: Multiplex the concurrent requests over one HTTP/2 connection. Requires the h2
+        package: ``pip install nowpayments-api[http2]``.
+    """
+
+    BASE_URI = NOWPaymentsAPI.BASE_URI
+    BASE_URI_SANDBOX = NOWPaymentsAPI.BASE_URI_SANDBOX
+
+    WEB_APP_PAYMENT_URI = NOWPaymentsAPI.WEB_APP_PAYMENT_URI
+    WEB_APP_PAYMENT_URI_SANDBOX = NOWPaymentsAPI.WEB_APP_PAYMENT_URI_SANDBOX
+
+    def __init__(
+        self,
+        api_key: str,
+        email: str = "",
+        password: str = "",
+        sandbox=False,
+        currency_ttl: float = 300.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        timeout: float = 30.0,
+        client: "httpx.AsyncClient" = None,
+        hooks: Hooks = None,
+        quote_cache: AsyncQuoteCache = None,
+        circuit_breaker: CircuitBreaker = None,
+        merchant_currencies: bool = False,
+        http2: bool = False,
+    ) -> None:
+        if client is None and httpx is None:
+            raise NowPaymentsException(
+                "AsyncNOWPaymentsAPI requires httpx: pip install nowpayments-api[async]"
+            )
+        self.api_uri = self.BASE_URI if not sandbox else self.BASE_URI_SANDBOX
+        self.web_payment_uri = (
+            self.WEB_APP_PAYMENT_URI
+            if not sandbox
+            else self.WEB_APP_PAYMENT_URI_SANDBOX
+        )
+
+        self._api_key = api_key
+        self._namespace = _key_namespace(api_key)
+        self._email = email
+        self._password = password
+        self.sandbox = sandbox
+        self.client = client or httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=timeout,
+        )
+        self.hooks = hooks
+        self.quote_cache = quote_cache
+        self.circuit_breaker = circuit_breaker
+        self.merchant_currencies = merchant_currencies
+        self.currency_catalog = AsyncCurrencyCatalog(
+            self._fetch_currency_tickers, ttl=currency_ttl
+        )
+        self.token_manager = AsyncTokenManager(self._fetch_token)
+
+    async def aclose(self) -> None:
+        """Close the connection pool."""
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncNOWPaymentsAPI":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    # -------------------------------
+    # Request Method Wrappers
+    # -------------------------------
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        bearer: str = None,
+        data: Dict = None,
+        stream: bool = False,
+    ) -> "httpx.Response":
+        uri = f"{self.api_uri}{endpoint}"
+        headers = {"x-api-key": self._api_key}
+        if bearer:
+            headers["Authorization"] = f"Bearer {bearer}"
+        request = self.client.build_request(method, uri, headers=headers, data=data)
+        hooks = self.hooks
+        breaker = self.circuit_breaker
+        if hooks is None and breaker is None:
+            return await self.client.send(request, stream=stream)
+        template = endpoint_template(endpoint)
+        if breaker is not None:
+            breaker.acquire(template)
+        sent = time.perf_counter()
+        try:
+            if hooks is not None:
+                hooks.emit(BEFORE_REQUEST, RequestEvent(method, template))
+                sent = time.perf_counter()
+            response = await self.client.send(request, stream=stream)
+        except httpx.TransportError as error:
+            duration = time.perf_counter() - sent
+            if breaker is not None:
+                breaker.record(template, duration=duration, error=error)
+            if hooks is not None:
+                hooks.emit(
+                    ON_ERROR,
+                    RequestEvent(method, template, duration=duration, error=error),
+                )
+            raise
+        except BaseException:
+            # Cancelled or interrupted without an outcome, give the trial call back.
+            if breaker is not None:
+                breaker.release(template)
+            raise
+        duration = time.perf_counter() - sent
+        if breaker is not None:
+            breaker.record(template, status=response.status_code, duration=duration)
+        if hooks is None:
+            return response
+        hooks.emit(
+            AFTER_RESPONSE,
+            RequestEvent(
+                method,
+                template,
+                status=response.status_code,
+                duration=duration,
+                request_bytes=len(request.content),
+                response_bytes=None if stream else len(response.content),
+            ),
+        )
+        return response
+
+    async def _get_request(self, endpoint: str, bearer: str = None) -> Dict:
+        response = await self._request("GET", endpoint, bearer=bearer)
+        if response.is_success:
+            return response.json()
+        from requests import HTTPError  # pylint: disable=import-outside-toplevel
+
+        raise HTTPError(response.json().get("message"), response=response)
+
+    async def _get_stream(self, endpoint: str, bearer: str = None) -> "httpx.Response":
+        response = await self._request("GET", endpoint, bearer=bearer, stream=True)
+        if response.is_success:
+            return response
+        from requests import HTTPError  # pylint: disable=import-outside-toplevel
+
+        try:
+            await response.aread()
+            raise HTTPError(response.json().get("message"), response=response)
+        finally:
+            await response.aclose()
+
+    async def _post_requests(self, endpoint: str, data: Dict = None) -> Dict:
+        response = await self._request("POST", endpoint, data=data)
+        _raise_for_status(response)
+        return response.json()
+
+    async def _authorized_get_request(self, endpoint: str, stream: bool = False) -> Any:
+        from requests import HTTPError  # pylint: disable=import-outside-toplevel
+
+        get = self._get_stream if stream else self._get_request
+        bearer = await self.token_manager.token()
+        try:
+            return await get(endpoint, bearer=bearer)
+        except HTTPError as error:
+            if error.response is None or error.response.status_code != 401:
+                raise
+        bearer = await self.token_manager.refresh(stale_token=bearer)
+        return await get(endpoint, bearer=bearer)
+
+    @staticmethod
+    async def _iter_items(response: "httpx.Response", key: str) -> AsyncIterator[Dict]:
+        try:
+            async for item in aiter_json_array(
+                response.aiter_bytes(STREAM_CHUNK_SIZE), key
+            ):
+                yield item
+        finally:
+            await response.aclose()
+
+    async def _fetch_token(self) -> str:
+        return (await self.auth())["token"]
+
+    async def _check_cryptocurrency(self, currency: str) -> None:
+        if not await self.currency_catalog.contains(currency):
+            raise NowPaymentsException("Unsupported cryptocurrency")
+
+    # -------------------------
+    # Auth an API Status
+    # -------------------------
+    async def status(self) -> Dict:
+        """See :meth:`NOWPaymentsAPI.status`."""
+        return await self._get_request("status")
+
+    async def auth(self) -> Dict:
+        """See :meth:`NOWPaymentsAPI.auth`."""
+        if not self._email or not self._password:
+            raise NowPaymentsException("Email and password are missing")
+        return await self._post_requests(
+            "auth", {"email": self._email, "password": self._password}
+        )
+
+    # -------------------------
+    # Payments
+    # -------------------------
+    async def create_payment(
+        self,
+        price_amount: float,
+        price_currency: str,
+        pay_currency: str,
+        idempotency_key: str = None,
+        **kwargs: Union[str, float, bool, int],
+    ) -> Dict:
+        """
+        See :meth:`NOWPaymentsAPI.create_payment`. ``idempotency_key`` is not supported, the async client
+        has neither retry policy nor idempotency store.
+        """
+        _reject_idempotency_key(idempotency_key)
+        _validate_price(price_amount, price_currency)
+        await self._check_cryptocurrency(pay_currency)
+        payload = PaymentData(
+            price_amount=price_amount,
+            price_currency=price_currency,
+            pay_currency=pay_currency,
+            **kwargs,
+        )
+        return await self._post_requests("payment", data=payload.clean_data_to_dict())
+
+    async def create_invoice(
+        self,
+        price_amount: float,
+        price_currency: str,
+        pay_currency: str,
+        idempotency_key: str = None,
+        **kwargs: Union[str, float, bool, int],
+    ) -> Dict:
+        """
+        See :meth:`NOWPaymentsAPI.create_invoice`. ``idempotency_key`` is not supported, the async client
+        has neither retry policy nor idempotency store.
+        """
+        _reject_idempotency_key(idempotency_key)
+        _validate_price(price_amount, price_currency)
+        await self._check_cryptocurrency(pay_currency)
+        payload = InvoiceData(
+            price_amount=price_amount,
+            price_currency=price_currency,
+            pay_currency=pay_currency,
+            **kwargs,
+        )
+        return await self._post_requests("invoice", data=payload.clean_data_to_dict())
+
+    async def create_invoices(
+        self,
+        invoices: Iterable[Union[InvoiceData, Dict[str, Any]]],
+        max_workers: int = 10,
+    ) -> List[BatchResult]:
+        """See :meth:`NOWPaymentsAPI.create_invoices`."""
+        rejected, accepted = _invoice_batch(invoices, await self.currency_catalog.get())
+
+        async def submit(item: Tuple[int, InvoiceData]) -> Dict:
+            return await self._post_requests(
+                "invoice", data=item[1].clean_data_to_dict()
+            )
+
+        results = rejected
+        async for result in aiter_concurrently(submit, accepted, max_workers):
+            index, invoice = result.key
+            results.append(BatchResult(invoice, index, result.value, result.error))
+        return sorted(results, key=lambda result: result.index)
+
+    async def create_payment_by_invoice(
+        self, invoice_id: int, pay_currency: str, **kwargs: Union[str, str, int, str]
+    ) -> Dict:
+        """See :meth:`NOWPaymentsAPI.create_payment_by_invoice`."""
+        await self._check_cryptocurrency(pay_currency)
+        data = InvoicePaymentData(iid=invoice_id, pay_currency=pay_currency, **kwargs)
+        response = await self._post_requests(
+            "invoice-payment", data=data.clean_data_to_dict()
+        )
+        uri = f"{self.web_payment_uri}?iid={invoice_id}&paymentId={response['payment_id']}"
+        response["uri"] = uri
+        return response
+
+    async def minimum_payment_amount(
+        self, currency_from: str, currency_to: str, **kwargs
+    ) -> Any:
+        """See :meth:`NOWPaymentsAPI.minimum_payment_amount`."""
+        endpoint = _min_amount_endpoint(currency_from, currency_to, **kwargs)
+        if self.quote_cache is None:
+            return await self._get_request(endpoint)
+        return dict(
+            await self.quote_cache.get(
+                (self._namespace, endpoint), lambda: self._get_request(endpoint)
+            )
+        )
+
+    async def update_payment_estimate(self, payment_id: int) -> Dict:
+        """See :meth:`NOWPaymentsAPI.update_payment_estimate`."""
+        _validate_payment_id(payment_id)
+        return await self._post_requests(
+            f"payment/{payment_id}/update-merchant-estimate"
+        )
+
+    async def estimate_price(
+        self, amount: float, currency_from: str, currency_to: str
+    ) -> Dict:
+        """See :meth:`NOWPaymentsAPI.estimate_price`."""
+        _validate_price(amount, currency_from)
+        await self._check_cryptocurrency(currency_to)
+        if self.quote_cache is None:
+            return await self._get_request(
+                _estimate_endpoint(amount, currency_from, currency_to)
+            )
+        endpoint = _estimate_endpoint(
+            self.quote_cache.bucket(amount), currency_from, currency_to
+        )
+        quote = await self.quote_cache.get(
+            (self._namespace, endpoint), lambda: self._get_request(endpoint)
+        )
+        return scale_estimate(quote, amount)
+
+    async def payment_status(self, payment_id: int) -> Dict:
+        """See :meth:`NOWPaymentsAPI.payment_status`."""
+        _validate_payment_id(payment_id)
+        return await self._get_request(f"payment/{payment_id}")
+
+    def iter_payment_statuses(
+        self, payment_ids: Iterable[int], max_workers: int = 10
+    ) -> AsyncIterator[BatchResult]:
+        """See :meth:`NOWPaymentsAPI.iter_payment_statuses`. Use with ``async for``."""
+        return aiter_concurrently(self.payment_status, payment_ids, max_workers)
+
+    async def payment_statuses(
+        self, payment_ids: Iterable[int], max_workers: int = 10
+    ) -> Dict[int, BatchResult]:
+        """See :meth:`NOWPaymentsAPI.payment_statuses`."""
+        return {
+            result.key: result
+            async for result in self.iter_payment_statuses(payment_ids, max_workers)
+        }
+
+    async def list_of_payments(
+        self,
+        limit: int = 10,
+        page: int = 0,
+        sort_by: str = "created_at",
+        order_by: str = "asc",
+        date_from: datetime = None,
+        date_to: datetime = None,
+        stream: bool = False,
+    ) -> Any:
+        """
+        See :meth:`NOWPaymentsAPI.list_of_payments`. With ``stream`` the result is an async iterator.
+        """
+        endpoint = _list_of_payments_endpoint(
+            limit, page, sort_by, order_by, date_from, date_to
+        )
+        if stream:
+            return self._iter_items(
+                await self._authorized_get_request(endpoint, stream=True), "data"
+            )
+        return await self._authorized_get_request(endpoint)
+
+    def iter_payments(
+        self,
+        limit: int = 500,
+        sort_by: str = "created_at",
+        order_by: str = "asc",
+        date_from: datetime = None,
+        date_to: datetime = None,
+        start_page: int = 0,
+        cursor: PaymentCursor = None,
+        prefetch: bool = False,
+        stream: bool = False,
+    ) -> AsyncPaymentIterator:
+        """See :meth:`NOWPaymentsAPI.iter_payments`. Use with ``async for``."""
+        _list_of_payments_endpoint(limit, start_page, sort_by, order_by)
+
+        async def fetch_page(page: int) -> Any:
+            return await self.list_of_payments(
+                limit, page, sort_by, order_by, date_from, date_to, stream=stream
+            )
+
+        return AsyncPaymentIterator(
+            fetch_page,
+            limit,
+            cursor=cursor or PaymentCursor(start_page, 0),
+            prefetch=prefetch,
+            stream=stream,
+        )
+
+    # -------------------------
+    # Currencies
+    # -------------------------
+    async def currencies(self, fixed_rate: bool = True) -> Dict:
+        """See :meth:`NOWPaymentsAPI.currencies`."""
+        return await self._get_request(f"currencies?fixed_rate={fixed_rate}")
+
+    async def currencies_full(self, stream: bool = False) -> Any:
+        """
+        See :meth:`NOWPaymentsAPI.currencies_full`. With ``stream`` the result is an async iterator.
+        """
+        if stream:
+            return self._iter_items(
+                await self._get_stream("full-currencies"), "currencies"
+            )
+        return await self._get_request("full-currencies")
+
+    async def currencies_checked(self) -> Dict:
+        """See :meth:`NOWPaymentsAPI.currencies_checked`."""
+        return await self._get_request("merchant/coins")
+
+    async def refresh_currencies(self) -> FrozenSet[str]:
+        """See :meth:`NOWPaymentsAPI.refresh_currencies`."""
+        return await self.currency_catalog.refresh()
+
+    async def _fetch_currency_tickers(self) -> List[str]:
+        if self.merchant_currencies:
+            coins = await self.currencies_checked()
+            return [ticker.lower() for ticker in coins["selectedCurrencies"]]
+        return (await self.currencies())["currencies"]
@@ -0,0 +1,269 @@
+"""
+Recording and replay of the HTTP exchanges of :class:`NOWPaymentsAPI`.
+
+A :class:`CassetteAdapter` is mounted on the client's session in place of the default transport
+adapter. In ``record`` mode it sends the requests and writes every exchange to a cassette file; in
+``replay`` mode it answers from the cassette without touching the network, optionally with the
+recorded or a fixed latency.
+
+    adapter = CassetteAdapter("tests/cassettes/sandbox.jsonl", mode="once")
+    api = NOWPaymentsAPI(api_key, sandbox=True, adapter=adapter)
+
+Secrets never reach the cassette: request headers (``x-api-key`` and bearer tokens) are not recorded,
+the ``email`` and ``password`` fields are scrubbed from request bodies and the tokens returned by
+``auth`` are replaced by a placeholder token.
+"""
+
+import base64
+import gzip
+import io
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+from .exceptions import NowPaymentsException
+
+RECORD = "record"
+REPLAY = "replay"
+ONCE = "once"
+
+SCRUBBED = "<scrubbed>"
+SCRUBBED_FIELDS = ("email", "password")
+# Parameters derived from the current time, which differ between a recording and its replay.
+IGNORED_PARAMS = ("dateFrom", "dateTo")
+RECORDED_HEADERS = ("Content-Type", "Retry-After")
+
+FORMAT_VERSION = 1
+
+
+def _placeholder_token() -> str:
+    def encode(value: Dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+    # Far in the future, so that a replayed token is never refreshed.
+    claims = {"id": "cassette", "exp": 4102444800}
+    return f"{encode({'alg': 'HS256', 'typ': 'JWT'})}.{encode(claims)}.{SCRUBBED}"
+
+
+PLACEHOLDER_TOKEN = _placeholder_token()
+
+
+class CassetteError(NowPaymentsException):
+    """Raised when a replayed request has no recorded exchange."""
+
+
+def _scrub_body(
+    body: Optional[bytes], content_type: str, fields: Iterable[str]
+) -> Optional[str]:
+    if not body:
+        return None
+    text = body.decode() if isinstance(body, bytes) else body
+    fields = set(fields)
+    if "json" in content_type:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = {k: SCRUBBED if k in fields else v for k, v in data.items()}
+        return json.dumps(data, separators=(",", ":"), sort_keys=True)
+    pairs = parse_qsl(text, keep_blank_values=True)
+    return urlencode([(k, SCRUBBED if k in fields else v) for k, v in pairs])
+
+
+def _scrub_response(data: Any) -> Any:
+    if isinstance(data, dict) and "token" in data:
+        return {**data, "token": PLACEHOLDER_TOKEN}
+    return data
+
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    Transport adapter recording exchanges to, or replaying them from, a cassette file.
+
+    The cassette holds one JSON document per line. Requests are matched on their method, path,
+    query (without ``ignored_params``) and, with ``match_body``, their scrubbed body. Exchanges with
+    the same key are replayed in the recorded order, the last one is repeated once they are used up.
+    A path ending with ``.gz`` is compressed.
+
+    :param str path: Cassette file.
+    :param str mode: ``record`` overwrites the cassette with new exchanges, ``replay`` only reads it,
+        ``once`` replays an existing cassette and records it otherwise.
+    :param float latency: Seconds added to every replayed response.
+    :param bool real_time: Replay each response after its recorded duration.
+    :param bool match_body: Include the request body in the match key.
+    :param scrub_fields: Request body fields replaced by ``<scrubbed>``.
+    :param ignored_params: Query parameters left out of the match key.
+    :param adapter_kwargs: Passed to :class:`HTTPAdapter` for the recording requests.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        path: str,
+        mode: str = REPLAY,
+        latency: float = 0.0,
+        real_time: bool = False,
+        match_body: bool = False,
+        scrub_fields: Iterable[str] = SCRUBBED_FIELDS,
+        ignored_params: Iterable[str] = IGNORED_PARAMS,
+        sleep: Callable[[float], None] = time.sleep,
+        **adapter_kwargs: Any,
+    ) -> None:
+        if mode not in (RECORD, REPLAY, ONCE):
+            raise ValueError(f"Unknown cassette mode {mode!r}")
+        super().__init__(**adapter_kwargs)
+        self.path = os.fspath(path)
+        if mode == ONCE:
+            mode = REPLAY if os.path.exists(self.path) else RECORD
+        self.mode = mode
+        self.latency = latency
+        self.real_time = real_time
+        self.match_body = match_body
+        self.scrub_fields = tuple(scrub_fields)
+        self.ignored_params = frozenset(ignored_params)
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._exchanges: Dict[Tuple, Deque[Dict]] = defaultdict(deque)
+        self.played = 0
+        if mode == RECORD:
+            with self._open("wt") as file:
+                file.write(json.dumps({"version": FORMAT_VERSION}) + "\n")
+        else:
+            self._load()
+
+    def _open(self, mode: str):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode, encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def _load(self) -> None:
+        with self._open("rt") as file:
+            header = json.loads(file.readline() or "{}")
+            if header.get("version") != FORMAT_VERSION:
+                raise CassetteError(f"Unsupported cassette {self.path}")
+            for line in file:
+                if line.strip():
+                    exchange = json.loads(line)
+                    self._exchanges[self._key_of(exchange)].append(exchange)
+
+    def exchanges(self) -> List[Dict]:
+        """Exchanges of the cassette, in recorded order for each request."""
+        with self._lock:
+            return [
+                exchange for queue in self._exchanges.values() for exchange in queue
+            ]
+
+    def _key(self, method: str, url: str, body: Optional[str]) -> Tuple:
+        parts = urlsplit(url)
+        query = tuple(
+            sorted(
+                (k, v)
+                for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                if k not in self.ignored_params
+            )
+        )
+        return (method, parts.path, query, body if self.match_body else None)
+
+    def _key_of(self, exchange: Dict) -> Tuple:
+        return self._key(exchange["method"], exchange["url"], exchange.get("body"))
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout: Any = None,
+        verify: Any = True,
+        cert: Any = None,
+        proxies: Any = None,
+    ) -> requests.Response:  # pylint: disable=too-many-arguments
+        body = _scrub_body(
+            request.body,
+            request.headers.get("Content-Type", ""),
+            self.scrub_fields,
+        )
+        if self.mode == RECORD:
+            return self._record(request, body, timeout, verify, cert, proxies)
+        key = self._key(request.method, request.url, body)
+        with self._lock:
+            queue = self._exchanges.get(key)
+            if not queue:
+                raise CassetteError(
+                    f"No recorded exchange for {request.method} {request.url}"
+                )
+            exchange = queue.popleft() if len(queue) > 1 else queue[0]
+            self.played += 1
+        delay = self.latency + (
+            exchange.get("duration", 0.0) if self.real_time else 0.0
+        )
+        if delay > 0:
+            self._sleep(delay)
+        response = self._build(request, exchange)
+        if not stream:
+            response.content  # pylint: disable=pointless-statement
+        return response
+
+    def _record(
+        self,
+        request: requests.PreparedRequest,
+        body: Optional[str],
+        timeout: Any,
+        verify: Any,
+        cert: Any,
+        proxies: Any,
+    ) -> requests.Response:  # pylint: disable=too-many-arguments
+        started = time.perf_counter()
+        response = super().send(
+            request, timeout=timeout, verify=verify, cert=cert, proxies=proxies
+        )
+        content = response.content
+        exchange = {
+            "method": request.method,
+            "url": request.url,
+            "body": body,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {
+                name: response.headers[name]
+                for name in RECORDED_HEADERS
+                if name in response.headers
+            },
+            "duration": round(time.perf_counter() - started, 6),
+        }
+        try:
+            exchange["json"] = _scrub_response(json.loads(content))
+        except ValueError:
+            exchange["text"] = content.decode(response.encoding or "utf-8", "replace")
+        line = json.dumps(exchange, separators=(",", ":"))
+        with self._lock:
+            self._exchanges[self._key_of(exchange)].append(exchange)
+            with self._open("at") as file:
+                file.write(line + "\n")
+        # The caller gets the real body, only the cassette is scrubbed.
+        return self._build(request, exchange, content)
+
+    def _build(
+        self,
+        request: requests.PreparedRequest,
+        exchange: Dict,
+        content: Optional[bytes] = None,
+    ) -> requests.Response:
+        if content is None and "json" in exchange:
+            content = json.dumps(exchange["json"]).encode()
+        elif content is None:
+            content = exchange.get("text", "").encode()
+        headers = dict(exchange.get("headers") or {})
+        headers["Content-Length"] = str(len(content))
+        raw = HTTPResponse(
+            body=io.BytesIO(content),
+            headers=headers,
+            status=exchange["status"],
+            reason=exchange.get("reason"),
+            preload_content=False,
+            decode_content=False,
+        )
+        return self.build_response(request, raw)
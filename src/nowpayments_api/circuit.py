@@ -0,0 +1,255 @@
+"""
+Per-endpoint circuit breaker for the requests made by the API clients.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Optional
+
+from .exceptions import NowPaymentsException
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(NowPaymentsException):
+    """Raised instead of sending a request to an endpoint whose circuit is open."""
+
+    def __init__(self, endpoint: str, retry_after: float) -> None:
+        super().__init__(f"Circuit for {endpoint} is open, retry in {retry_after:.3f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+@dataclass
+class CircuitStats:
+    """
+    State of the circuit of one endpoint.
+
+    :param str state: ``closed``, ``open`` or ``half_open``.
+    :param int calls: Calls in the rolling window.
+    :param int failures: Failed or slow calls in the rolling window.
+    :param int rejected: Calls rejected while open since the circuit was created.
+    :param float opened_at: Clock value when the circuit last opened.
+    """
+
+    state: str
+    calls: int
+    failures: int
+    rejected: int
+    opened_at: Optional[float] = None
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.calls if self.calls else 0.0
+
+
+class _Circuit:
+    __slots__ = ("state", "outcomes", "failures", "rejected", "opened_at", "probes")
+
+    def __init__(self, window_size: int) -> None:
+        self.state = CLOSED
+        self.outcomes: Deque[bool] = deque(maxlen=window_size)
+        self.failures = 0
+        self.rejected = 0
+        self.opened_at: Optional[float] = None
+        self.probes = 0
+
+    def reset(self) -> None:
+        self.outcomes.clear()
+        self.failures = 0
+        self.probes = 0
+
+
+class CircuitBreaker:  # pylint: disable=too-many-instance-attributes
+    """
+    Stops sending requests to an endpoint that keeps failing, so callers fail fast instead of waiting
+    for timeouts.
+
+    Every endpoint template (e.g. ``estimate``, ``payment/{id}``) has its own circuit. A closed
+    circuit records the outcome of the last ``window_size`` calls: a call fails when it raises a
+    connection error or timeout, answers with a 5xx status, or takes longer than
+    ``slow_call_duration``. Once ``min_calls`` were recorded and the failure rate reaches
+    ``failure_rate`` the circuit opens, and calls raise :class:`CircuitOpenError` without a request.
+    After ``open_duration`` seconds it is half open: ``probes`` trial calls go through, and it closes
+    when they all succeed or opens again on the first failure.
+
+        breaker = CircuitBreaker(failure_rate=0.5, slow_call_duration=2.0)
+        api = NOWPaymentsAPI(api_key, circuit_breaker=breaker)
+        breaker.stats()["estimate"].state
+
+    :param float failure_rate: Ratio of failed calls in the window opening the circuit.
+    :param int window_size: Number of recent calls the failure rate is computed on.
+    :param int min_calls: Calls needed in the window before the circuit can open.
+    :param float slow_call_duration: Seconds after which a call counts as failed, None to ignore latency.
+    :param float open_duration: Seconds the circuit stays open before trial calls.
+    :param int probes: Trial calls allowed, and needed to close, in the half-open state.
+    :param on_state_change: Called with the endpoint, the previous and the new state.
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        window_size: int = 20,
+        min_calls: int = 10,
+        slow_call_duration: Optional[float] = None,
+        open_duration: float = 30.0,
+        probes: int = 1,
+        on_state_change: Callable[[str, str, str], None] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 0 < failure_rate <= 1:
+            raise ValueError("failure_rate must be in (0, 1]")
+        self.failure_rate = failure_rate
+        self.window_size = window_size
+        self.min_calls = min(min_calls, window_size)
+        self.slow_call_duration = slow_call_duration
+        self.open_duration = open_duration
+        self.probes = probes
+        self.on_state_change = on_state_change
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._circuits: Dict[str, _Circuit] = {}
+
+    def _circuit(self, endpoint: str) -> _Circuit:
+        circuit = self._circuits.get(endpoint)
+        if circuit is None:
+            circuit = self._circuits[endpoint] = _Circuit(self.window_size)
+        return circuit
+
+    def _transition(self, endpoint: str, circuit: _Circuit, state: str) -> None:
+        previous, circuit.state = circuit.state, state
+        if state == OPEN:
+            circuit.opened_at = self._clock()
+        circuit.reset()
+        logger.warning("NOWPayments circuit for %s is %s", endpoint, state)
+        if self.on_state_change is not None:
+            try:
+                self.on_state_change(endpoint, previous, state)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("NOWPayments circuit state callback failed")
+
+    def state(self, endpoint: str) -> str:
+        """Current state of an endpoint's circuit, taking the end of the open period into account."""
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None:
+                return CLOSED
+            if (
+                circuit.state == OPEN
+                and self._clock() - circuit.opened_at >= self.open_duration
+            ):
+                return HALF_OPEN
+            return circuit.state
+
+    def acquire(self, endpoint: str) -> None:
+        """
+        Let a call to ``endpoint`` through, or raise.
+
+        :raises CircuitOpenError: If the circuit is open, or half open with all trial calls in flight.
+        """
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state == CLOSED:
+                return
+            elapsed = self._clock() - circuit.opened_at
+            if circuit.state == OPEN and elapsed >= self.open_duration:
+                self._transition(endpoint, circuit, HALF_OPEN)
+            # A trial call that never reported back is given up after another open period.
+            if circuit.state == HALF_OPEN and (
+                circuit.probes < self.probes or elapsed >= 2 * self.open_duration
+            ):
+                circuit.probes += 1
+                circuit.opened_at = self._clock() - self.open_duration
+                return
+            circuit.rejected += 1
+            raise CircuitOpenError(endpoint, max(0.0, self.open_duration - elapsed))
+
+    def release(self, endpoint: str) -> None:
+        """
+        Give back a call let through by :meth:`acquire` that ended without an outcome, e.g. interrupted
+        before its request was sent, so that a half-open circuit lets another trial call through.
+        """
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if (
+                circuit is not None
+                and circuit.state == HALF_OPEN
+                and circuit.probes > 0
+            ):
+                circuit.probes -= 1
+
+    def record(
+        self,
+        endpoint: str,
+        status: Optional[int] = None,
+        duration: Optional[float] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """Record the outcome of a call let through by :meth:`acquire`."""
+        failed = (
+            error is not None
+            or (status is not None and status >= 500)
+            or (
+                self.slow_call_duration is not None
+                and duration is not None
+                and duration > self.slow_call_duration
+            )
+        )
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state == HALF_OPEN:
+                if failed:
+                    self._transition(endpoint, circuit, OPEN)
+                    return
+                circuit.outcomes.append(False)
+                if len(circuit.outcomes) >= self.probes:
+                    self._transition(endpoint, circuit, CLOSED)
+                return
+            if circuit.state == OPEN:
+                return
+            if len(circuit.outcomes) == circuit.outcomes.maxlen:
+                circuit.failures -= circuit.outcomes[0]
+            circuit.outcomes.append(failed)
+            circuit.failures += failed
+            if len(
+                circuit.outcomes
+            ) >= self.min_calls and circuit.failures >= self.failure_rate * len(
+                circuit.outcomes
+            ):
+                self._transition(endpoint, circuit, OPEN)
+
+    def stats(self) -> Dict[str, CircuitStats]:
+        """State of the circuit of every endpoint called so far."""
+        with self._lock:
+            items = [
+                (endpoint, circuit, len(circuit.outcomes))
+                for endpoint, circuit in self._circuits.items()
+            ]
+            stats = {
+                endpoint: CircuitStats(
+                    circuit.state,
+                    calls,
+                    circuit.failures,
+                    circuit.rejected,
+                    circuit.opened_at,
+                )
+                for endpoint, circuit, calls in items
+            }
+        for endpoint, stat in stats.items():
+            stat.state = self.state(endpoint)
+        return stats
+
+    def reset(self, endpoint: Optional[str] = None) -> None:
+        """Close the circuit of ``endpoint``, or of every endpoint."""
+        with self._lock:
+            if endpoint is None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(endpoint, None)
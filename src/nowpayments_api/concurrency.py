@@ -0,0 +1,124 @@
+"""
+Helpers to run many API calls concurrently with a bounded number of requests in flight.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
+
+
+@dataclass
+class BatchResult:
+    """
+    Outcome of one item of a batch: either ``value`` or the ``error`` raised for ``key``.
+    """
+
+    key: Any
+    index: int
+    value: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _call(func: Callable[[Any], Any], key: Any, index: int) -> BatchResult:
+    try:
+        return BatchResult(key, index, value=func(key))
+    except Exception as error:  # pylint: disable=broad-except
+        return BatchResult(key, index, error=error)
+
+
+def iter_concurrently(
+    func: Callable[[Any], Any], items: Iterable[Any], max_workers: int = 10
+) -> Iterator[BatchResult]:
+    """
+    Call ``func`` for every item in a thread pool and yield the results as they complete.
+
+    At most ``max_workers`` calls are in flight and items are consumed lazily, so arbitrarily large
+    iterables can be processed. Exceptions are captured in the yielded :class:`BatchResult` and do
+    not stop the batch.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+    items = enumerate(items)
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="nowpayments"
+    ) as executor:
+        pending = set()
+        try:
+            for index, key in items:
+                pending.add(executor.submit(_call, func, key, index))
+                if len(pending) >= max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def run_concurrently(
+    func: Callable[[Any], Any], items: Iterable[Any], max_workers: int = 10
+) -> List[BatchResult]:
+    """
+    Like :func:`iter_concurrently`, but wait for every item and return the results in input order.
+    """
+    return sorted(
+        iter_concurrently(func, items, max_workers), key=lambda result: result.index
+    )
+
+
+async def _acall(
+    func: Callable[[Any], Awaitable[Any]], key: Any, index: int
+) -> BatchResult:
+    try:
+        return BatchResult(key, index, value=await func(key))
+    except Exception as error:  # pylint: disable=broad-except
+        return BatchResult(key, index, error=error)
+
+
+async def aiter_concurrently(
+    func: Callable[[Any], Awaitable[Any]], items: Iterable[Any], max_workers: int = 10
+) -> AsyncIterator[BatchResult]:
+    """
+    asyncio version of :func:`iter_concurrently`, running at most ``max_workers`` coroutines at a
+    time.
+    """
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+    pending = set()
+    try:
+        for index, key in enumerate(items):
+            pending.add(asyncio.ensure_future(_acall(func, key, index)))
+            if len(pending) >= max_workers:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
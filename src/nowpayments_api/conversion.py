@@ -0,0 +1,182 @@
+"""
+Local conversion of fiat prices into cryptocurrencies from a snapshot of estimated rates.
+"""
+
+import math
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .concurrency import aiter_concurrently, run_concurrently
+from .exceptions import NowPaymentsException
+
+Pair = Tuple[str, str]
+
+
+class ConversionEngine:
+    """
+    Converts fiat amounts into cryptocurrencies locally.
+
+    :meth:`refresh` fetches the estimate of ``reference_amount`` for every (fiat, crypto) pair
+    concurrently and stores the resulting rates in a flat ``array('d')``, so :meth:`convert` is a
+    dictionary lookup and a multiplication. Pairs whose estimate fails keep their previous rate and
+    age, see :meth:`age` and :meth:`stale_pairs`.
+
+        engine = ConversionEngine(api, ["usd", "eur"], ["btc", "eth", "ltc"])
+        engine.refresh()
+        engine.convert(100, "usd", "btc")
+
+    :param api: NOWPaymentsAPI, or AsyncNOWPaymentsAPI when refreshing with :meth:`arefresh`.
+    :param fiats: Fiat currencies to convert from.
+    :param cryptos: Cryptocurrencies to convert to.
+    :param float reference_amount: Fiat amount whose estimate gives the rate.
+    :param int max_workers: Maximum number of estimate requests in flight.
+    """
+
+    def __init__(
+        self,
+        api: Any,
+        fiats: Sequence[str],
+        cryptos: Sequence[str],
+        reference_amount: float = 100.0,
+        max_workers: int = 10,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.api = api
+        self.fiats = tuple(fiats)
+        self.cryptos = tuple(cryptos)
+        self.reference_amount = reference_amount
+        self.max_workers = max_workers
+        self._clock = clock
+        self._index: Dict[Pair, int] = {
+            (fiat, crypto): position
+            for position, (fiat, crypto) in enumerate(
+                (fiat, crypto) for fiat in self.fiats for crypto in self.cryptos
+            )
+        }
+        size = len(self._index)
+        # Rates and fetch times are swapped together so readers always see one consistent snapshot.
+        self._table: Tuple[array, array] = (
+            array("d", [math.nan]) * size,
+            array("d", [math.nan]) * size,
+        )
+        self._lock = threading.Lock()
+        self._stop: Optional[threading.Event] = None
+
+    @property
+    def pairs(self) -> List[Pair]:
+        return list(self._index)
+
+    def _position(self, fiat: str, crypto: str) -> int:
+        try:
+            return self._index[(fiat, crypto)]
+        except KeyError:
+            raise NowPaymentsException(
+                f"Conversion from {fiat} to {crypto} is not configured"
+            ) from None
+
+    def rate(self, fiat: str, crypto: str) -> float:
+        """Units of ``crypto`` per unit of ``fiat``."""
+        rate = self._table[0][self._position(fiat, crypto)]
+        if math.isnan(rate):
+            raise NowPaymentsException(f"No rate for {fiat} to {crypto} yet")
+        return rate
+
+    def convert(self, amount: float, fiat: str, crypto: str) -> float:
+        """Convert a fiat amount into ``crypto`` with the last fetched rate."""
+        return amount * self.rate(fiat, crypto)
+
+    def convert_many(
+        self, amounts: Iterable[float], fiat: str, crypto: str
+    ) -> "array[float]":
+        """Convert many fiat amounts at once, e.g. to price a whole catalog."""
+        rate = self.rate(fiat, crypto)
+        return array("d", [amount * rate for amount in amounts])
+
+    def age(self, fiat: str, crypto: str) -> Optional[float]:
+        """Seconds since the rate of a pair was fetched, None if it never was."""
+        fetched_at = self._table[1][self._position(fiat, crypto)]
+        if math.isnan(fetched_at):
+            return None
+        return self._clock() - fetched_at
+
+    def stale_pairs(self, max_age: float) -> List[Pair]:
+        """Pairs without a rate or with a rate older than ``max_age`` seconds."""
+        oldest = self._clock() - max_age
+        fetched = self._table[1]
+        return [
+            pair
+            for pair, position in self._index.items()
+            if not fetched[position] >= oldest
+        ]
+
+    def _estimate(self, pair: Pair) -> Any:
+        return self.api.estimate_price(self.reference_amount, *pair)
+
+    def _update(self, results: Iterable[Any]) -> Dict[Pair, BaseException]:
+        errors = {}
+        with self._lock:
+            rates, fetched = (array("d", column) for column in self._table)
+            now = self._clock()
+            for result in results:
+                position = self._index[result.key]
+                if result.ok:
+                    try:
+                        estimated = float(result.value["estimated_amount"])
+                    except (KeyError, TypeError, ValueError) as error:
+                        errors[result.key] = error
+                        continue
+                    rates[position] = estimated / self.reference_amount
+                    fetched[position] = now
+                else:
+                    errors[result.key] = result.error
+            self._table = (rates, fetched)
+        return errors
+
+    def refresh(self) -> Dict[Pair, BaseException]:
+        """
+        Fetch the rates of all pairs concurrently.
+
+        :returns: Errors of the pairs that could not be refreshed.
+        """
+        return self._update(
+            run_concurrently(self._estimate, self._index, self.max_workers)
+        )
+
+    async def arefresh(self) -> Dict[Pair, BaseException]:
+        """:meth:`refresh` with an :class:`AsyncNOWPaymentsAPI`."""
+        results = [
+            result
+            async for result in aiter_concurrently(
+                self._estimate, self._index, self.max_workers
+            )
+        ]
+        return self._update(results)
+
+    def start(self, interval: float = 60.0) -> None:
+        """Refresh the rates now and then every ``interval`` seconds in a background thread."""
+        if self._stop is not None:
+            raise NowPaymentsException("The conversion engine is already running")
+        self.refresh()
+        self._stop = threading.Event()
+        threading.Thread(
+            target=self._run,
+            args=(self._stop, interval),
+            name="nowpayments-rates",
+            daemon=True,
+        ).start()
+
+    def stop(self) -> None:
+        """Stop the background refresh."""
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+
+    def _run(self, stop: threading.Event, interval: float) -> None:
+        while not stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception:  # pylint: disable=broad-except
+                # Keep serving the previous rates, their age tells how stale they are.
+                pass
@@ -0,0 +1,266 @@
+"""
+In-memory catalog of the cryptocurrencies supported by the NOWPayments API.
+"""
+
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    Awaitable,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Optional,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    import asyncio
+
+HIT = "hit"
+STALE = "stale"
+MISS = "miss"
+
+
+class _BaseCurrencyCatalog:
+    """
+    State and bookkeeping shared by the sync and asyncio catalogs.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        stale_ttl: float = 60.0,
+        background_refresh: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl if ttl > 0 else 0.0
+        self.background_refresh = background_refresh
+        self._clock = clock
+
+        self._index: Optional[FrozenSet[str]] = None
+        self._loaded_at = 0.0
+        self._refreshing = False
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the tickers were fetched, or None if nothing is cached."""
+        if self._index is None:
+            return None
+        return self._clock() - self._loaded_at
+
+    def snapshot(self) -> Optional[FrozenSet[str]]:
+        """Cached tickers, whatever their age, without fetching anything."""
+        return self._index
+
+    def invalidate(self) -> None:
+        """Drop the cached tickers. The next lookup fetches them again."""
+        self._index = None
+        self._loaded_at = 0.0
+
+    def stats(self) -> Dict[str, int]:
+        """Cache counters."""
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+        }
+
+    def _lookup(self) -> str:
+        if self._index is not None:
+            age = self._clock() - self._loaded_at
+            if age < self.ttl:
+                self.hits += 1
+                return HIT
+            if self.background_refresh and age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                return STALE
+        self.misses += 1
+        return MISS
+
+    def _is_loaded_since(self, requested_at: float) -> bool:
+        return self._index is not None and self._loaded_at >= requested_at
+
+    def _store(self, tickers: Iterable[str]) -> FrozenSet[str]:
+        index = frozenset(tickers)
+        self._index = index
+        self._loaded_at = self._clock()
+        self.refreshes += 1
+        return index
+
+
+class CurrencyCatalog(_BaseCurrencyCatalog):
+    """
+    TTL cache for the list of available cryptocurrencies.
+
+    Tickers younger than ``ttl`` seconds are served from memory. Once they are older than ``ttl`` but
+    still younger than ``ttl + stale_ttl`` they keep being served while a background thread fetches a
+    fresh list (stale-while-revalidate), so a slow API does not slow down the caller. Anything older is
+    fetched synchronously on the next lookup.
+
+    :param fetch: Callable returning an iterable with the currency tickers.
+    :param float ttl: Seconds a fetched list is considered fresh. ``0`` disables caching.
+    :param float stale_ttl: Seconds an expired list may still be served while it is refreshed.
+    :param bool background_refresh: Refresh expired lists in a background thread.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Iterable[str]],
+        ttl: float = 300.0,
+        stale_ttl: float = 60.0,
+        background_refresh: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(ttl, stale_ttl, background_refresh, clock)
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._refreshing_lock = threading.Lock()
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.get()
+
+    def __len__(self) -> int:
+        return len(self.get())
+
+    @property
+    def currencies(self) -> FrozenSet[str]:
+        """Currently known tickers, fetching them if needed."""
+        return self.get()
+
+    def get(self) -> FrozenSet[str]:
+        """
+        Return the set of supported tickers, fetching or refreshing it when required.
+        """
+        index, state = self._index, self._lookup()
+        if state == HIT:
+            return index
+        if state == STALE:
+            self._refresh_in_background()
+            return index
+        return self.refresh()
+
+    def refresh(self) -> FrozenSet[str]:
+        """
+        Fetch the tickers from the API and replace the cached set.
+
+        Concurrent callers share one request: threads waiting for the lock reuse the set fetched by
+        the thread that held it instead of fetching it again.
+        """
+        requested_at = self._clock()
+        with self._lock:
+            if self._is_loaded_since(requested_at):
+                return self._index
+            return self._load()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            super().invalidate()
+
+    def _load(self) -> FrozenSet[str]:
+        try:
+            tickers = self._fetch()
+        except Exception:
+            self.refresh_errors += 1
+            raise
+        return self._store(tickers)
+
+    def _refresh_in_background(self) -> None:
+        with self._refreshing_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(
+            target=self._background_worker, name="nowpayments-currencies", daemon=True
+        ).start()
+
+    def _background_worker(self) -> None:
+        try:
+            with self._lock:
+                self._load()
+        except Exception:  # pylint: disable=broad-except
+            # Keep serving the stale list, the next lookup after stale_ttl retries synchronously.
+            pass
+        finally:
+            self._refreshing = False
+
+
+class AsyncCurrencyCatalog(_BaseCurrencyCatalog):
+    """
+    asyncio version of :class:`CurrencyCatalog`. ``fetch`` is a coroutine function and stale lists are
+    refreshed in a background task instead of a thread.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[Iterable[str]]],
+        ttl: float = 300.0,
+        stale_ttl: float = 60.0,
+        background_refresh: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(ttl, stale_ttl, background_refresh, clock)
+        self._fetch = fetch
+        self._lock: Optional["asyncio.Lock"] = None
+        self._task: Optional["asyncio.Task"] = None
+
+    async def contains(self, ticker: str) -> bool:
+        """Check whether the ticker is supported."""
+        return ticker in await self.get()
+
+    async def get(self) -> FrozenSet[str]:
+        """
+        Return the set of supported tickers, fetching or refreshing it when required.
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        index, state = self._index, self._lookup()
+        if state == HIT:
+            return index
+        if state == STALE:
+            if not self._refreshing:
+                self._refreshing = True
+                self._task = asyncio.get_running_loop().create_task(
+                    self._background_worker()
+                )
+            return index
+        return await self.refresh()
+
+    async def refresh(self) -> FrozenSet[str]:
+        """
+        Fetch the tickers from the API and replace the cached set. Concurrent callers share one request.
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        requested_at = self._clock()
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._is_loaded_since(requested_at):
+                return self._index
+            return await self._load()
+
+    async def _load(self) -> FrozenSet[str]:
+        try:
+            tickers = await self._fetch()
+        except Exception:
+            self.refresh_errors += 1
+            raise
+        return self._store(tickers)
+
+    async def _background_worker(self) -> None:
+        try:
+            await self.refresh()
+        except Exception:  # pylint: disable=broad-except
+            pass
+        finally:
+            self._refreshing = False
@@ -0,0 +1,7 @@
+"""
+Exceptions raised by the NOWPayments API wrapper.
+"""
+
+
+class NowPaymentsException(Exception):
+    pass
@@ -0,0 +1,235 @@
+"""
+Instrumentation of the requests made by the API clients.
+
+Callbacks registered on :class:`Hooks` receive a :class:`RequestEvent` before every attempt, after
+every response and when an attempt fails without a response. :class:`MetricsCollector` is a
+ready-made set of callbacks aggregating them into Prometheus metrics.
+"""
+
+import bisect
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+BEFORE_REQUEST = "before_request"
+AFTER_RESPONSE = "after_response"
+ON_ERROR = "on_error"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_ID_SEGMENT = re.compile(r"(?<=/)\d+(?=/|$)|^\d+(?=/|$)")
+
+logger = logging.getLogger(__name__)
+
+
+def endpoint_template(endpoint: str) -> str:
+    """
+    Endpoint without query string and with numeric path segments replaced by ``{id}``, so that
+    ``payment/5077125051?x=1`` and ``payment/5077125052`` are reported as ``payment/{id}``.
+    """
+    return _ID_SEGMENT.sub("{id}", endpoint.split("?", 1)[0])
+
+
+@dataclass
+class RequestEvent:  # pylint: disable=too-many-instance-attributes
+    """
+    One attempt of a request.
+
+    :param str method: HTTP method.
+    :param str endpoint: Endpoint template, see :func:`endpoint_template`.
+    :param int attempt: Number of the attempt, 1 for the first one.
+    :param int status: HTTP status of the response.
+    :param float duration: Seconds the attempt took.
+    :param int request_bytes: Size of the request body.
+    :param int response_bytes: Size of the response body.
+    :param Exception error: Exception raised instead of receiving a response.
+    """
+
+    method: str
+    endpoint: str
+    attempt: int = 1
+    status: Optional[int] = None
+    duration: Optional[float] = None
+    request_bytes: Optional[int] = None
+    response_bytes: Optional[int] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def retries(self) -> int:
+        return self.attempt - 1
+
+
+class Hooks:
+    """
+    Callbacks fired for every request attempt of the clients it is passed to.
+
+    Exceptions raised by callbacks are logged and never interrupt the request.
+    """
+
+    def __init__(self) -> None:
+        self._callbacks: Dict[str, List[Callable[[RequestEvent], None]]] = {
+            BEFORE_REQUEST: [],
+            AFTER_RESPONSE: [],
+            ON_ERROR: [],
+        }
+
+    def register(self, event: str, callback: Callable[[RequestEvent], None]) -> None:
+        """
+        :param str event: ``before_request``, ``after_response`` or ``on_error``.
+        :param callback: Called with the :class:`RequestEvent`.
+        """
+        if event not in self._callbacks:
+            raise ValueError(f"Unknown hook event {event!r}")
+        self._callbacks[event].append(callback)
+
+    def unregister(self, event: str, callback: Callable[[RequestEvent], None]) -> None:
+        self._callbacks[event].remove(callback)
+
+    def emit(self, event: str, request_event: RequestEvent) -> None:
+        for callback in self._callbacks[event]:
+            try:
+                callback(request_event)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("NOWPayments %s hook failed", event)
+
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, buckets: Sequence[float], value: float) -> None:
+        self.counts[bisect.bisect_left(buckets, value)] += 1
+        self.sum += value
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class MetricsCollector:
+    """
+    In-process metrics of the requests made by the clients, exported in the Prometheus text format.
+
+        metrics = MetricsCollector()
+        hooks = Hooks()
+        metrics.install(hooks)
+        api = NOWPaymentsAPI(api_key, hooks=hooks)
+        ...
+        print(metrics.to_prometheus())
+
+    :param buckets: Upper bounds in seconds of the latency histogram buckets.
+    :param str prefix: Prefix of the metric names.
+    """
+
+    def __init__(
+        self, buckets: Sequence[float] = DEFAULT_BUCKETS, prefix: str = "nowpayments"
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str], _Histogram] = {}
+        self._requests: Dict[Tuple[str, str, str], int] = {}
+        self._retries: Dict[Tuple[str, str], int] = {}
+        self._request_bytes: Dict[Tuple[str, str], int] = {}
+        self._response_bytes: Dict[Tuple[str, str], int] = {}
+
+    def install(self, hooks: Hooks) -> "MetricsCollector":
+        """Register the collector's callbacks on ``hooks``."""
+        hooks.register(AFTER_RESPONSE, self.observe)
+        hooks.register(ON_ERROR, self.observe)
+        return self
+
+    def observe(self, event: RequestEvent) -> None:
+        """Record a finished attempt."""
+        key = (event.method, event.endpoint)
+        status = "error" if event.status is None else str(event.status)
+        with self._lock:
+            if event.duration is not None:
+                histogram = self._latency.get(key)
+                if histogram is None:
+                    histogram = self._latency[key] = _Histogram(self.buckets)
+                histogram.observe(self.buckets, event.duration)
+            self._requests[key + (status,)] = self._requests.get(key + (status,), 0) + 1
+            if event.retries:
+                self._retries[key] = self._retries.get(key, 0) + 1
+            if event.request_bytes:
+                self._request_bytes[key] = (
+                    self._request_bytes.get(key, 0) + event.request_bytes
+                )
+            if event.response_bytes:
+                self._response_bytes[key] = (
+                    self._response_bytes.get(key, 0) + event.response_bytes
+                )
+
+    def requests(self) -> Dict[Tuple[str, str, str], int]:
+        """Number of attempts per method, endpoint and status (``error`` without response)."""
+        with self._lock:
+            return dict(self._requests)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._latency.clear()
+            self._requests.clear()
+            self._retries.clear()
+            self._request_bytes.clear()
+            self._response_bytes.clear()
+
+    def to_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        name = self.prefix
+        lines = []
+        with self._lock:
+            lines += [
+                f"# HELP {name}_request_duration_seconds Duration of NOWPayments API requests.",
+                f"# TYPE {name}_request_duration_seconds histogram",
+            ]
+            for (method, endpoint), histogram in sorted(self._latency.items()):
+                cumulative = 0
+                for bound, count in zip(
+                    [*map(repr, self.buckets), "+Inf"], histogram.counts
+                ):
+                    cumulative += count
+                    labels = _labels(method=method, endpoint=endpoint, le=bound)
+                    lines.append(
+                        f"{name}_request_duration_seconds_bucket{labels} {cumulative}"
+                    )
+                labels = _labels(method=method, endpoint=endpoint)
+                lines.append(
+                    f"{name}_request_duration_seconds_sum{labels} {histogram.sum!r}"
+                )
+                lines.append(
+                    f"{name}_request_duration_seconds_count{labels} {cumulative}"
+                )
+            for metric, help_text, values in (
+                (
+                    "requests_total",
+                    "NOWPayments API requests by response status.",
+                    self._requests,
+                ),
+                ("retries_total", "Retried NOWPayments API requests.", self._retries),
+                (
+                    "request_bytes_total",
+                    "Bytes sent in NOWPayments API request bodies.",
+                    self._request_bytes,
+                ),
+                (
+                    "response_bytes_total",
+                    "Bytes received in NOWPayments API response bodies.",
+                    self._response_bytes,
+                ),
+            ):
+                lines += [
+                    f"# HELP {name}_{metric} {help_text}",
+                    f"# TYPE {name}_{metric} counter",
+                ]
+                for key, value in sorted(values.items()):
+                    labels = dict(zip(("method", "endpoint", "status"), key))
+                    lines.append(f"{name}_{metric}{_labels(**labels)} {value}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,307 @@
+"""
+Client-side deduplication of payment and invoice creation.
+
+A store records which creations are in flight and the responses of the completed ones, keyed by the
+caller's idempotency key or the order ID. A duplicate call returns the stored response, or waits for
+the call in flight, instead of creating a second payment for the same order.
+
+A call failing after its request may have reached the server, e.g. with a read timeout or a 5xx
+response, leaves its key in an unknown state: the payment may exist. Later calls with the key raise
+:class:`OutcomeUnknown` instead of creating it again, until the key is resolved with
+:meth:`IdempotencyStore.complete` or :meth:`IdempotencyStore.abort`, or expires.
+"""
+
+import abc
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .exceptions import NowPaymentsException
+
+
+class RequestInProgress(NowPaymentsException):
+    """Raised when a duplicate call gives up waiting for the call in flight with the same key."""
+
+    def __init__(self, key: str) -> None:
+        super().__init__(f"A request with idempotency key {key!r} is still in progress")
+        self.key = key
+
+
+class OutcomeUnknown(RequestInProgress):
+    """
+    Raised for a key whose previous call failed without telling whether the server created anything.
+    Check the payment, e.g. by its order ID, then ``complete`` or ``abort`` the key.
+    """
+
+    def __init__(self, key: str) -> None:
+        NowPaymentsException.__init__(
+            self, f"The outcome of the request with idempotency key {key!r} is unknown"
+        )
+        self.key = key
+
+
+def _outcome_known(error: BaseException) -> bool:
+    """Whether a failed call certainly created nothing: refused before sending, or rejected."""
+    if isinstance(error, NowPaymentsException):
+        # Raised by the client before the request is sent (validation, rate limit, open circuit).
+        return True
+    response = getattr(error, "response", None)
+    if response is not None:
+        # A 5xx, e.g. from a gateway, may be answered after the server created the payment.
+        return 400 <= response.status_code < 500
+    from requests import ConnectTimeout  # pylint: disable=import-outside-toplevel
+
+    return isinstance(error, ConnectTimeout)
+
+
+class IdempotencyStore(abc.ABC):
+    """
+    Interface of the stores. :meth:`begin` either returns the stored response of a key or claims the
+    key for the caller, who must then call :meth:`complete` or :meth:`abort`.
+
+    :param float ttl: Seconds a completed response is kept.
+    :param float wait_timeout: Seconds a duplicate call waits for the call in flight.
+    """
+
+    def __init__(self, ttl: float, wait_timeout: float) -> None:
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+
+    @abc.abstractmethod
+    def begin(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        :returns: The stored response, or None when the caller now owns the key.
+        :raises RequestInProgress: If the key is still in flight after ``wait_timeout``.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def complete(self, key: str, response: Dict[str, Any]) -> None:
+        """Store the response of a claimed key."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def abort(self, key: str) -> None:
+        """Release a claimed or unknown key, so the next call tries again."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def mark_unknown(self, key: str) -> None:
+        """
+        Keep a claimed key whose call may have been processed by the server, see
+        :class:`OutcomeUnknown`.
+        """
+        raise NotImplementedError
+
+    def run(self, key: str, func: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Call ``func`` unless a response is stored for ``key`` and store its result. The key is released
+        when ``func`` fails without sending its request or with a 4xx response, and marked unknown
+        when it fails otherwise.
+
+        :raises OutcomeUnknown: If a previous call with the key has an unknown outcome.
+        """
+        response = self.begin(key)
+        if response is not None:
+            return response
+        try:
+            response = func()
+        except BaseException as error:
+            if _outcome_known(error):
+                self.abort(key)
+            else:
+                self.mark_unknown(key)
+            raise
+        self.complete(key, response)
+        return response
+
+
+_UNKNOWN: Dict[str, Any] = {}
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """
+    Thread-safe store for one process, keeping the ``maxsize`` most recently used responses.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl: float = 86_400.0,
+        wait_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(ttl, wait_timeout)
+        self.maxsize = maxsize
+        self._clock = clock
+        self._condition = threading.Condition()
+        # key -> (completed at, response), the response is None while in flight and _UNKNOWN when the
+        # outcome of the call is unknown
+        self._entries: "OrderedDict[str, Tuple[float, Optional[Dict]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def begin(self, key: str) -> Optional[Dict[str, Any]]:
+        deadline = self._clock() + self.wait_timeout
+        with self._condition:
+            while True:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] is not None:
+                    if self._clock() - entry[0] <= self.ttl:
+                        self._entries.move_to_end(key)
+                        if entry[1] is _UNKNOWN:
+                            raise OutcomeUnknown(key)
+                        return entry[1]
+                    entry = None
+                if entry is None:
+                    self._entries[key] = (self._clock(), None)
+                    self._entries.move_to_end(key)
+                    return None
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    raise RequestInProgress(key)
+                self._condition.wait(remaining)
+
+    def complete(self, key: str, response: Dict[str, Any]) -> None:
+        with self._condition:
+            self._entries[key] = (self._clock(), response)
+            self._entries.move_to_end(key)
+            self._evict()
+            self._condition.notify_all()
+
+    def abort(self, key: str) -> None:
+        with self._condition:
+            self._entries.pop(key, None)
+            self._condition.notify_all()
+
+    def mark_unknown(self, key: str) -> None:
+        self.complete(key, _UNKNOWN)
+
+    def _evict(self) -> None:
+        excess = len(self._entries) - self.maxsize
+        if excess <= 0:
+            return
+        completed = (
+            key for key, entry in self._entries.items() if entry[1] is not None
+        )
+        for key in list(itertools.islice(completed, excess)):
+            del self._entries[key]
+
+
+class SQLiteIdempotencyStore(IdempotencyStore):
+    """
+    Store in a SQLite database, shared by every process of the host using the same file.
+
+    A key left in flight by a process that died is taken over after ``lease`` seconds. The response of
+    a key with an unknown outcome is stored as an empty string.
+
+    :param str path: Database file.
+    :param float lease: Seconds after which an unfinished call is considered abandoned.
+    :param float poll_interval: Seconds between checks while waiting for a call in flight.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS nowpayments_idempotency "
+        "(key TEXT PRIMARY KEY, response TEXT, updated_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS nowpayments_idempotency_updated_at "
+        "ON nowpayments_idempotency (updated_at)",
+    )
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 86_400.0,
+        wait_timeout: float = 30.0,
+        lease: float = 120.0,
+        poll_interval: float = 0.05,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        super().__init__(ttl, wait_timeout)
+        self.path = os.fspath(path)
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._sleep = sleep
+        self._local = threading.local()
+        connection = self._connection()
+        for statement in self._SCHEMA:
+            connection.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    def begin(self, key: str) -> Optional[Dict[str, Any]]:
+        connection = self._connection()
+        deadline = self._clock() + self.wait_timeout
+        while True:
+            now = self._clock()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT response, updated_at FROM nowpayments_idempotency WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if (
+                    row is None
+                    or (row[0] is not None and now - row[1] > self.ttl)
+                    or (row[0] is None and now - row[1] > self.lease)
+                ):
+                    connection.execute(
+                        "INSERT OR REPLACE INTO nowpayments_idempotency VALUES (?, NULL, ?)",
+                        (key, now),
+                    )
+                    row = None
+            finally:
+                connection.execute("COMMIT")
+            if row is None:
+                return None
+            if row[0] == "":
+                raise OutcomeUnknown(key)
+            if row[0] is not None:
+                return json.loads(row[0])
+            if now >= deadline:
+                raise RequestInProgress(key)
+            self._sleep(min(self.poll_interval, max(0.0, deadline - now)))
+
+    def complete(self, key: str, response: Dict[str, Any]) -> None:
+        now = self._clock()
+        connection = self._connection()
+        connection.execute(
+            "UPDATE nowpayments_idempotency SET response = ?, updated_at = ? WHERE key = ?",
+            (json.dumps(response), now, key),
+        )
+        connection.execute(
+            "DELETE FROM nowpayments_idempotency WHERE updated_at < ? AND response IS NOT NULL",
+            (now - self.ttl,),
+        )
+
+    def abort(self, key: str) -> None:
+        self._connection().execute(
+            "DELETE FROM nowpayments_idempotency WHERE key = ? "
+            "AND (response IS NULL OR response = '')",
+            (key,),
+        )
+
+    def mark_unknown(self, key: str) -> None:
+        self._connection().execute(
+            "UPDATE nowpayments_idempotency SET response = '', updated_at = ? WHERE key = ?",
+            (self._clock(), key),
+        )
+
+    def close(self) -> None:
+        """Close the connection of the calling thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,174 @@
+"""
+Verification and parsing of the IPN callbacks NOWPayments sends to ``ipn_callback_url``.
+
+NOWPayments signs the callback body with HMAC-SHA512, using the IPN secret from the dashboard as key,
+over the JSON payload with its keys sorted and no whitespace. The signature is sent in the
+``x-nowpayments-sig`` header.
+"""
+
+import hashlib
+import hmac
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Union
+
+from .exceptions import NowPaymentsException
+
+SIGNATURE_HEADER = "x-nowpayments-sig"
+SIGNATURE_LENGTH = hashlib.sha512().digest_size * 2
+
+
+class InvalidSignature(NowPaymentsException):
+    """Raised when the signature of an IPN callback does not match its body."""
+
+
+@dataclass
+class PaymentEvent:  # pylint: disable=too-many-instance-attributes
+    """
+    Payment status update received through an IPN callback. ``raw`` holds the complete payload.
+    """
+
+    payment_id: int
+    payment_status: str
+    pay_address: Optional[str] = None
+    price_amount: Optional[float] = None
+    price_currency: Optional[str] = None
+    pay_amount: Optional[float] = None
+    actually_paid: Optional[float] = None
+    pay_currency: Optional[str] = None
+    order_id: Optional[str] = None
+    order_description: Optional[str] = None
+    purchase_id: Optional[str] = None
+    invoice_id: Optional[int] = None
+    outcome_amount: Optional[float] = None
+    outcome_currency: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "PaymentEvent":
+        get = payload.get
+        return cls(
+            payment_id=int(payload["payment_id"]),
+            payment_status=payload["payment_status"],
+            pay_address=get("pay_address"),
+            price_amount=get("price_amount"),
+            price_currency=get("price_currency"),
+            pay_amount=get("pay_amount"),
+            actually_paid=get("actually_paid"),
+            pay_currency=get("pay_currency"),
+            order_id=get("order_id"),
+            order_description=get("order_description"),
+            purchase_id=get("purchase_id"),
+            invoice_id=get("invoice_id"),
+            outcome_amount=get("outcome_amount"),
+            outcome_currency=get("outcome_currency"),
+            created_at=get("created_at"),
+            updated_at=get("updated_at"),
+            raw=payload,
+        )
+
+
+def canonical_json(payload: Dict[str, Any]) -> bytes:
+    """
+    Serialize a payload the way NOWPayments does before signing it: keys sorted recursively, no
+    whitespace and non-ASCII characters left unescaped (like ``JSON.stringify``).
+    """
+    return json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    ).encode()
+
+
+class IPNVerifier:
+    """
+    Verifies and parses IPN callbacks signed with one IPN secret.
+
+    The HMAC key schedule is computed once and copied for every callback, and the body is parsed once
+    and reused for both the signature check and the event.
+
+    :param str ipn_secret: IPN secret key from the NOWPayments dashboard.
+    """
+
+    def __init__(self, ipn_secret: Union[str, bytes]) -> None:
+        if not ipn_secret:
+            raise NowPaymentsException("IPN secret is missing")
+        if isinstance(ipn_secret, str):
+            ipn_secret = ipn_secret.encode()
+        self._hmac = hmac.new(ipn_secret, digestmod=hashlib.sha512)
+
+    def sign(self, payload: Dict[str, Any]) -> str:
+        """Signature NOWPayments would send for this payload."""
+        mac = self._hmac.copy()
+        mac.update(canonical_json(payload))
+        return mac.hexdigest()
+
+    def verify(self, body: Union[bytes, str], signature: Optional[str]) -> bool:
+        """
+        Check the ``x-nowpayments-sig`` header of a callback in constant time.
+
+        :param body: Raw request body.
+        :param str signature: Value of the ``x-nowpayments-sig`` header.
+        """
+        try:
+            self._verified_payload(body, signature)
+        except (InvalidSignature, ValueError):
+            return False
+        return True
+
+    def parse(self, body: Union[bytes, str], signature: Optional[str]) -> PaymentEvent:
+        """
+        Verify a callback and return it as a PaymentEvent.
+
+        :raises InvalidSignature: If the signature is missing or does not match.
+        """
+        try:
+            payload = self._verified_payload(body, signature)
+        except ValueError as error:
+            raise InvalidSignature(f"Invalid IPN payload: {error}") from error
+        return PaymentEvent.from_dict(payload)
+
+    def _verified_payload(
+        self, body: Union[bytes, str], signature: Optional[str]
+    ) -> Dict[str, Any]:
+        if not signature:
+            raise InvalidSignature("IPN signature is missing")
+        signature = signature.strip()
+        if len(signature) != SIGNATURE_LENGTH:
+            raise InvalidSignature("IPN signature does not match")
+        payload = json.loads(body)
+        if not isinstance(payload, dict):
+            raise ValueError("IPN payload must be a JSON object")
+        mac = self._hmac.copy()
+        mac.update(canonical_json(payload))
+        expected = mac.hexdigest().encode()
+        if not hmac.compare_digest(expected, signature.lower().encode()):
+            raise InvalidSignature("IPN signature does not match")
+        return payload
+
+
+def verify_signature(
+    body: Union[bytes, str], signature: Optional[str], ipn_secret: Union[str, bytes]
+) -> bool:
+    """
+    Check the ``x-nowpayments-sig`` header of an IPN callback. Create an :class:`IPNVerifier` once when
+    verifying many callbacks.
+    """
+    return IPNVerifier(ipn_secret).verify(body, signature)
+
+
+def parse_callback(
+    body: Union[bytes, str],
+    headers: Dict[str, str],
+    ipn_secret: Union[str, bytes],
+) -> PaymentEvent:
+    """
+    Verify and parse an IPN callback from its raw body and request headers.
+
+    :raises InvalidSignature: If the signature is missing or does not match.
+    """
+    signature = next(
+        (value for name, value in headers.items() if name.lower() == SIGNATURE_HEADER),
+        None,
+    )
+    return IPNVerifier(ipn_secret).parse(body, signature)
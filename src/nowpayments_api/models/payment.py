@@ -1,24 +1,74 @@
 """
-Dataclasses for the NowPayments API.
+Dataclasses for the NowPayments API requests and typed wrappers of its responses.
 """
-from dataclasses import dataclass
-from inspect import signature
-from typing import Dict, Union
+
+from dataclasses import dataclass, fields
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, Optional, Type, TypeVar, Union
+
+T = TypeVar("T")
+
+TERMINAL_STATUSES = frozenset({"finished", "failed", "refunded", "expired"})
+# Payments in these states are about to change again.
+ACTIVE_STATUSES = frozenset({"confirming", "confirmed", "sending", "partially_paid"})
+
+_SERIALIZERS: Dict[type, Callable] = {}
+
+
+def _compile_serializer(cls: type) -> Callable:
+    """
+    Generate a function that returns the fields of a dataclass instance as a dictionary, skipping the
+    fields set to None. The field list is resolved once instead of on every call.
+    """
+    lines = ["def clean_data_to_dict(self):", "    data = {}"]
+    for field in fields(cls):
+        lines += [
+            f"    value = self.{field.name}",
+            "    if value is not None:",
+            f"        data[{field.name!r}] = value",
+        ]
+    lines.append("    return data")
+    namespace: Dict[str, Callable] = {}
+    exec("\n".join(lines), {}, namespace)  # pylint: disable=exec-used
+    serializer = namespace["clean_data_to_dict"]
+    serializer.__qualname__ = f"{cls.__qualname__}.clean_data_to_dict"
+    serializer.__doc__ = Base.clean_data_to_dict.__doc__
+    return serializer
+
+
+def _slotted(cls: Type[T]) -> Type[T]:
+    """
+    Recreate a dataclass with ``__slots__`` and a precompiled ``clean_data_to_dict``.
+    """
+    names = tuple(field.name for field in fields(cls))
+    namespace = dict(cls.__dict__)
+    for name in names:
+        namespace.pop(name, None)
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    namespace["__slots__"] = names
+    slotted = type(cls)(cls.__name__, cls.__bases__, namespace)
+    slotted.__qualname__ = cls.__qualname__
+    slotted.clean_data_to_dict = _compile_serializer(slotted)
+    return slotted
 
 
 @dataclass
 class Base:
+    __slots__ = ()
+
     def clean_data_to_dict(self) -> Dict[str, Union[str, float, int]]:
         """
         Delete None types and return dictionary
         """
-        data = {}
-        for field in signature(self.__class__).parameters:
-            if getattr(self, field):
-                data[field] = getattr(self, field)
-        return data
+        serializer = _SERIALIZERS.get(type(self))
+        if serializer is None:
+            serializer = _SERIALIZERS[type(self)] = _compile_serializer(type(self))
+        return serializer(self)
 
 
+@_slotted
 @dataclass
 class PaymentData(Base):  # pylint: disable=too-many-instance-attributes
     """
@@ -40,6 +90,7 @@ class PaymentData(Base):  # pylint: disable=too-many-instance-attributes
     is_fee_paid_by_user: bool = None
 
 
+@_slotted
 @dataclass
 class InvoiceData(Base):
     """
@@ -56,6 +107,7 @@ class InvoiceData(Base):
     cancel_url: str = None
 
 
+@_slotted
 @dataclass
 class InvoicePaymentData(Base):
     """
@@ -69,3 +121,179 @@ class InvoicePaymentData(Base):
     payout_address: str = None
     payout_extra_id: int = None
     payout_currency: str = None
+
+
+# -------------------------
+# Responses
+# -------------------------
+def _datetime(value: str) -> datetime:
+    """Parse the ISO 8601 timestamps of the API, e.g. ``2020-12-22T15:00:22.742Z``."""
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return datetime.fromisoformat(value)
+
+
+def _decimal(value: Union[str, float, int]) -> Decimal:
+    """Amounts are converted from their text form so that 0.1 stays 0.1."""
+    return Decimal(str(value))
+
+
+class _Field:
+    """
+    Read-only attribute of a response, looked up in the raw dictionary on access. Values with a
+    ``decode`` function are decoded on first access and cached.
+    """
+
+    __slots__ = ("name", "key", "decode")
+
+    def __init__(self, decode: Callable[[Any], Any] = None, key: str = None) -> None:
+        self.name = ""
+        self.key = key
+        self.decode = decode
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+        self.key = self.key or name
+
+    def __get__(self, instance: Optional["Response"], owner: type) -> Any:
+        if instance is None:
+            return self
+        value = instance.raw.get(self.key)
+        if self.decode is None or value is None:
+            return value
+        decoded = instance._decoded  # pylint: disable=protected-access
+        if decoded is None:
+            decoded = instance._decoded = {}  # pylint: disable=protected-access
+        try:
+            return decoded[self.name]
+        except KeyError:
+            result = decoded[self.name] = self.decode(value)
+            return result
+
+    def __set__(self, instance: "Response", value: Any) -> None:
+        raise AttributeError(f"{self.name} is read-only")
+
+
+class Response:
+    """
+    Typed view of a response dictionary.
+
+    Attributes are read from ``raw`` when accessed, timestamps and amounts are decoded on first
+    access only. ``raw`` is the dictionary returned by the API client, untouched, so it can be passed
+    on without copying. Item access (``response["payment_status"]``) reads ``raw`` too.
+    """
+
+    __slots__ = ("raw", "_decoded")
+
+    def __init__(self, raw: Dict[str, Any]) -> None:
+        self.raw = raw
+        self._decoded: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls: Type[T], raw: Dict[str, Any]) -> T:
+        return cls(raw)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.raw
+
+    def __getitem__(self, key: str) -> Any:
+        return self.raw[key]
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.raw == other.raw
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.raw!r})"
+
+
+class Payment(Response):
+    """Response of ``create_payment``, ``payment_status`` and the records of ``list_of_payments``."""
+
+    __slots__ = ()
+
+    payment_id = _Field(int)
+    payment_status = _Field()
+    pay_address = _Field()
+    price_amount = _Field(_decimal)
+    price_currency = _Field()
+    pay_amount = _Field(_decimal)
+    actually_paid = _Field(_decimal)
+    pay_currency = _Field()
+    order_id = _Field()
+    order_description = _Field()
+    purchase_id = _Field()
+    invoice_id = _Field(int)
+    outcome_amount = _Field(_decimal)
+    outcome_currency = _Field()
+    network = _Field()
+    ipn_callback_url = _Field()
+    created_at = _Field(_datetime)
+    updated_at = _Field(_datetime)
+    expiration_estimate_date = _Field(_datetime)
+
+
+class Invoice(Response):
+    """Response of ``create_invoice``."""
+
+    __slots__ = ()
+
+    id = _Field(int)
+    order_id = _Field()
+    order_description = _Field()
+    price_amount = _Field(_decimal)
+    price_currency = _Field()
+    pay_currency = _Field()
+    ipn_callback_url = _Field()
+    invoice_url = _Field()
+    success_url = _Field()
+    cancel_url = _Field()
+    created_at = _Field(_datetime)
+    updated_at = _Field(_datetime)
+
+
+class Currency(Response):
+    """Record of ``currencies_full``."""
+
+    __slots__ = ()
+
+    id = _Field(int)
+    code = _Field()
+    name = _Field()
+    enable = _Field()
+    network = _Field()
+    smart_contract = _Field()
+    network_precision = _Field(int)
+    logo_url = _Field()
+
+
+class Estimate(Response):
+    """Response of ``estimate_price``."""
+
+    __slots__ = ()
+
+    currency_from = _Field()
+    amount_from = _Field(_decimal)
+    currency_to = _Field()
+    estimated_amount = _Field(_decimal)
+
+
+class PaymentPage(Response):
+    """Response of ``list_of_payments``. Iterating over it yields :class:`Payment` objects."""
+
+    __slots__ = ()
+
+    limit = _Field(int)
+    page = _Field(int)
+    pages_count = _Field(int, key="pagesCount")
+    total = _Field(int)
+    payments = _Field(lambda data: tuple(map(Payment, data)), key="data")
+
+    def __iter__(self) -> Iterator[Payment]:
+        return iter(self.payments or ())
+
+    def __len__(self) -> int:
+        return len(self.raw.get("data") or ())
@@ -1,19 +1,180 @@
 """
 A Python wrapper for the NOWPayments API.
 """
-from datetime import datetime
-from typing import Any, Dict, Union
-import requests
-from requests import HTTPError
 
+import copy
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .circuit import CircuitBreaker
+from .concurrency import BatchResult, iter_concurrently
+from .currencies import CurrencyCatalog
+from .exceptions import NowPaymentsException
+from .hooks import (
+    AFTER_RESPONSE,
+    BEFORE_REQUEST,
+    ON_ERROR,
+    Hooks,
+    RequestEvent,
+    endpoint_template,
+)
 from .models.payment import PaymentData, InvoicePaymentData, InvoiceData
+from .pagination import PaymentCursor, PaymentIterator
+from .quotes import QuoteCache, scale_estimate
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy, parse_retry_after
+from .tokens import TokenManager
+from .transport import Transport, _new_session
 
-# Constants
-AVAILABLE_FIAT = ["usd", "eur", "nzd", "brl", "gbp"]
+if TYPE_CHECKING:  # pragma: no cover
+    import requests
+    from requests.adapters import HTTPAdapter
 
+    from .idempotency import IdempotencyStore
 
-class NowPaymentsException(Exception):
-    pass
+# Constants
+DEFAULT_TIMEOUT = (5.0, 30.0)
+# Default of the options of with_options that keep the client's value when omitted.
+_UNSET: Any = object()
+AVAILABLE_FIAT = ["usd", "eur", "nzd", "brl", "gbp"]
+AVAILABLE_SORT_PARAMETERS = [
+    "created_at",
+    "payment_id",
+    "payment_status",
+    "pay_address",
+    "price_amount",
+    "price_currency",
+    "pay_amount",
+    "actually_paid",
+    "pay_currency",
+    "order_id",
+    "order_description",
+    "purchase_id",
+    "outcome_amount",
+    "outcome_currency",
+]
+
+
+# -------------------------------
+# Validation and endpoint helpers
+# -------------------------------
+def _attempt_timeout(
+    timeout: Union[float, Tuple[float, float], None], remaining: Optional[float]
+) -> Union[float, Tuple[float, float], None]:
+    """Cap the connect and read timeouts of an attempt to what is left of the call's deadline."""
+    if remaining is None:
+        return timeout
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return tuple(
+            remaining if value is None else min(value, remaining) for value in timeout
+        )
+    return min(timeout, remaining)
+
+
+def _validate_price(amount: float, fiat_currency: str) -> None:
+    if amount <= 0:
+        raise NowPaymentsException("Amount must be greater than 0")
+    if fiat_currency not in AVAILABLE_FIAT:
+        raise NowPaymentsException("Unsupported fiat currency")
+
+
+def _validate_payment_id(payment_id: int) -> None:
+    if payment_id <= 0:
+        raise NowPaymentsException("Payment ID should be greater than zero")
+
+
+def _invoice_batch(
+    invoices: Iterable[Union[InvoiceData, Dict[str, Any]]], currencies: FrozenSet[str]
+) -> Tuple[List[BatchResult], List[Tuple[int, InvoiceData]]]:
+    """
+    Validate a batch of invoices against one currency snapshot.
+
+    :returns: Results of the invalid invoices and the (index, invoice) pairs to submit.
+    """
+    rejected, accepted = [], []
+    for index, invoice in enumerate(invoices):
+        try:
+            if not isinstance(invoice, InvoiceData):
+                invoice = InvoiceData(**invoice)
+            _validate_price(invoice.price_amount, invoice.price_currency)
+            if invoice.pay_currency not in currencies:
+                raise NowPaymentsException("Unsupported cryptocurrency")
+        except (NowPaymentsException, TypeError) as error:
+            rejected.append(BatchResult(invoice, index, error=error))
+        else:
+            accepted.append((index, invoice))
+    return rejected, accepted
+
+
+def _min_amount_endpoint(currency_from: str, currency_to: str, **kwargs) -> str:
+    endpoint = f"min-amount?currency_from={currency_from}&currency_to={currency_to}"
+    if "fiat_equivalent" in kwargs and kwargs["fiat_equivalent"] in AVAILABLE_FIAT:
+        endpoint += f"&fiat_equivalent={kwargs['fiat_equivalent']}"
+    if "is_fixed_rate" in kwargs and type(kwargs["is_fixed_rate"]) is bool:
+        endpoint += f"&is_fixed_rate={kwargs['is_fixed_rate']}"
+    if "is_fee_paid_by_user" in kwargs and type(kwargs["is_fee_paid_by_user"]) is bool:
+        endpoint += f"&is_fixed_rate={kwargs['is_fee_paid_by_user']}"
+    return endpoint
+
+
+def _estimate_endpoint(amount: float, currency_from: str, currency_to: str) -> str:
+    return f"estimate?amount={amount}&currency_from={currency_from}&currency_to={currency_to}"
+
+
+def _format_date(value: datetime) -> str:
+    """
+    Timestamp in the format of the API, e.g. ``2020-12-22T15:00:22.742Z``. Naive datetimes are taken
+    as UTC.
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return f"{value:%Y-%m-%dT%H:%M:%S}.{value.microsecond // 1000:03d}Z"
+
+
+def _list_of_payments_endpoint(
+    limit: int,
+    page: int,
+    sort_by: str,
+    order_by: str,
+    date_from: datetime = None,
+    date_to: datetime = None,
+) -> str:
+    if 1 > limit or limit > 500:
+        raise NowPaymentsException("Limit must be a number between 1 and 500")
+    if page < 0:
+        raise NowPaymentsException("Page number must be equal or greater than 0")
+    if sort_by not in AVAILABLE_SORT_PARAMETERS:
+        raise NowPaymentsException("Invalid sort parameter")
+    if order_by not in ["asc", "desc"]:
+        raise NowPaymentsException("Invalid order parameter")
+    endpoint = f"payment?limit={limit}&page={page}&sortBy={sort_by}&orderBy={order_by}"
+    if date_from:
+        endpoint += f"&dateFrom={_format_date(date_from)}"
+    if date_to:
+        endpoint += f"&dateTo={_format_date(date_to)}"
+    return endpoint
+
+
+def _key_namespace(api_key: str) -> str:
+    # Prefix of the keys of the idempotency store and quote cache, so that clients of different merchants
+    # sharing them never see each other's entries.
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
 
 
 class NOWPaymentsAPI:
@@ -24,12 +185,61 @@ class NOWPaymentsAPI:
     WEB_APP_PAYMENT_URI_SANDBOX = "https://sandbox.nowpayments.io/payment/"
 
     def __init__(
-        self, api_key: str, email: str = "", password: str = "", sandbox=False
+        self,
+        api_key: str,
+        email: str = "",
+        password: str = "",
+        sandbox=False,
+        currency_ttl: float = 300.0,
+        retry_policy: RetryPolicy = None,
+        rate_limiter: RateLimiter = None,
+        timeout: Union[float, Tuple[float, float], None] = DEFAULT_TIMEOUT,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        session: "requests.Session" = None,
+        adapter: "HTTPAdapter" = None,
+        hooks: Hooks = None,
+        idempotency_store: "IdempotencyStore" = None,
+        quote_cache: QuoteCache = None,
+        circuit_breaker: CircuitBreaker = None,
+        merchant_currencies: bool = False,
+        transport: Transport = None,
     ) -> None:
         """
         Class construct.
 
         :param str api_key: API key
+        :param float currency_ttl: Seconds the list of available currencies used for validation is cached.
+            Set to 0 to fetch it on every call.
+        :param RetryPolicy retry_policy: When to retry failed requests. Defaults to retrying GET requests
+            on connection errors, 429 and 5xx responses. Pass ``NO_RETRY`` to disable retries.
+        :param RateLimiter rate_limiter: Client-side rate limits applied to every request, including retries.
+            Share one limiter between clients to give them a common budget.
+        :param timeout: Seconds to wait for the server, either one value or a (connect, read) tuple.
+            None waits forever. Override it per call with ``with_options(timeout=...)``.
+        :param int pool_connections: Number of host connection pools to cache.
+        :param int pool_maxsize: Maximum number of connections kept per host. Match it to the number of
+            threads sharing the client.
+        :param bool pool_block: Wait for a free connection instead of opening one beyond pool_maxsize.
+        :param requests.Session session: Pre-built session to use, e.g. shared by many clients. The pool
+            options are not applied to it. Otherwise a session is created, and requests imported, on the
+            first request.
+        :param HTTPAdapter adapter: Pre-built transport adapter to mount on the session, so several clients
+            share one connection pool.
+        :param Hooks hooks: Callbacks fired around every request attempt, e.g. to collect metrics with
+            :class:`MetricsCollector`.
+        :param IdempotencyStore idempotency_store: Deduplicates ``create_payment`` and ``create_invoice``
+            calls by idempotency key or order ID: a repeated call returns the first call's response. The
+            keys are scoped to the API key, so clients of several merchants can share a store.
+        :param QuoteCache quote_cache: Short-lived cache for ``estimate_price`` and
+            ``minimum_payment_amount``. Identical concurrent calls share one request.
+        :param CircuitBreaker circuit_breaker: Fails calls to an endpoint fast with
+            :class:`CircuitOpenError` while the endpoint keeps failing.
+        :param bool merchant_currencies: Validate currencies against the coins enabled in the merchant's
+            settings (``merchant/coins``) instead of every coin NOWPayments supports.
+        :param Transport transport: HTTP backend sending the requests, e.g. :class:`HTTPXTransport` for
+            HTTP/2. Defaults to the client's requests session, and the session options are then unused.
         """
         self.api_uri = self.BASE_URI if not sandbox else self.BASE_URI_SANDBOX
         self.web_payment_uri = (
@@ -39,37 +249,274 @@ class NOWPaymentsAPI:
         )
 
         self._api_key = api_key
+        self._namespace = _key_namespace(api_key)
         self._email = email
         self._password = password
         self.sandbox = sandbox
-        self.session = requests.Session()
+        self.timeout = timeout
+        self._session = session
+        self._session_lock = threading.Lock()
+        self._adapter = adapter
+        self._pool_options = {
+            "pool_connections": pool_connections,
+            "pool_maxsize": pool_maxsize,
+            "pool_block": pool_block,
+        }
+        if session is not None and adapter is not None:
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.hooks = hooks
+        self.idempotency_store = idempotency_store
+        self.quote_cache = quote_cache
+        self.circuit_breaker = circuit_breaker
+        self.merchant_currencies = merchant_currencies
+        self.transport = transport
+        self.currency_catalog = CurrencyCatalog(
+            self._fetch_currency_tickers, ttl=currency_ttl
+        )
+        self.token_manager = TokenManager(self._fetch_token)
+
+    def with_options(
+        self, timeout: Union[float, Tuple[float, float], None] = _UNSET
+    ) -> "NOWPaymentsAPI":
+        """
+        Return a copy of the client with different request options. The copy shares the session or
+        transport, caches, token, retry policy and rate limiter with this client, so it is cheap to create
+        per call.
+
+        :param timeout: Timeout for the requests made by the copy, see the constructor. Omitted, the copy
+            keeps this client's timeout; pass None explicitly to wait forever.
+        """
+        if self.transport is None:
+            self.session  # pylint: disable=pointless-statement
+        clone = copy.copy(self)
+        if timeout is not _UNSET:
+            clone.timeout = timeout
+        return clone
+
+    @property
+    def session(self) -> "requests.Session":
+        """HTTP session, created with its transport adapter on first use."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    @session.setter
+    def session(self, session: "requests.Session") -> None:
+        self._session = session
+
+    def _build_session(self) -> "requests.Session":
+        return _new_session(self._adapter, self._pool_options)
 
     # -------------------------------
     # Request Session Method Wrappers
     # -------------------------------
-    def _get_request(self, endpoint: str, bearer: str = None) -> Dict:
+    def _request(
+        self,
+        method: str,
+        endpoint: str,
+        bearer: str = None,
+        data: Dict = None,
+        idempotency_key: str = None,
+        stream: bool = False,
+    ) -> "requests.Response":
+        """
+        Send a request, retrying it according to the retry policy.
+
+        :param str method: HTTP method
+        :param str endpoint: Endpoint relative to the API URI, including the query string
+        :param str bearer: JWT token for endpoints that require it
+        :param data: Form data of the request
+        :param str idempotency_key: Marks a POST request as safe to repeat
+        :param bool stream: Do not read the body, the caller reads it and closes the response
+        :returns: The last response received
+        """
+        transport = self.transport
+        send = transport.request if transport is not None else self.session.request
+        import requests  # pylint: disable=import-outside-toplevel
+
         uri = f"{self.api_uri}{endpoint}"
         headers = {"x-api-key": self._api_key}
         if bearer:
             headers["Authorization"] = f"Bearer {bearer}"
-        response = self.session.get(url=uri, headers=headers)
+        policy = self.retry_policy
+        hooks = self.hooks
+        breaker = self.circuit_breaker
+        template = None
+        if hooks is not None or breaker is not None:
+            template = endpoint_template(endpoint)
+        retryable = policy.allows_method(method, idempotency_key)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            # Throttled calls wait or fail before taking one of the trial calls of a half-open circuit.
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(method, endpoint)
+            if breaker is not None:
+                breaker.acquire(template)
+            remaining = None
+            if policy.deadline is not None:
+                remaining = max(0.001, policy.deadline - (time.monotonic() - started))
+            sent = time.perf_counter()
+            try:
+                if hooks is not None:
+                    hooks.emit(BEFORE_REQUEST, RequestEvent(method, template, attempt))
+                    sent = time.perf_counter()
+                response = send(
+                    method,
+                    uri,
+                    headers=headers,
+                    data=data,
+                    timeout=_attempt_timeout(self.timeout, remaining),
+                    stream=stream,
+                )
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if breaker is not None:
+                    breaker.record(
+                        template, duration=time.perf_counter() - sent, error=error
+                    )
+                if hooks is not None:
+                    hooks.emit(
+                        ON_ERROR,
+                        RequestEvent(
+                            method,
+                            template,
+                            attempt,
+                            duration=time.perf_counter() - sent,
+                            error=error,
+                        ),
+                    )
+                delay = None
+                if retryable:
+                    delay = policy.next_delay(attempt, time.monotonic() - started)
+                if delay is None:
+                    raise
+            except BaseException:
+                # Interrupted without an outcome, the call must not hold a trial call of the circuit.
+                if breaker is not None:
+                    breaker.release(template)
+                raise
+            else:
+                if breaker is not None:
+                    breaker.record(
+                        template,
+                        status=response.status_code,
+                        duration=time.perf_counter() - sent,
+                    )
+                if hooks is not None:
+                    body = response.request.body
+                    hooks.emit(
+                        AFTER_RESPONSE,
+                        RequestEvent(
+                            method,
+                            template,
+                            attempt,
+                            status=response.status_code,
+                            duration=time.perf_counter() - sent,
+                            request_bytes=len(body) if body else 0,
+                            response_bytes=None if stream else len(response.content),
+                        ),
+                    )
+                if not retryable or response.status_code not in policy.retry_statuses:
+                    return response
+                delay = policy.next_delay(
+                    attempt,
+                    time.monotonic() - started,
+                    parse_retry_after(response.headers.get("Retry-After")),
+                )
+                if delay is None:
+                    return response
+                response.close()
+            policy.sleep(delay)
+
+    def _get_request(self, endpoint: str, bearer: str = None) -> Dict:
+        response = self._request("GET", endpoint, bearer=bearer)
         if response.ok:
             return response.json()
-        raise HTTPError(response.json().get("message"))
+        from requests import HTTPError  # pylint: disable=import-outside-toplevel
+
+        raise HTTPError(response.json().get("message"), response=response)
 
-    def _post_requests(self, endpoint: str, data: Dict = None) -> Dict:
+    def _get_stream(self, endpoint: str, bearer: str = None) -> "requests.Response":
+        """
+        Make a get request without reading the body of a successful response.
+        """
+        response = self._request("GET", endpoint, bearer=bearer, stream=True)
+        if response.ok:
+            return response
+        from requests import HTTPError  # pylint: disable=import-outside-toplevel
+
+        try:
+            raise HTTPError(response.json().get("message"), response=response)
+        finally:
+            response.close()
+
+    def _post_requests(
+        self, endpoint: str, data: Dict = None, idempotency_key: str = None
+    ) -> Dict:
         """
         Make get requests with your header and data
 
         :param url: URL to which the request is made
         :param data: Data to which the request is made
+        :param idempotency_key: Allows the retry policy to repeat the request
         """
-        uri = f"{self.api_uri}{endpoint}"
-        headers = {"x-api-key": self._api_key}
-        response = self.session.post(url=uri, headers=headers, data=data)
+        response = self._request(
+            "POST", endpoint, data=data, idempotency_key=idempotency_key
+        )
         response.raise_for_status()
         return response.json()
 
+    def _create(self, endpoint: str, data: Dict, idempotency_key: str = None) -> Dict:
+        """
+        POST a creation request, deduplicated through the idempotency store by the idempotency key or,
+        without one, the order ID.
+        """
+        key = idempotency_key or data.get("order_id")
+        if self.idempotency_store is None or not key:
+            return self._post_requests(endpoint, data, idempotency_key)
+        return self.idempotency_store.run(
+            f"{self._namespace}:{endpoint}:{key}",
+            lambda: self._post_requests(endpoint, data, idempotency_key),
+        )
+
+    def _authorized_get_request(self, endpoint: str, stream: bool = False) -> Any:
+        """
+        Make a get request with the cached JWT token, authenticating again once if the token is rejected.
+
+        :param bool stream: Return the response with its body unread instead of the decoded body.
+        """
+        from requests import HTTPError  # pylint: disable=import-outside-toplevel
+
+        get = self._get_stream if stream else self._get_request
+        bearer = self.token_manager.token()
+        try:
+            return get(endpoint, bearer=bearer)
+        except HTTPError as error:
+            if error.response is None or error.response.status_code != 401:
+                raise
+        bearer = self.token_manager.refresh(stale_token=bearer)
+        return get(endpoint, bearer=bearer)
+
+    @staticmethod
+    def _iter_items(response: "requests.Response", key: str) -> Iterator[Dict]:
+        # The streaming parser loads the fastest JSON backend installed, only needed from here.
+        from .streaming import (  # pylint: disable=import-outside-toplevel
+            STREAM_CHUNK_SIZE,
+            iter_json_array,
+        )
+
+        with response:
+            yield from iter_json_array(response.iter_content(STREAM_CHUNK_SIZE), key)
+
+    def _fetch_token(self) -> str:
+        return self.auth()["token"]
+
     # -------------------------
     # Auth an API Status
     # -------------------------
@@ -103,6 +550,7 @@ class NOWPaymentsAPI:
         price_amount: float,
         price_currency: str,
         pay_currency: str,
+        idempotency_key: str = None,
         **kwargs: Union[str, float, bool, int],
     ) -> Dict:
         """
@@ -121,6 +569,8 @@ class NOWPaymentsAPI:
         :param int payout_extra_id: Extra id or memo or tag for external payout_address.
         :param bool is_fixed_rate: Required for fixed-rate exchanges.
         :param bool is_fee_paid_by_user: Required for fixed-rate exchanges with all fees paid by users.
+        :param str idempotency_key: Declares the request safe to repeat, so a retry policy with
+            ``retry_idempotent_posts`` may retry it.
 
         :return: dict
         {
@@ -147,11 +597,8 @@ class NOWPaymentsAPI:
           "expiration_estimate_date": "2020-12-23T15:00:22.742Z"
         }
         """
-        if price_amount <= 0:
-            raise NowPaymentsException("Amount must be greater than 0")
-        if price_currency not in AVAILABLE_FIAT:
-            raise NowPaymentsException("Unsupported fiat currency")
-        if pay_currency not in self.currencies()["currencies"]:
+        _validate_price(price_amount, price_currency)
+        if pay_currency not in self.currency_catalog:
             raise NowPaymentsException("Unsupported cryptocurrency")
 
         payload = PaymentData(
@@ -160,13 +607,16 @@ class NOWPaymentsAPI:
             pay_currency=pay_currency,
             **kwargs,
         )
-        return self._post_requests("payment", data=payload.clean_data_to_dict())
+        return self._create(
+            "payment", payload.clean_data_to_dict(), idempotency_key=idempotency_key
+        )
 
     def create_invoice(
         self,
         price_amount: float,
         price_currency: str,
         pay_currency: str,
+        idempotency_key: str = None,
         **kwargs: Union[str, float, bool, int],
     ) -> Dict:
         """
@@ -184,6 +634,8 @@ class NOWPaymentsAPI:
         :param str order_description: Inner store order description.
         :param str success_url:  Url where the customer will be redirected after successful payment.
         :param str cancel_url: Url where the customer will be redirected after failed payment.
+        :param str idempotency_key: Declares the request safe to repeat, so a retry policy with
+            ``retry_idempotent_posts`` may retry it.
         :retunr dict:
         {
           "id": "4522625843",
@@ -200,11 +652,8 @@ class NOWPaymentsAPI:
           "updated_at": "2020-12-22T15:05:58.290Z"
         }
         """
-        if price_amount <= 0:
-            raise NowPaymentsException("Amount must be greater than 0")
-        if price_currency not in AVAILABLE_FIAT:
-            raise NowPaymentsException("Unsupported fiat currency")
-        if pay_currency not in self.currencies()["currencies"]:
+        _validate_price(price_amount, price_currency)
+        if pay_currency not in self.currency_catalog:
             raise NowPaymentsException("Unsupported cryptocurrency")
         payload = InvoiceData(
             price_amount=price_amount,
@@ -212,7 +661,38 @@ class NOWPaymentsAPI:
             pay_currency=pay_currency,
             **kwargs,
         )
-        return self._post_requests("invoice", data=payload.clean_data_to_dict())
+        return self._create(
+            "invoice", payload.clean_data_to_dict(), idempotency_key=idempotency_key
+        )
+
+    def create_invoices(
+        self,
+        invoices: Iterable[Union[InvoiceData, Dict[str, Any]]],
+        max_workers: int = 10,
+    ) -> List[BatchResult]:
+        """
+        Create many invoices concurrently.
+
+        All invoices are validated first against a single snapshot of the supported currencies, then the
+        valid ones are submitted with at most ``max_workers`` requests in flight. Invalid invoices and
+        failed requests are reported in their result instead of aborting the batch.
+
+        :param invoices: InvoiceData instances or dictionaries with the arguments of
+            :meth:`create_invoice`.
+        :param int max_workers: Maximum number of requests in flight.
+        :returns: One BatchResult per invoice, in input order, with the InvoiceData as ``key`` and the
+            create_invoice response as ``value``.
+        """
+        rejected, accepted = _invoice_batch(invoices, self.currency_catalog.get())
+
+        def submit(item: Tuple[int, InvoiceData]) -> Dict:
+            return self._create("invoice", item[1].clean_data_to_dict())
+
+        results = rejected
+        for result in iter_concurrently(submit, accepted, max_workers):
+            index, invoice = result.key
+            results.append(BatchResult(invoice, index, result.value, result.error))
+        return sorted(results, key=lambda result: result.index)
 
     def create_payment_by_invoice(
         self, invoice_id: int, pay_currency: str, **kwargs: Union[str, str, int, str]
@@ -259,7 +739,7 @@ class NOWPaymentsAPI:
           "burning_percent": null,
           "expiration_estimate_date": "2020-12-23T15:00:22.742Z"
         }"""
-        if pay_currency not in self.currencies()["currencies"]:
+        if pay_currency not in self.currency_catalog:
             raise NowPaymentsException("Unsupported cryptocurrency")
         data = InvoicePaymentData(iid=invoice_id, pay_currency=pay_currency, **kwargs)
         response = self._post_requests(
@@ -295,17 +775,14 @@ class NOWPaymentsAPI:
         :param string is_fee_paid_by_user:  Set this as true if you're using fee paid by user flow
 
         """
-        endpoint = f"min-amount?currency_from={currency_from}&currency_to={currency_to}"
-        if "fiat_equivalent" in kwargs and kwargs["fiat_equivalent"] in AVAILABLE_FIAT:
-            endpoint += f"&fiat_equivalent={kwargs['fiat_equivalent']}"
-        if "is_fixed_rate" in kwargs and type(kwargs["is_fixed_rate"]) is bool:
-            endpoint += f"&is_fixed_rate={kwargs['is_fixed_rate']}"
-        if (
-            "is_fee_paid_by_user" in kwargs
-            and type(kwargs["is_fee_paid_by_user"]) is bool
-        ):
-            endpoint += f"&is_fixed_rate={kwargs['is_fee_paid_by_user']}"
-        return self._get_request(endpoint)
+        endpoint = _min_amount_endpoint(currency_from, currency_to, **kwargs)
+        if self.quote_cache is None:
+            return self._get_request(endpoint)
+        return dict(
+            self.quote_cache.get(
+                (self._namespace, endpoint), lambda: self._get_request(endpoint)
+            )
+        )
 
     def update_payment_estimate(self, payment_id: int) -> Dict:
         """
@@ -316,8 +793,7 @@ class NOWPaymentsAPI:
         :param  int payment_id: Payment ID, for which you want to get the estimate
         :returns dict:
         """
-        if payment_id <= 0:
-            raise NowPaymentsException("Payment ID should be greater than zero")
+        _validate_payment_id(payment_id)
         return self._post_requests(f"payment/{payment_id}/update-merchant-estimate")
 
     def estimate_price(
@@ -332,15 +808,21 @@ class NOWPaymentsAPI:
          :param  str currency_to: Cryptocurrency.
          :return:
         """
-        if amount <= 0:
-            raise NowPaymentsException("Amount must be greater than 0")
-        if currency_from not in AVAILABLE_FIAT:
-            raise NowPaymentsException("Unsupported fiat currency")
-        if currency_to not in self.currencies()["currencies"]:
+        _validate_price(amount, currency_from)
+        if currency_to not in self.currency_catalog:
             raise NowPaymentsException("Unsupported cryptocurrency")
 
-        endpoint = f"estimate?amount={amount}&currency_from={currency_from}&currency_to={currency_to}"
-        return self._get_request(endpoint)
+        if self.quote_cache is None:
+            return self._get_request(
+                _estimate_endpoint(amount, currency_from, currency_to)
+            )
+        endpoint = _estimate_endpoint(
+            self.quote_cache.bucket(amount), currency_from, currency_to
+        )
+        quote = self.quote_cache.get(
+            (self._namespace, endpoint), lambda: self._get_request(endpoint)
+        )
+        return scale_estimate(quote, amount)
 
     def payment_status(self, payment_id: int) -> Dict:
         """
@@ -348,10 +830,38 @@ class NOWPaymentsAPI:
 
         :param int payment_id: ID of the payment in the request.
         """
-        if payment_id <= 0:
-            raise NowPaymentsException("Payment ID should be greater than zero")
+        _validate_payment_id(payment_id)
         return self._get_request(f"payment/{payment_id}")
 
+    def iter_payment_statuses(
+        self, payment_ids: Iterable[int], max_workers: int = 10
+    ) -> Iterator[BatchResult]:
+        """
+        Get the status of many payments concurrently, yielding the results as they complete.
+
+        Errors are collected per payment in the yielded results instead of aborting the batch.
+
+        :param payment_ids: IDs of the payments.
+        :param int max_workers: Maximum number of requests in flight.
+        :returns: BatchResult with the payment ID as ``key`` and the payment_status response as ``value``.
+        """
+        return iter_concurrently(self.payment_status, payment_ids, max_workers)
+
+    def payment_statuses(
+        self, payment_ids: Iterable[int], max_workers: int = 10
+    ) -> Dict[int, BatchResult]:
+        """
+        Get the status of many payments concurrently.
+
+        :param payment_ids: IDs of the payments.
+        :param int max_workers: Maximum number of requests in flight.
+        :returns: Dictionary mapping each payment ID to its BatchResult.
+        """
+        return {
+            result.key: result
+            for result in self.iter_payment_statuses(payment_ids, max_workers)
+        }
+
     def list_of_payments(
         self,
         limit: int = 10,
@@ -360,6 +870,7 @@ class NOWPaymentsAPI:
         order_by: str = "asc",
         date_from: datetime = None,
         date_to: datetime = None,
+        stream: bool = False,
     ) -> Any:
         """
         Returns the entire list of all transactions, created with certain API key.
@@ -373,42 +884,60 @@ class NOWPaymentsAPI:
             (possible values: asc, desc)
         :param datetime date_from: Select the displayed period start date
         :param datetime date_to: Select the displayed period end date
+        :param bool stream: Return an iterator parsing the payments of the page one at a time while the
+            response is read, instead of the decoded response. Keeps the memory bounded by one record.
         :returns
         """
-        available_sort_paras = [
-            "created_at",
-            "payment_id",
-            "payment_status",
-            "pay_address",
-            "price_amount",
-            "price_currency",
-            "pay_amount",
-            "actually_paid",
-            "pay_currency",
-            "order_id",
-            "order_description",
-            "purchase_id",
-            "outcome_amount",
-            "outcome_currency",
-        ]
-        period = ""
-        if 1 > limit or limit > 500:
-            raise NowPaymentsException("Limit must be a number between 1 and 500")
-        if page < 0:
-            raise NowPaymentsException("Page number must be equal or greater than 0")
-        if sort_by not in available_sort_paras:
-            raise NowPaymentsException("Invalid sort parameter")
-        if order_by not in ["asc", "desc"]:
-            raise NowPaymentsException("Invalid order parameter")
-        if date_from:
-            period += f"dateFrom={date_from.strftime('%Y-%m-%dT%H:%M:%S.%s')}"
-        if date_to:
-            period += f"&dateTo={date_to.strftime('%Y-%m-%dT%H:%M:%S.%s')}"
-
-        endpoint = f"payment?limit={limit}&page={page}&sortBy={sort_by}&orderBy={order_by}&{period}"
-
-        bearer = self.auth()["token"]
-        return self._get_request(endpoint, bearer=bearer)
+        endpoint = _list_of_payments_endpoint(
+            limit, page, sort_by, order_by, date_from, date_to
+        )
+        if stream:
+            return self._iter_items(
+                self._authorized_get_request(endpoint, stream=True), "data"
+            )
+        return self._authorized_get_request(endpoint)
+
+    def iter_payments(
+        self,
+        limit: int = 500,
+        sort_by: str = "created_at",
+        order_by: str = "asc",
+        date_from: datetime = None,
+        date_to: datetime = None,
+        start_page: int = 0,
+        cursor: PaymentCursor = None,
+        prefetch: bool = False,
+        stream: bool = False,
+    ) -> PaymentIterator:
+        """
+        Iterate over the payments of every page of list_of_payments, one record at a time.
+
+        :param int limit: Number of records requested per page. (possible values: from 1 to 500)
+        :param str sort_by: See list_of_payments.
+        :param str order_by: See list_of_payments.
+        :param datetime date_from: Select the displayed period start date
+        :param datetime date_to: Select the displayed period end date
+        :param int start_page: The page to start from.
+        :param PaymentCursor cursor: Resume from the ``cursor`` of a previous iterator. Overrides start_page.
+        :param bool prefetch: Fetch the next page in the background while the current one is consumed.
+        :param bool stream: Parse the pages while they are read instead of decoding whole pages, see
+            list_of_payments. Not combined with prefetch.
+        :returns PaymentIterator: Iterator of payment dictionaries.
+        """
+        _list_of_payments_endpoint(limit, start_page, sort_by, order_by)
+
+        def fetch_page(page: int) -> Any:
+            return self.list_of_payments(
+                limit, page, sort_by, order_by, date_from, date_to, stream=stream
+            )
+
+        return PaymentIterator(
+            fetch_page,
+            limit,
+            cursor=cursor or PaymentCursor(start_page, 0),
+            prefetch=prefetch,
+            stream=stream,
+        )
 
     # -------------------------
     # Currencies
@@ -421,8 +950,14 @@ class NOWPaymentsAPI:
         """
         return self._get_request(f"currencies?fixed_rate={fixed_rate}")
 
-    def currencies_full(self) -> Dict:
-        """This is a method to obtain detailed information about all cryptocurrencies available for payments."""
+    def currencies_full(self, stream: bool = False) -> Any:
+        """This is a method to obtain detailed information about all cryptocurrencies available for payments.
+
+        :param bool stream: Return an iterator parsing the currencies one at a time while the response is
+            read, instead of the decoded response.
+        """
+        if stream:
+            return self._iter_items(self._get_stream("full-currencies"), "currencies")
         return self._get_request(f"full-currencies")
 
     def currencies_checked(self) -> Dict:
@@ -430,3 +965,15 @@ class NOWPaymentsAPI:
         you set as available for payments in the "coins settings" tab on your personal account.
         """
         return self._get_request("merchant/coins")
+
+    def refresh_currencies(self) -> FrozenSet[str]:
+        """Fetch the available currencies again and update the cached catalog used for validation."""
+        return self.currency_catalog.refresh()
+
+    def _fetch_currency_tickers(self) -> List[str]:
+        if self.merchant_currencies:
+            return [
+                ticker.lower()
+                for ticker in self.currencies_checked()["selectedCurrencies"]
+            ]
+        return self.currencies()["currencies"]
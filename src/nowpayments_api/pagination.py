@@ -0,0 +1,194 @@
+"""
+Iteration over every page of ``list_of_payments``.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    NamedTuple,
+    Optional,
+)
+
+
+class PaymentCursor(NamedTuple):
+    """
+    Position of the next record: ``offset`` records of ``page`` were already consumed.
+    """
+
+    page: int = 0
+    offset: int = 0
+
+
+def _has_next_page(response: Dict, page: int, limit: int) -> bool:
+    records = len(response.get("data") or ())
+    pages_count = response.get("pagesCount")
+    if pages_count is not None:
+        return page + 1 < pages_count
+    return records >= limit
+
+
+class PaymentIterator:
+    """
+    Lazily walks the pages of ``list_of_payments`` and yields one payment record at a time.
+
+    Only the page being consumed (and, with ``prefetch``, the next one) is held in memory. With
+    ``prefetch`` the next page is requested in a background thread while the current one is consumed.
+    Stop early with ``break`` or :meth:`close`; :attr:`cursor` tells where to resume.
+
+    :param fetch_page: Callable returning the response for a page number.
+    :param int limit: Records per page, used to detect the last page.
+    :param PaymentCursor cursor: Position to start from.
+    :param bool prefetch: Request page N+1 while page N is consumed.
+    :param bool stream: ``fetch_page`` returns an iterator over the records of the page rather than the
+        response. The last page is the first one with fewer than ``limit`` records.
+    """
+
+    def __init__(
+        self,
+        fetch_page: Callable[[int], Any],
+        limit: int,
+        cursor: Optional[PaymentCursor] = None,
+        prefetch: bool = False,
+        stream: bool = False,
+    ) -> None:
+        self._fetch_page = fetch_page
+        self.limit = limit
+        self.cursor = cursor or PaymentCursor()
+        self.prefetch = prefetch and not stream
+        self._records = self._iterate_streamed() if stream else self._iterate()
+
+    def __iter__(self) -> "PaymentIterator":
+        return self
+
+    def __next__(self) -> Dict:
+        return next(self._records)
+
+    def close(self) -> None:
+        """Stop iterating and cancel a pending prefetch."""
+        self._records.close()
+
+    def _iterate(self) -> Iterator[Dict]:
+        page, offset = self.cursor
+        executor = ThreadPoolExecutor(max_workers=1) if self.prefetch else None
+        pending: Optional[Future] = None
+        try:
+            response = self._fetch_page(page)
+            while True:
+                data = response.get("data") or []
+                has_next = _has_next_page(response, page, self.limit)
+                if has_next and executor is not None:
+                    pending = executor.submit(self._fetch_page, page + 1)
+                for index in range(offset, len(data)):
+                    self.cursor = PaymentCursor(page, index + 1)
+                    yield data[index]
+                if not has_next:
+                    return
+                page, offset = page + 1, 0
+                self.cursor = PaymentCursor(page, 0)
+                if pending is not None:
+                    response, pending = pending.result(), None
+                else:
+                    response = self._fetch_page(page)
+        finally:
+            if pending is not None:
+                pending.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def _iterate_streamed(self) -> Iterator[Dict]:
+        page, offset = self.cursor
+        while True:
+            records = self._fetch_page(page)
+            count = 0
+            try:
+                for count, record in enumerate(records, 1):
+                    if count > offset:
+                        self.cursor = PaymentCursor(page, count)
+                        yield record
+            finally:
+                records.close()
+            if count < self.limit:
+                return
+            page, offset = page + 1, 0
+            self.cursor = PaymentCursor(page, 0)
+
+
+class AsyncPaymentIterator:
+    """
+    asyncio version of :class:`PaymentIterator`. Prefetching runs the next request as a task. With
+    ``stream``, ``fetch_page`` is a coroutine function returning an async iterator over the records.
+    """
+
+    def __init__(
+        self,
+        fetch_page: Callable[[int], Awaitable[Any]],
+        limit: int,
+        cursor: Optional[PaymentCursor] = None,
+        prefetch: bool = False,
+        stream: bool = False,
+    ) -> None:
+        self._fetch_page = fetch_page
+        self.limit = limit
+        self.cursor = cursor or PaymentCursor()
+        self.prefetch = prefetch and not stream
+        self._records = self._iterate_streamed() if stream else self._iterate()
+
+    def __aiter__(self) -> "AsyncPaymentIterator":
+        return self
+
+    async def __anext__(self) -> Dict:
+        return await self._records.__anext__()
+
+    async def aclose(self) -> None:
+        """Stop iterating and cancel a pending prefetch."""
+        await self._records.aclose()
+
+    async def _iterate(self) -> AsyncIterator[Dict]:
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        page, offset = self.cursor
+        pending: Optional[asyncio.Task] = None
+        try:
+            response = await self._fetch_page(page)
+            while True:
+                data = response.get("data") or []
+                has_next = _has_next_page(response, page, self.limit)
+                if has_next and self.prefetch:
+                    pending = asyncio.ensure_future(self._fetch_page(page + 1))
+                for index in range(offset, len(data)):
+                    self.cursor = PaymentCursor(page, index + 1)
+                    yield data[index]
+                if not has_next:
+                    return
+                page, offset = page + 1, 0
+                self.cursor = PaymentCursor(page, 0)
+                if pending is not None:
+                    response, pending = await pending, None
+                else:
+                    response = await self._fetch_page(page)
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def _iterate_streamed(self) -> AsyncIterator[Dict]:
+        page, offset = self.cursor
+        while True:
+            records = await self._fetch_page(page)
+            count = 0
+            try:
+                async for record in records:
+                    count += 1
+                    if count > offset:
+                        self.cursor = PaymentCursor(page, count)
+                        yield record
+            finally:
+                await records.aclose()
+            if count < self.limit:
+                return
+            page, offset = page + 1, 0
+            self.cursor = PaymentCursor(page, 0)
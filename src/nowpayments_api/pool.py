@@ -0,0 +1,220 @@
+"""
+Clients of many merchants sharing one connection pool.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .nowpayments_api import NOWPaymentsAPI
+from .ratelimit import RateLimiter
+from .transport import _new_session
+
+if TYPE_CHECKING:  # pragma: no cover
+    import requests
+    from requests.adapters import HTTPAdapter
+
+Credentials = Tuple[str, str, str]
+
+
+class NOWPaymentsClientPool:  # pylint: disable=too-many-instance-attributes
+    """
+    Hands out one :class:`NOWPaymentsAPI` per merchant, all sending their requests over a single
+    ``requests.Session`` and thus a single pool of keep-alive connections.
+
+    Each merchant's client has its own API key, JWT token, currency catalog and, with
+    ``rate_limiter_factory``, rate limiter. Currencies are validated against the coins enabled in the
+    merchant's settings by default. At most ``max_clients`` clients are kept: the least recently used
+    one is dropped, with its token and cached currencies, and built again from the registered
+    credentials on its next use. Rate limiters are kept per merchant until it is unregistered, so a
+    rebuilt client goes on consuming the same budget; they are closed by :meth:`unregister` and
+    :meth:`close`.
+
+        pool = NOWPaymentsClientPool(max_clients=100, pool_maxsize=50)
+        pool.register("shop-1", api_key, email, password)
+        pool.client("shop-1").create_payment(100, "usd", "btc")
+
+    :param int max_clients: Number of merchant clients kept.
+    :param bool sandbox: Use the sandbox API.
+    :param bool merchant_currencies: Validate currencies against each merchant's ``merchant/coins``.
+    :param rate_limiter_factory: Called with the merchant ID to build the merchant's rate limiter.
+    :param int pool_connections: Number of host connection pools to cache.
+    :param int pool_maxsize: Maximum number of connections kept per host, for all merchants together.
+    :param bool pool_block: Wait for a free connection instead of opening one beyond pool_maxsize.
+    :param requests.Session session: Pre-built session shared by the clients. It is not closed by
+        :meth:`close`.
+    :param HTTPAdapter adapter: Pre-built transport adapter mounted on the shared session.
+    :param client_options: Other :class:`NOWPaymentsAPI` arguments, e.g. ``retry_policy``, ``timeout``,
+        ``hooks``, ``circuit_breaker`` or a ``transport`` replacing the shared session, shared by every
+        client.
+    """
+
+    def __init__(
+        self,
+        max_clients: int = 256,
+        sandbox: bool = False,
+        merchant_currencies: bool = True,
+        rate_limiter_factory: Callable[[Hashable], RateLimiter] = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        session: "requests.Session" = None,
+        adapter: "HTTPAdapter" = None,
+        **client_options: Any,
+    ) -> None:
+        if max_clients < 1:
+            raise ValueError("max_clients must be at least 1")
+        self.max_clients = max_clients
+        self.sandbox = sandbox
+        self.merchant_currencies = merchant_currencies
+        self.rate_limiter_factory = rate_limiter_factory
+        self.client_options = client_options
+        self._session = session
+        self._owns_session = session is None
+        self._adapter = adapter
+        self._pool_options = {
+            "pool_connections": pool_connections,
+            "pool_maxsize": pool_maxsize,
+            "pool_block": pool_block,
+        }
+        if session is not None and adapter is not None:
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._credentials: Dict[Hashable, Credentials] = {}
+        self._clients: "OrderedDict[Hashable, NOWPaymentsAPI]" = OrderedDict()
+        self._rate_limiters: Dict[Hashable, RateLimiter] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._credentials)
+
+    def __contains__(self, merchant_id: Hashable) -> bool:
+        return merchant_id in self._credentials
+
+    def __getitem__(self, merchant_id: Hashable) -> NOWPaymentsAPI:
+        return self.client(merchant_id)
+
+    @property
+    def session(self) -> "requests.Session":
+        """Session shared by the clients, created on first use."""
+        with self._lock:
+            return self._shared_session()
+
+    def _shared_session(self) -> "requests.Session":
+        if self._session is None:
+            self._session = _new_session(self._adapter, self._pool_options)
+        return self._session
+
+    def register(
+        self, merchant_id: Hashable, api_key: str, email: str = "", password: str = ""
+    ) -> None:
+        """
+        Add a merchant, or replace its credentials. A client built with the previous credentials is
+        dropped.
+
+        :param merchant_id: Key of the merchant in the pool.
+        :param str api_key: API key of the merchant.
+        :param str email: Email of the merchant's account, for the endpoints requiring a JWT token.
+        :param str password: Password of the merchant's account.
+        """
+        with self._lock:
+            credentials = (api_key, email, password)
+            if self._credentials.get(merchant_id) != credentials:
+                self._credentials[merchant_id] = credentials
+                self._clients.pop(merchant_id, None)
+
+    def unregister(self, merchant_id: Hashable) -> None:
+        """Forget a merchant and drop its client."""
+        with self._lock:
+            self._credentials.pop(merchant_id, None)
+            self._clients.pop(merchant_id, None)
+            self._close_rate_limiter(self._rate_limiters.pop(merchant_id, None))
+
+    def client(self, merchant_id: Hashable) -> NOWPaymentsAPI:
+        """
+        Client of a registered merchant, built on first use.
+
+        :raises KeyError: If the merchant is not registered.
+        """
+        with self._lock:
+            client = self._clients.get(merchant_id)
+            if client is not None:
+                self._clients.move_to_end(merchant_id)
+                self.hits += 1
+                return client
+            api_key, email, password = self._credentials[merchant_id]
+            self.misses += 1
+            client = NOWPaymentsAPI(
+                api_key,
+                email,
+                password,
+                sandbox=self.sandbox,
+                session=self._shared_session(),
+                rate_limiter=self._rate_limiter(merchant_id),
+                merchant_currencies=self.merchant_currencies,
+                **self.client_options,
+            )
+            self._clients[merchant_id] = client
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+                self.evictions += 1
+            return client
+
+    def _rate_limiter(self, merchant_id: Hashable) -> Optional[RateLimiter]:
+        if self.rate_limiter_factory is None:
+            return None
+        limiter = self._rate_limiters.get(merchant_id)
+        if limiter is None:
+            limiter = self._rate_limiters[merchant_id] = self.rate_limiter_factory(
+                merchant_id
+            )
+        return limiter
+
+    def _close_rate_limiter(self, limiter: Optional[RateLimiter]) -> None:
+        # The factory may hand the same limiter to several merchants.
+        if limiter is not None and all(
+            other is not limiter for other in self._rate_limiters.values()
+        ):
+            limiter.close()
+
+    def evict(self, merchant_id: Optional[Hashable] = None) -> None:
+        """Drop the client of ``merchant_id``, or every client. The credentials are kept."""
+        with self._lock:
+            if merchant_id is None:
+                self._clients.clear()
+            else:
+                self._clients.pop(merchant_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Pool counters."""
+        with self._lock:
+            return {
+                "merchants": len(self._credentials),
+                "clients": len(self._clients),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def close(self) -> None:
+        """Drop every client, close the rate limiters and the shared session if the pool created it."""
+        with self._lock:
+            self._clients.clear()
+            limiters = {
+                id(limiter): limiter for limiter in self._rate_limiters.values()
+            }
+            self._rate_limiters.clear()
+            for limiter in limiters.values():
+                limiter.close()
+            if self._owns_session and self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def __enter__(self) -> "NOWPaymentsClientPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
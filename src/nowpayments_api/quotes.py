@@ -0,0 +1,236 @@
+"""
+Short-lived cache for price estimates and minimum amounts.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Optional,
+    Tuple,
+)
+
+from .circuit import CircuitOpenError
+
+if TYPE_CHECKING:  # pragma: no cover
+    import asyncio
+
+
+def bucket_amount(amount: float, significant_digits: Optional[int]) -> float:
+    """
+    Round an amount to ``significant_digits`` so that near-identical amounts share a cache entry,
+    e.g. 1234.56 becomes 1230.0 with 3 digits. None keeps the amount as is.
+    """
+    if significant_digits is None:
+        return float(amount)
+    return float(f"{amount:.{significant_digits}g}")
+
+
+def scale_estimate(quote: Dict[str, Any], amount: float) -> Dict[str, Any]:
+    """
+    Adapt an estimate fetched for a bucketed amount to the requested amount. Estimates are linear in
+    the amount, so the estimated amount is scaled by the ratio of both amounts.
+    """
+    quote = dict(quote)
+    quoted = float(quote.get("amount_from") or 0)
+    if quoted and quoted != amount and quote.get("estimated_amount") is not None:
+        quote["estimated_amount"] = float(quote["estimated_amount"]) * amount / quoted
+        quote["amount_from"] = amount
+    return quote
+
+
+class _BaseQuoteCache:
+    """
+    LRU storage and bookkeeping shared by the sync and asyncio quote caches.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 5.0,
+        maxsize: int = 1024,
+        significant_digits: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+        max_stale: float = 0.0,
+    ) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.significant_digits = significant_digits
+        self.max_stale = max_stale
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def bucket(self, amount: float) -> float:
+        """Amount used in the cache key and the upstream request."""
+        return bucket_amount(amount, self.significant_digits)
+
+    def stats(self) -> Dict[str, int]:
+        """Cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "stale": self.stale,
+        }
+
+    def _cached(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = self._clock() - entry[0]
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if age >= self.ttl + self.max_stale:
+                del self._entries[key]
+        return False, None
+
+    def _fallback(self, key: Hashable, error: BaseException) -> Tuple[bool, Any]:
+        """Expired quote kept for ``max_stale`` seconds, served while the endpoint's circuit is open."""
+        entry = self._entries.get(key)
+        if (
+            isinstance(error, CircuitOpenError)
+            and entry is not None
+            and self._clock() - entry[0] < self.ttl + self.max_stale
+        ):
+            self.stale += 1
+            return True, entry[1]
+        return False, None
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        if self.ttl <= 0:
+            return
+        self._entries[key] = (self._clock(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+class QuoteCache(_BaseQuoteCache):
+    """
+    Thread-safe TTL and LRU cache for quotes such as ``estimate_price`` and ``minimum_payment_amount``.
+
+    Concurrent lookups of a missing key share one upstream call (request coalescing).
+
+    :param float ttl: Seconds a quote is served from the cache.
+    :param int maxsize: Maximum number of cached quotes, the least recently used are dropped first.
+    :param int significant_digits: Round amounts to this many significant digits so that close amounts
+        share a quote. None caches exact amounts only.
+    :param float max_stale: Seconds past ``ttl`` a quote is still served when the request fails with
+        :class:`CircuitOpenError`.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 5.0,
+        maxsize: int = 1024,
+        significant_digits: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+        max_stale: float = 0.0,
+    ) -> None:
+        super().__init__(ttl, maxsize, significant_digits, clock, max_stale)
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+
+    def get(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """Return the cached quote for ``key``, calling ``fetch`` once when it is missing or expired."""
+        with self._lock:
+            found, value = self._cached(key)
+            if found:
+                return value
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+        try:
+            value = fetch()
+        except BaseException as error:
+            with self._lock:
+                del self._in_flight[key]
+                found, value = self._fallback(key, error)
+            if not found:
+                future.set_exception(error)
+                raise
+            future.set_result(value)
+            return value
+        with self._lock:
+            self._store(key, value)
+            del self._in_flight[key]
+        future.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class AsyncQuoteCache(_BaseQuoteCache):
+    """
+    asyncio version of :class:`QuoteCache`, ``fetch`` is a coroutine function.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 5.0,
+        maxsize: int = 1024,
+        significant_digits: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+        max_stale: float = 0.0,
+    ) -> None:
+        super().__init__(ttl, maxsize, significant_digits, clock, max_stale)
+        self._in_flight: Dict[Hashable, "asyncio.Future"] = {}
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """See :meth:`QuoteCache.get`."""
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        found, value = self._cached(key)
+        if found:
+            return value
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        self.misses += 1
+        future = self._in_flight[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await fetch()
+        except BaseException as error:
+            del self._in_flight[key]
+            found, value = self._fallback(key, error)
+            if found:
+                future.set_result(value)
+                return value
+            if isinstance(error, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(error)
+                # Retrieve the exception so that it is not reported when nobody awaited it.
+                future.exception()
+            raise
+        self._store(key, value)
+        del self._in_flight[key]
+        future.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
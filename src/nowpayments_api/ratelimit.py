@@ -0,0 +1,264 @@
+"""
+Client-side rate limiting of requests to the NOWPayments API.
+"""
+
+import os
+import struct
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from .exceptions import NowPaymentsException
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+BLOCK = "block"
+WAIT = "wait"
+FAIL = "fail"
+
+READ = "read"
+CREATE = "create"
+WRITE = "write"
+
+CREATE_ENDPOINTS = frozenset({"payment", "invoice", "invoice-payment"})
+
+
+class RateLimitExceeded(NowPaymentsException):
+    """Raised when a request would exceed the client-side rate limit."""
+
+    def __init__(self, endpoint_class: str, retry_after: float) -> None:
+        super().__init__(
+            f"Rate limit for {endpoint_class} requests exceeded, retry in {retry_after:.3f}s"
+        )
+        self.endpoint_class = endpoint_class
+        self.retry_after = retry_after
+
+
+class RateLimit(NamedTuple):
+    """
+    :param float rate: Requests per second.
+    :param float burst: Maximum number of requests that can be made at once.
+    """
+
+    rate: float
+    burst: float
+
+
+def endpoint_class(method: str, endpoint: str) -> str:
+    """
+    Classify a request for rate limiting: payment/invoice creation, other writes, or reads.
+    """
+    if method == "GET":
+        return READ
+    path = endpoint.split("?", 1)[0].strip("/")
+    if path in CREATE_ENDPOINTS:
+        return CREATE
+    return WRITE
+
+
+class _MemoryState:
+    """Bucket state shared by the threads of one process."""
+
+    def __init__(self, capacity: float) -> None:
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated_at: Optional[float] = None
+
+    def update(
+        self, func: Callable[[float, Optional[float]], Tuple[float, float, float]]
+    ) -> float:
+        with self._lock:
+            self._tokens, self._updated_at, result = func(
+                self._tokens, self._updated_at
+            )
+            return result
+
+    def close(self) -> None:
+        pass
+
+
+class _FileState:
+    """
+    Bucket state stored in a file and guarded by ``flock``, shared by every process of the host that
+    uses the same path.
+    """
+
+    _FORMAT = struct.Struct("dd")
+
+    def __init__(self, path: str, capacity: float) -> None:
+        if fcntl is None:
+            raise NowPaymentsException("File based rate limiting requires fcntl")
+        self.path = path
+        self._capacity = capacity
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def update(
+        self, func: Callable[[float, Optional[float]], Tuple[float, float, float]]
+    ) -> float:
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                raw = os.pread(self._fd, self._FORMAT.size, 0)
+                if len(raw) == self._FORMAT.size:
+                    tokens, updated_at = self._FORMAT.unpack(raw)
+                else:
+                    tokens, updated_at = self._capacity, None
+                tokens, updated_at, result = func(tokens, updated_at)
+                os.pwrite(self._fd, self._FORMAT.pack(tokens, updated_at), 0)
+                return result
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled with ``rate`` tokens per second up to ``burst`` tokens.
+
+    :param float rate: Tokens added per second.
+    :param float burst: Capacity of the bucket.
+    :param str path: Store the bucket in this file to share it between processes on the host.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._state = _FileState(path, burst) if path else _MemoryState(burst)
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """
+        Take ``tokens`` if they are available.
+
+        :return: 0 when the tokens were taken, otherwise the seconds until they will be available.
+        """
+        return self._state.update(lambda *state: self._take(tokens, *state))
+
+    def wait_time(self, tokens: float = 1) -> float:
+        """Seconds until ``tokens`` will be available, without taking them."""
+        return self._state.update(lambda *state: self._take(tokens, *state, peek=True))
+
+    def _take(
+        self,
+        tokens: float,
+        available: float,
+        updated_at: Optional[float],
+        peek: bool = False,
+    ) -> Tuple[float, float, float]:
+        now = self._clock()
+        if updated_at is not None:
+            available = min(
+                self.burst, available + max(0.0, now - updated_at) * self.rate
+            )
+        if available >= tokens:
+            return available - (0 if peek else tokens), now, 0.0
+        return available, now, (tokens - available) / self.rate
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Take ``tokens``, sleeping until they are available.
+
+        :param float timeout: Give up after this many seconds. None waits indefinitely, 0 never waits.
+        :return: Whether the tokens were taken.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return True
+            if deadline is not None and self._clock() + wait > deadline:
+                return False
+            self._sleep(wait)
+
+    def close(self) -> None:
+        """Close the bucket file, if any."""
+        self._state.close()
+
+
+class RateLimiter:
+    """
+    Token buckets per endpoint class (``read``, ``create`` and ``write``) applied to every request.
+
+    Share one instance between clients to give them a common budget. With ``lock_dir`` the buckets are
+    stored in files in that directory and shared by every process of the host using it; :meth:`close`
+    the limiter, or use it as a context manager, to close the files.
+
+    :param dict limits: RateLimit per endpoint class. Classes without a limit are not throttled.
+    :param str mode: ``block`` waits for a token, ``wait`` waits up to ``timeout`` seconds and
+        ``fail`` raises RateLimitExceeded immediately when no token is available.
+    :param float timeout: Maximum wait in ``wait`` mode.
+    :param str lock_dir: Directory for the cross-process bucket files.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, RateLimit],
+        mode: str = BLOCK,
+        timeout: Optional[float] = None,
+        lock_dir: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if mode not in (BLOCK, WAIT, FAIL):
+            raise ValueError(f"Invalid rate limit mode {mode!r}")
+        if mode == WAIT and timeout is None:
+            raise ValueError("The wait mode requires a timeout")
+        self.mode = mode
+        self.timeout = {BLOCK: None, WAIT: timeout, FAIL: 0.0}[mode]
+        self.buckets = {
+            name: TokenBucket(
+                limit.rate,
+                limit.burst,
+                path=(
+                    os.path.join(lock_dir, f"nowpayments-{name}.bucket")
+                    if lock_dir
+                    else None
+                ),
+                clock=clock,
+                sleep=sleep,
+            )
+            for name, limit in limits.items()
+        }
+
+    def acquire(self, method: str, endpoint: str) -> None:
+        """
+        Wait for a token of the request's endpoint class.
+
+        :raises RateLimitExceeded: If no token is available within the mode's timeout.
+        """
+        name = endpoint_class(method, endpoint)
+        bucket = self.buckets.get(name)
+        if bucket is None:
+            return
+        if not bucket.acquire(timeout=self.timeout):
+            raise RateLimitExceeded(name, bucket.wait_time())
+
+    def close(self) -> None:
+        """Close the bucket files."""
+        for bucket in self.buckets.values():
+            bucket.close()
+
+    def __enter__(self) -> "RateLimiter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
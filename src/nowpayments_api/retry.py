@@ -0,0 +1,108 @@
+"""
+Retry policy for requests to the NOWPayments API.
+"""
+
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, FrozenSet, Optional
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_retry_after(
+    value: Optional[str], now: Callable[[], float] = time.time
+) -> Optional[float]:
+    """
+    Parse a ``Retry-After`` header, given either in seconds or as an HTTP date.
+
+    :return: Seconds to wait or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import (  # pylint: disable=import-outside-toplevel
+        parsedate_to_datetime,
+    )
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class RetryPolicy:  # pylint: disable=too-many-instance-attributes
+    """
+    When and how long to wait before repeating a failed request.
+
+    Requests failing with a connection error, a timeout or one of ``retry_statuses`` are retried with
+    exponential backoff (``backoff_factor * 2 ** (attempt - 1)``, capped at ``max_backoff``) and full
+    jitter. A ``Retry-After`` header on the response takes precedence over the backoff.
+
+    Only GET requests are retried by default. POST requests are retried only when
+    ``retry_idempotent_posts`` is set and the caller passed an idempotency key, i.e. declared that a
+    duplicate request is harmless or reconciled on its side.
+
+    :param int max_attempts: Total attempts per call, including the first one. 1 disables retries.
+    :param float backoff_factor: Base delay in seconds.
+    :param float max_backoff: Upper bound of the computed delay in seconds.
+    :param bool jitter: Randomize the delay between 0 and the computed backoff.
+    :param retry_statuses: HTTP status codes that are retried.
+    :param bool respect_retry_after: Honor the Retry-After header of 429/503 responses.
+    :param float max_retry_after: Give up instead of waiting when Retry-After asks for more seconds.
+    :param bool retry_idempotent_posts: Retry POST requests that carry an idempotency key.
+    :param float deadline: Budget in seconds for a call including all retries and waits.
+    """
+
+    max_attempts: int = 3
+    backoff_factor: float = 0.5
+    max_backoff: float = 10.0
+    jitter: bool = True
+    retry_statuses: FrozenSet[int] = RETRY_STATUSES
+    respect_retry_after: bool = True
+    max_retry_after: float = 60.0
+    retry_idempotent_posts: bool = False
+    deadline: Optional[float] = None
+    sleep: Callable[[float], None] = field(default=time.sleep, repr=False)
+
+    def allows_method(self, method: str, idempotency_key: Optional[str] = None) -> bool:
+        """Whether requests with this method may be retried at all."""
+        if method in ("GET", "HEAD", "OPTIONS"):
+            return True
+        return self.retry_idempotent_posts and bool(idempotency_key)
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before the attempt following ``attempt`` (1-based)."""
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def next_delay(
+        self, attempt: int, elapsed: float, retry_after: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        Seconds to wait before the next attempt, or None if the call should not be retried.
+
+        :param int attempt: Number of attempts made so far.
+        :param float elapsed: Seconds spent on the call so far.
+        :param float retry_after: Delay requested by the server.
+        """
+        if attempt >= self.max_attempts:
+            return None
+        if retry_after is not None and self.respect_retry_after:
+            if retry_after > self.max_retry_after:
+                return None
+            delay = retry_after
+        else:
+            delay = self.backoff(attempt)
+        if self.deadline is not None and elapsed + delay >= self.deadline:
+            return None
+        return delay
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
@@ -0,0 +1,180 @@
+"""
+Incremental parsing of the large arrays in JSON responses, such as the ``data`` of
+``list_of_payments`` or the ``currencies`` of ``full-currencies``.
+
+The body is scanned chunk by chunk and only the bytes of the record being read are buffered, so the
+peak memory is proportional to one record rather than to the whole response. Each record is decoded
+with the fastest installed JSON backend (see :mod:`nowpayments_api._json`).
+"""
+
+import json
+import re
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
+
+from . import _json
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# A string, possibly cut at the end of the buffer (no closing quote in group 1), or a structural byte.
+_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*(")?|[][{},:]', re.S)
+# Inside a record only brackets matter: skip everything else, complete strings included, at once.
+_SKIP = re.compile(rb'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.S)
+
+_SEARCHING = 0
+_KEY_FOUND = 1
+_IN_ARRAY = 2
+_DONE = 3
+
+
+class JSONArrayParser:
+    """
+    Push parser yielding the items of one array of a JSON document as they are complete.
+
+        parser = JSONArrayParser("data")
+        for chunk in chunks:
+            for record in parser.feed(chunk):
+                ...
+        parser.close()
+
+    :param str key: Key of the array in the top-level object, or None if the document is the array.
+    :param loads: Function decoding the bytes of one item.
+    """
+
+    def __init__(
+        self, key: Optional[str], loads: Callable[[bytes], Any] = None
+    ) -> None:
+        self.key = key
+        self._loads = loads or _json.loads
+        self._target = json.dumps(key).encode() if key is not None else None
+        self._array_depth = 0 if key is None else 1
+        self._state = _KEY_FOUND if key is None else _SEARCHING
+        self._buffer = b""
+        self._pos = 0
+        self._depth = 0
+        self._previous = b""
+        self._item_start = 0
+
+    @property
+    def done(self) -> bool:
+        """Whether the end of the array was reached."""
+        return self._state == _DONE
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Add a chunk of the body and return the items completed by it."""
+        if self._state == _DONE:
+            return []
+        keep = self._item_start if self._state == _IN_ARRAY else self._pos
+        buffer = self._buffer = self._buffer[keep:] + chunk
+        self._pos -= keep
+        self._item_start -= keep
+
+        items = []
+        item_depth = self._array_depth + 1
+        pos, depth, state, previous = (
+            self._pos,
+            self._depth,
+            self._state,
+            self._previous,
+        )
+        while True:
+            if depth > item_depth:
+                start = _SKIP.match(buffer, pos).end()
+                if start == len(buffer) or buffer[start] == 0x22:
+                    # End of the chunk, possibly inside a string: wait for the rest.
+                    pos = start
+                    break
+                pos = start + 1
+                token = buffer[start:pos]
+            else:
+                match = _TOKEN.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                    break
+                token, start = match.group(), match.start()
+                if token[0] == 0x22 and match.group(1) is None:
+                    # String cut by the end of the chunk, wait for the rest.
+                    pos = start
+                    break
+                pos = match.end()
+            if token in (b"{", b"["):
+                if state == _KEY_FOUND:
+                    if token == b"[" and depth == self._array_depth:
+                        state = _IN_ARRAY
+                        self._item_start = pos
+                    else:
+                        state = _SEARCHING
+                depth += 1
+            elif token in (b"}", b"]"):
+                depth -= 1
+                if state == _IN_ARRAY and depth == self._array_depth:
+                    self._append(items, buffer[self._item_start : start])
+                    state = _DONE
+                    break
+            elif token == b",":
+                if state == _IN_ARRAY and depth == item_depth:
+                    self._append(items, buffer[self._item_start : start])
+                    self._item_start = pos
+                elif state == _KEY_FOUND:
+                    state = _SEARCHING
+            elif token == b":":
+                if depth == 1 and state == _SEARCHING and previous == self._target:
+                    state = _KEY_FOUND
+            previous = token
+        self._pos, self._depth, self._state, self._previous = (
+            pos,
+            depth,
+            state,
+            previous,
+        )
+        if state == _DONE:
+            self._buffer = b""
+        return items
+
+    def _append(self, items: List[Any], raw: bytes) -> None:
+        if raw.strip():
+            items.append(self._loads(raw))
+
+    def close(self) -> None:
+        """
+        :raises ValueError: If the body ended before the end of the array or does not contain it.
+        """
+        if self._state == _IN_ARRAY:
+            raise ValueError("JSON body ended inside the array")
+        if self._state != _DONE:
+            raise ValueError(f"No {self.key!r} array in the JSON body")
+
+
+def iter_json_array(
+    chunks: Iterable[bytes], key: Optional[str], loads: Callable[[bytes], Any] = None
+) -> Iterator[Any]:
+    """Yield the items of the array ``key`` of a JSON body given as chunks of bytes."""
+    parser = JSONArrayParser(key, loads)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+        if parser.done:
+            return
+    parser.close()
+
+
+async def aiter_json_array(
+    chunks: AsyncIterable[bytes],
+    key: Optional[str],
+    loads: Callable[[bytes], Any] = None,
+) -> AsyncIterator[Any]:
+    """asyncio version of :func:`iter_json_array`."""
+    parser = JSONArrayParser(key, loads)
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+        if parser.done:
+            return
+    parser.close()
@@ -0,0 +1,348 @@
+"""
+Incremental copy of ``list_of_payments`` into a local store.
+"""
+
+import abc
+import json
+import math
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .concurrency import iter_concurrently
+from .models.payment import TERMINAL_STATUSES, _datetime
+
+Window = Tuple[Optional[datetime], datetime]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _utc(value: datetime) -> datetime:
+    """Naive datetimes are taken as UTC, like the dates sent to the API."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _created_at(payment: Dict[str, Any]) -> Optional[datetime]:
+    value = payment.get("created_at")
+    return _datetime(value) if value else None
+
+
+class PaymentStore(abc.ABC):
+    """
+    Interface of the local copies of the payments, keyed by ``payment_id``.
+    """
+
+    @abc.abstractmethod
+    def upsert(self, payments: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert new payments and replace the ones that changed.
+
+        :returns: Number of payments inserted or replaced.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get(self, payment_id: int) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def watermark(self) -> Optional[datetime]:
+        """End of the last fully synchronized period, None before the first sync."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def set_watermark(self, value: datetime) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def oldest_open(self) -> Optional[datetime]:
+        """Creation date of the oldest payment that is not in a final state."""
+        raise NotImplementedError
+
+
+class MemoryPaymentStore(PaymentStore):
+    """
+    Store in a dictionary, for tests and short-lived processes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._payments: Dict[int, Dict[str, Any]] = {}
+        self._watermark: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._payments)
+
+    def upsert(self, payments: Iterable[Dict[str, Any]]) -> int:
+        changed = 0
+        with self._lock:
+            for payment in payments:
+                payment_id = int(payment["payment_id"])
+                if self._payments.get(payment_id) != payment:
+                    self._payments[payment_id] = payment
+                    changed += 1
+        return changed
+
+    def get(self, payment_id: int) -> Optional[Dict[str, Any]]:
+        return self._payments.get(int(payment_id))
+
+    def watermark(self) -> Optional[datetime]:
+        return self._watermark
+
+    def set_watermark(self, value: datetime) -> None:
+        self._watermark = value
+
+    def oldest_open(self) -> Optional[datetime]:
+        with self._lock:
+            dates = [
+                _created_at(payment)
+                for payment in self._payments.values()
+                if payment.get("payment_status") not in TERMINAL_STATUSES
+            ]
+        dates = [date for date in dates if date is not None]
+        return min(dates, default=None)
+
+
+class SQLitePaymentStore(PaymentStore):
+    """
+    Store in a SQLite database. Payments are kept as JSON next to their ID, status and dates, so they
+    can be queried with SQL.
+
+    :param str path: Database file.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS nowpayments_payments "
+        "(payment_id INTEGER PRIMARY KEY, payment_status TEXT, created_at TEXT, "
+        "updated_at TEXT, data TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS nowpayments_payments_open "
+        "ON nowpayments_payments (payment_status, created_at)",
+        "CREATE TABLE IF NOT EXISTS nowpayments_sync "
+        "(name TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    )
+
+    def __init__(self, path: str) -> None:
+        self.path = os.fspath(path)
+        self._local = threading.local()
+        connection = self._connection()
+        for statement in self._SCHEMA:
+            connection.execute(statement)
+
+    def __len__(self) -> int:
+        return (
+            self._connection()
+            .execute("SELECT COUNT(*) FROM nowpayments_payments")
+            .fetchone()[0]
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    def upsert(self, payments: Iterable[Dict[str, Any]]) -> int:
+        connection = self._connection()
+        rows = (
+            (
+                int(payment["payment_id"]),
+                payment.get("payment_status"),
+                payment.get("created_at"),
+                payment.get("updated_at"),
+                json.dumps(payment, sort_keys=True),
+            )
+            for payment in payments
+        )
+        before = connection.total_changes
+        connection.execute("BEGIN")
+        try:
+            # Unchanged payments are skipped by the WHERE clause and not counted as changes.
+            connection.executemany(
+                "INSERT INTO nowpayments_payments VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (payment_id) DO UPDATE SET "
+                "payment_status = excluded.payment_status, "
+                "created_at = excluded.created_at, "
+                "updated_at = excluded.updated_at, data = excluded.data "
+                "WHERE data IS NOT excluded.data",
+                rows,
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return connection.total_changes - before
+
+    def get(self, payment_id: int) -> Optional[Dict[str, Any]]:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT data FROM nowpayments_payments WHERE payment_id = ?",
+                (int(payment_id),),
+            )
+            .fetchone()
+        )
+        return json.loads(row[0]) if row is not None else None
+
+    def watermark(self) -> Optional[datetime]:
+        row = (
+            self._connection()
+            .execute("SELECT value FROM nowpayments_sync WHERE name = 'watermark'")
+            .fetchone()
+        )
+        return datetime.fromisoformat(row[0]) if row is not None else None
+
+    def set_watermark(self, value: datetime) -> None:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO nowpayments_sync VALUES ('watermark', ?)",
+            (value.isoformat(),),
+        )
+
+    def oldest_open(self) -> Optional[datetime]:
+        statuses = sorted(TERMINAL_STATUSES)
+        row = (
+            self._connection()
+            .execute(
+                "SELECT MIN(created_at) FROM nowpayments_payments "
+                f"WHERE payment_status NOT IN ({', '.join('?' * len(statuses))})",
+                statuses,
+            )
+            .fetchone()
+        )
+        return _datetime(row[0]) if row[0] else None
+
+    def close(self) -> None:
+        """Close the connection of the calling thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+@dataclass
+class SyncResult:
+    """
+    Outcome of :meth:`PaymentSync.run`.
+
+    :param int windows: Number of date slices requested.
+    :param int fetched: Payments received.
+    :param int changed: Payments inserted or updated in the store.
+    :param datetime watermark: Watermark after the run.
+    :param dict errors: Exception of every slice that failed, keyed by its (date_from, date_to).
+    """
+
+    windows: int = 0
+    fetched: int = 0
+    changed: int = 0
+    watermark: Optional[datetime] = None
+    errors: Dict[Window, BaseException] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+class PaymentSync:  # pylint: disable=too-many-instance-attributes
+    """
+    Copies the payments of ``list_of_payments`` into a :class:`PaymentStore`, fetching only what is new.
+
+    The store keeps a watermark: the date up to which every payment was copied. A run requests the
+    period from the watermark (minus ``overlap``, for payments recorded late) to now, split into
+    ``slice_length`` slices fetched in parallel with ``date_from``/``date_to``. The period is
+    extended back to the oldest payment still open in the store, within ``reopen_window``, so that
+    status changes of recent payments are picked up too. The first run, without watermark, starts at
+    ``start``, e.g. the creation of the account, and is sliced the same way; without ``start`` it
+    copies everything in one pass.
+
+    The watermark only advances over slices that were fully copied; a failed slice is requested again
+    by the next run.
+
+        sync = PaymentSync(api, "payments.db")
+        result = sync.run()
+
+    :param api: NOWPaymentsAPI authenticated with email and password.
+    :param store: :class:`PaymentStore`, or the path of a :class:`SQLitePaymentStore`.
+    :param timedelta slice_length: Length of the date slices requested in parallel.
+    :param timedelta overlap: Period before the watermark requested again.
+    :param timedelta reopen_window: How far back payments still open are refreshed.
+    :param int max_workers: Maximum number of slices fetched at once.
+    :param int limit: Records per page.
+    :param datetime start: Date the first run copies from. Naive datetimes are taken as UTC, here and
+        for ``until``.
+    """
+
+    def __init__(
+        self,
+        api: Any,
+        store: Union[PaymentStore, str],
+        slice_length: timedelta = timedelta(hours=6),
+        overlap: timedelta = timedelta(minutes=10),
+        reopen_window: timedelta = timedelta(days=7),
+        max_workers: int = 4,
+        limit: int = 500,
+        start: Optional[datetime] = None,
+        clock: Callable[[], datetime] = _utcnow,
+    ) -> None:
+        if slice_length <= timedelta(0):
+            raise ValueError("slice_length must be positive")
+        self.api = api
+        self.store = (
+            store if isinstance(store, PaymentStore) else SQLitePaymentStore(store)
+        )
+        self.slice_length = slice_length
+        self.overlap = overlap
+        self.reopen_window = reopen_window
+        self.max_workers = max_workers
+        self.limit = limit
+        self.start = _utc(start) if start is not None else None
+        self._clock = clock
+
+    def windows(self, until: Optional[datetime] = None) -> List[Window]:
+        """Date slices the next :meth:`run` requests, in chronological order."""
+        until = _utc(until or self._clock())
+        watermark = self.store.watermark()
+        if watermark is not None:
+            start = watermark - self.overlap
+        elif self.start is not None:
+            start = self.start
+        else:
+            return [(None, until)]
+        oldest_open = self.store.oldest_open()
+        if oldest_open is not None:
+            start = min(start, max(oldest_open, until - self.reopen_window))
+        count = max(1, math.ceil((until - start) / self.slice_length))
+        bounds = [start + self.slice_length * index for index in range(count)]
+        return list(zip(bounds, bounds[1:] + [until]))
+
+    def _fetch(self, window: Window) -> List[Dict[str, Any]]:
+        date_from, date_to = window
+        return list(
+            self.api.iter_payments(
+                self.limit, date_from=date_from, date_to=date_to, stream=True
+            )
+        )
+
+    def run(self, until: Optional[datetime] = None) -> SyncResult:
+        """
+        Copy the payments created since the watermark, up to ``until`` (now by default).
+        """
+        windows = self.windows(until)
+        result = SyncResult(windows=len(windows))
+        for batch in iter_concurrently(self._fetch, windows, self.max_workers):
+            if not batch.ok:
+                result.errors[batch.key] = batch.error
+                continue
+            result.fetched += len(batch.value)
+            result.changed += self.store.upsert(batch.value)
+        failed = [window for window in windows if window in result.errors]
+        watermark = failed[0][0] if failed else windows[-1][1]
+        previous = self.store.watermark()
+        if watermark is not None and (previous is None or watermark > previous):
+            self.store.set_watermark(watermark)
+        result.watermark = self.store.watermark()
+        return result
@@ -0,0 +1,430 @@
+"""
+Local stand-in for the NOWPayments API, for tests that must not touch the network.
+
+    with StubServer(api_key="test") as server:
+        api = NOWPaymentsAPI("test")
+        api.api_uri = server.url
+        api.status()
+
+Latency, errors and throttling can be configured to exercise the retry and rate limiting paths or
+to benchmark the client against a server with realistic response times.
+"""
+
+import base64
+import itertools
+import json
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from .ratelimit import TokenBucket
+
+# USD value of one unit of each currency the stub knows about.
+RATES = {
+    "usd": 1.0,
+    "eur": 1.08,
+    "gbp": 1.27,
+    "nzd": 0.61,
+    "brl": 0.2,
+    "btc": 60000.0,
+    "eth": 3000.0,
+    "ltc": 80.0,
+    "xmr": 160.0,
+    "doge": 0.15,
+    "usdttrc20": 1.0,
+}
+FIAT = ("usd", "eur", "gbp", "nzd", "brl")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _jwt(lifetime: float) -> str:
+    def encode(value: Dict) -> str:
+        raw = json.dumps(value).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    claims = {"id": "stub", "exp": int(time.time() + lifetime)}
+    return f"{encode({'alg': 'HS256', 'typ': 'JWT'})}.{encode(claims)}.c3R1Yg"
+
+
+class StubState:  # pylint: disable=too-many-instance-attributes
+    """
+    In-memory data of the stub API and the faults it injects.
+
+    :param float latency: Seconds every response is delayed.
+    :param float jitter: Random extra delay of up to this many seconds.
+    :param float error_rate: Fraction of requests answered with ``error_status``.
+    :param int error_status: Status code of the injected errors.
+    :param float throttle: Requests per second accepted before answering 429 with Retry-After.
+    :param int seed: Seed of the random generator used for jitter and errors.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        api_key: str,
+        email: str,
+        password: str,
+        currencies: Optional[List[str]] = None,
+        token_lifetime: float = 300.0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        throttle: Optional[float] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.api_key = api_key
+        self.email = email
+        self.password = password
+        self.currencies = currencies or [c for c in RATES if c not in FIAT]
+        self.token_lifetime = token_lifetime
+        self.tokens = set()
+        self.payments: Dict[int, Dict] = {}
+        self.invoices: Dict[int, Dict] = {}
+        self.requests: List[Tuple[str, str]] = []
+        self._ids = itertools.count(5_000_000_000)
+        self.lock = threading.Lock()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.throttle = throttle
+        self._bucket = TokenBucket(throttle, max(1.0, throttle)) if throttle else None
+        self._random = random.Random(seed)
+        self._failures: deque = deque()
+
+    def fail_next(
+        self, status: int, count: int = 1, path: Optional[str] = None
+    ) -> None:
+        """
+        Answer the next ``count`` requests (to ``path`` only, if given) with ``status``.
+        """
+        with self.lock:
+            self._failures.extend([(status, path)] * count)
+
+    def delay(self) -> float:
+        """Seconds to wait before answering the current request."""
+        if not self.jitter:
+            return self.latency
+        with self.lock:
+            return self.latency + self._random.uniform(0, self.jitter)
+
+    def fault(self, path: str) -> Optional[Tuple[int, Dict[str, str]]]:
+        """
+        Status code and headers of the fault to inject for a request, or None to answer normally.
+        """
+        with self.lock:
+            for index, (status, failing_path) in enumerate(self._failures):
+                if failing_path is None or failing_path == path:
+                    del self._failures[index]
+                    return status, {}
+            if self.error_rate and self._random.random() < self.error_rate:
+                return self.error_status, {}
+        if self._bucket is not None:
+            wait = self._bucket.try_acquire()
+            if wait:
+                return 429, {"Retry-After": f"{wait:.3f}"}
+        return None
+
+    def next_id(self) -> int:
+        with self.lock:
+            return next(self._ids)
+
+    def estimate(self, amount: float, currency_from: str, currency_to: str) -> float:
+        return round(amount * RATES[currency_from] / RATES[currency_to], 8)
+
+    def create_payment(self, data: Dict[str, Any]) -> Dict:
+        payment_id = self.next_id()
+        price_amount = float(data["price_amount"])
+        created_at = _now()
+        payment = {
+            "payment_id": str(payment_id),
+            "payment_status": "waiting",
+            "pay_address": f"stub{payment_id:x}",
+            "price_amount": price_amount,
+            "price_currency": data["price_currency"],
+            "pay_amount": float(data.get("pay_amount") or 0)
+            or self.estimate(
+                price_amount, data["price_currency"], data["pay_currency"]
+            ),
+            "actually_paid": 0,
+            "pay_currency": data["pay_currency"],
+            "order_id": data.get("order_id"),
+            "order_description": data.get("order_description"),
+            "ipn_callback_url": data.get("ipn_callback_url"),
+            "created_at": created_at,
+            "updated_at": created_at,
+            "purchase_id": str(self.next_id()),
+            "amount_received": None,
+            "payin_extra_id": None,
+            "smart_contract": "",
+            "network": data["pay_currency"],
+            "network_precision": 8,
+            "time_limit": None,
+            "burning_percent": None,
+            "expiration_estimate_date": created_at,
+            "outcome_amount": None,
+            "outcome_currency": data["pay_currency"],
+        }
+        self.payments[payment_id] = payment
+        return payment
+
+    def create_invoice(self, data: Dict[str, Any]) -> Dict:
+        invoice_id = self.next_id()
+        created_at = _now()
+        invoice = {
+            "id": str(invoice_id),
+            "order_id": data.get("order_id"),
+            "order_description": data.get("order_description"),
+            "price_amount": str(data["price_amount"]),
+            "price_currency": data["price_currency"],
+            "pay_currency": data.get("pay_currency"),
+            "ipn_callback_url": data.get("ipn_callback_url"),
+            "invoice_url": f"https://sandbox.nowpayments.io/payment/?iid={invoice_id}",
+            "success_url": data.get("success_url"),
+            "cancel_url": data.get("cancel_url"),
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+        self.invoices[invoice_id] = invoice
+        return invoice
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "_Server"
+
+    def log_message(self, format, *args) -> None:  # pylint: disable=redefined-builtin
+        pass
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str) -> None:
+        parts = urlsplit(self.path)
+        path = parts.path
+        if path.startswith("/v1/"):
+            path = path[len("/v1/") :]
+        query = dict(parse_qsl(parts.query))
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        state = self.server.state
+        state.requests.append((method, path))
+
+        delay = state.delay()
+        if delay:
+            time.sleep(delay)
+        fault = state.fault(path)
+        if fault is not None:
+            status, headers = fault
+            self._send(status, {"message": f"Injected error {status}"}, headers)
+            return
+        if self.headers.get("x-api-key") != state.api_key:
+            self._send(403, {"message": "Invalid api key"})
+            return
+        try:
+            status, payload = self._route(method, path, query, self._parse(body))
+        except (KeyError, ValueError) as error:
+            status, payload = 400, {"message": f"Bad request: {error}"}
+        self._send(status, payload)
+
+    def _parse(self, body: bytes) -> Dict[str, Any]:
+        if not body:
+            return {}
+        if "json" in (self.headers.get("Content-Type") or ""):
+            return json.loads(body)
+        return dict(parse_qsl(body.decode()))
+
+    def _send(
+        self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(  # pylint: disable=too-many-return-statements
+        self, method: str, path: str, query: Dict[str, str], data: Dict[str, Any]
+    ) -> Tuple[int, Any]:
+        state = self.server.state
+        segments = path.strip("/").split("/")
+        if method == "GET" and path == "status":
+            return 200, {"message": "OK"}
+        if method == "POST" and path == "auth":
+            if (
+                data.get("email") != state.email
+                or data.get("password") != state.password
+            ):
+                return 401, {"message": "Invalid credentials"}
+            token = _jwt(state.token_lifetime)
+            state.tokens.add(token)
+            return 200, {"token": token}
+        if method == "GET" and path == "currencies":
+            return 200, {"currencies": state.currencies}
+        if method == "GET" and path == "full-currencies":
+            return 200, {
+                "currencies": [
+                    {"id": index, "code": code.upper(), "name": code, "enable": True}
+                    for index, code in enumerate(state.currencies, 1)
+                ]
+            }
+        if method == "GET" and path == "merchant/coins":
+            return 200, {"selectedCurrencies": [c.upper() for c in state.currencies]}
+        if method == "GET" and path == "estimate":
+            amount = float(query["amount"])
+            return 200, {
+                "currency_from": query["currency_from"],
+                "amount_from": amount,
+                "currency_to": query["currency_to"],
+                "estimated_amount": state.estimate(
+                    amount, query["currency_from"], query["currency_to"]
+                ),
+            }
+        if method == "GET" and path == "min-amount":
+            response = {
+                "currency_from": query["currency_from"],
+                "currency_to": query["currency_to"],
+                "min_amount": round(5 / RATES[query["currency_from"]], 8),
+            }
+            if "fiat_equivalent" in query:
+                response["fiat_equivalent"] = 5.0 / RATES[query["fiat_equivalent"]]
+            return 200, response
+        if method == "POST" and path == "payment":
+            return 201, state.create_payment(data)
+        if method == "POST" and path == "invoice":
+            return 200, state.create_invoice(data)
+        if method == "POST" and path == "invoice-payment":
+            invoice = state.invoices.get(int(data["iid"]))
+            if invoice is None:
+                return 404, {"message": "Invoice not found"}
+            payment = state.create_payment(
+                {
+                    "price_amount": invoice["price_amount"],
+                    "price_currency": invoice["price_currency"],
+                    "pay_currency": data["pay_currency"],
+                    "order_id": invoice["order_id"],
+                    "order_description": data.get("order_description"),
+                    "ipn_callback_url": invoice["ipn_callback_url"],
+                }
+            )
+            return 201, payment
+        if method == "GET" and path == "payment":
+            if self._bearer() not in state.tokens:
+                return 401, {"message": "Authorization header is empty or invalid"}
+            return 200, self._payment_page(query)
+        if segments[0] == "payment" and len(segments) >= 2 and segments[1].isdigit():
+            payment = state.payments.get(int(segments[1]))
+            if payment is None:
+                return 404, {"message": "Payment not found"}
+            if method == "GET" and len(segments) == 2:
+                return 200, payment
+            if method == "POST" and segments[2:] == ["update-merchant-estimate"]:
+                return 200, {
+                    "id": int(segments[1]),
+                    "token_id": "stub",
+                    "pay_amount": payment["pay_amount"],
+                    "expiration_estimate_date": payment["expiration_estimate_date"],
+                }
+        return 404, {"message": f"Unknown endpoint {method} {path}"}
+
+    def _bearer(self) -> Optional[str]:
+        header = self.headers.get("Authorization") or ""
+        return header[len("Bearer ") :] if header.startswith("Bearer ") else None
+
+    def _payment_page(self, query: Dict[str, str]) -> Dict:
+        limit = int(query.get("limit", 10))
+        page = int(query.get("page", 0))
+        payments = list(self.server.state.payments.values())
+        # Timestamps share one format, so they compare as strings.
+        if query.get("dateFrom"):
+            payments = [p for p in payments if p["created_at"] >= query["dateFrom"]]
+        if query.get("dateTo"):
+            payments = [p for p in payments if p["created_at"] < query["dateTo"]]
+        payments = sorted(
+            payments,
+            key=lambda payment: payment.get(query.get("sortBy", "created_at")) or "",
+            reverse=query.get("orderBy") == "desc",
+        )
+        return {
+            "data": payments[page * limit : (page + 1) * limit],
+            "limit": limit,
+            "page": page,
+            "pagesCount": -(-len(payments) // limit),
+            "total": len(payments),
+        }
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+    state: StubState
+
+
+class StubServer:
+    """
+    Threaded HTTP server emulating the NOWPayments endpoints used by :class:`NOWPaymentsAPI`.
+
+    :param str api_key: API key the server accepts.
+    :param str email: Email accepted by ``auth``.
+    :param str password: Password accepted by ``auth``.
+    :param list currencies: Tickers returned by the currency endpoints.
+    :param faults: Latency, error and throttling options, see :class:`StubState`.
+    """
+
+    def __init__(
+        self,
+        api_key: str = "test",
+        email: str = "test@example.org",
+        password: str = "password",
+        currencies: Optional[List[str]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        **faults: Any,
+    ) -> None:
+        self.state = StubState(api_key, email, password, currencies, **faults)
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.state = self.state
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URI to use as ``api_uri`` of the client."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1/"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name="nowpayments-stub",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,193 @@
+"""
+Caching of the JWT tokens returned by the NOWPayments auth endpoint.
+"""
+
+import base64
+import json
+import threading
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+if TYPE_CHECKING:  # pragma: no cover
+    import asyncio
+
+
+def jwt_expiry(token: str) -> Optional[float]:
+    """
+    Read the ``exp`` claim (unix timestamp) of a JWT token without verifying it.
+
+    :param str token: JWT token
+    :return: Expiry timestamp or None when the token cannot be decoded.
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class _BaseTokenManager:
+    """
+    State and expiry bookkeeping shared by the sync and asyncio token managers.
+    """
+
+    def __init__(
+        self,
+        lifetime: float = 300.0,
+        refresh_margin: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.lifetime = lifetime
+        self.refresh_margin = refresh_margin
+        self._clock = clock
+
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+
+        self.refreshes = 0
+
+    @property
+    def expires_in(self) -> Optional[float]:
+        """Seconds until the cached token expires, or None if no token is cached."""
+        if self._token is None:
+            return None
+        return self._expires_at - self._clock()
+
+    def invalidate(self) -> None:
+        """Forget the cached token."""
+        self._token = None
+        self._expires_at = 0.0
+
+    def _remaining(self) -> float:
+        return self._expires_at - self._clock()
+
+    def _replacement_for(self, stale_token: Optional[str]) -> Optional[str]:
+        token = self._token
+        if token is not None and token != stale_token and self._remaining() > 0:
+            return token
+        return None
+
+    def _store(self, token: str, issued_at: float) -> str:
+        expires_at = issued_at + self.lifetime
+        exp = jwt_expiry(token)
+        if exp is not None:
+            expires_at = min(expires_at, issued_at + exp - time.time())
+        self._token = token
+        self._expires_at = expires_at
+        self.refreshes += 1
+        return token
+
+
+class TokenManager(_BaseTokenManager):
+    """
+    Keeps the bearer token returned by ``auth()`` until shortly before it expires.
+
+    The expiry is taken from the ``exp`` claim of the token, falling back to ``lifetime`` seconds after
+    it was issued when the token cannot be decoded. Once less than ``refresh_margin`` seconds are left,
+    one caller refreshes the token while the others keep using the current one. Expired tokens are
+    refreshed by a single caller while the others wait for it (single-flight).
+
+    :param fetch: Callable returning a new token.
+    :param float lifetime: Fallback token lifetime in seconds. NOWPayments tokens expire in 5 minutes.
+    :param float refresh_margin: Seconds before the expiry at which the token is refreshed.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], str],
+        lifetime: float = 300.0,
+        refresh_margin: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(lifetime, refresh_margin, clock)
+        self._fetch = fetch
+        self._lock = threading.Lock()
+
+    def token(self) -> str:
+        """
+        Return a valid bearer token, authenticating only when the cached one is missing or expiring.
+        """
+        token, remaining = self._token, self._remaining()
+        if token is not None and remaining > self.refresh_margin:
+            return token
+        if token is not None and remaining > 0:
+            # Refresh proactively, but don't make anyone wait while a token is still valid.
+            if not self._lock.acquire(blocking=False):
+                return token
+            try:
+                if self._token is token:
+                    self._load()
+            except Exception:  # pylint: disable=broad-except
+                # The current token is still valid, the next call tries again.
+                pass
+            finally:
+                self._lock.release()
+            return self._token or token
+        return self.refresh(stale_token=token)
+
+    def refresh(self, stale_token: Optional[str] = None) -> str:
+        """
+        Authenticate again and cache the new token.
+
+        :param str stale_token: Token the caller found invalid. If another caller already replaced it
+            while waiting for the lock, the replacement is returned without authenticating again.
+        """
+        with self._lock:
+            return self._replacement_for(stale_token) or self._load()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            super().invalidate()
+
+    def _load(self) -> str:
+        issued_at = self._clock()
+        return self._store(self._fetch(), issued_at)
+
+
+class AsyncTokenManager(_BaseTokenManager):
+    """
+    asyncio version of :class:`TokenManager`. ``fetch`` is a coroutine function.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[str]],
+        lifetime: float = 300.0,
+        refresh_margin: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(lifetime, refresh_margin, clock)
+        self._fetch = fetch
+        self._lock: Optional["asyncio.Lock"] = None
+
+    async def token(self) -> str:
+        """
+        Return a valid bearer token, authenticating only when the cached one is missing or expiring.
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        token, remaining = self._token, self._remaining()
+        if token is not None and remaining > self.refresh_margin:
+            return token
+        if token is not None and remaining > 0 and self._lock.locked():
+            return token
+        return await self.refresh(stale_token=token)
+
+    async def refresh(self, stale_token: Optional[str] = None) -> str:
+        """
+        Authenticate again and cache the new token. Concurrent callers share one request.
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            replacement = self._replacement_for(stale_token)
+            if replacement is not None:
+                return replacement
+            issued_at = self._clock()
+            return self._store(await self._fetch(), issued_at)
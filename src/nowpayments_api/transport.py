@@ -0,0 +1,256 @@
+"""
+HTTP backends of :class:`NOWPaymentsAPI`.
+
+Every backend returns ``requests.Response`` objects and raises ``requests.ConnectionError`` and
+``requests.Timeout``, so the retry policy, hooks, circuit breaker and error handling of the client
+work the same whichever backend sends the requests.
+
+    transport = HTTPXTransport(http2=True)
+    api = NOWPaymentsAPI(api_key, transport=transport)
+"""
+
+import abc
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional, Tuple, Union
+
+from .exceptions import NowPaymentsException
+
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
+    import requests
+    from requests.adapters import HTTPAdapter
+
+Timeout = Union[float, Tuple[float, float], None]
+
+
+def _new_session(
+    adapter: Optional["HTTPAdapter"], pool_options: Dict[str, Any]
+) -> "requests.Session":
+    # requests and urllib3 account for most of the import time of the package, so they are only
+    # imported once a request is made.
+    import requests  # pylint: disable=import-outside-toplevel
+    from requests.adapters import (  # pylint: disable=import-outside-toplevel
+        HTTPAdapter,
+    )
+
+    session = requests.Session()
+    adapter = adapter or HTTPAdapter(**pool_options)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class Transport(abc.ABC):
+    """
+    Interface of the HTTP backends. Share one instance between clients to share its connections.
+    """
+
+    @abc.abstractmethod
+    def request(  # pylint: disable=too-many-arguments
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str] = None,
+        data: Any = None,
+        timeout: Timeout = None,
+        stream: bool = False,
+    ) -> "requests.Response":
+        """
+        Send one request.
+
+        :param timeout: Seconds to wait, either one value or a (connect, read) tuple.
+        :param bool stream: Do not read the body, the caller reads it and closes the response.
+        :raises requests.ConnectionError: If the request could not be sent or the response not read.
+        :raises requests.Timeout: If the server did not answer in time.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Close the connections."""
+
+    def __enter__(self) -> "Transport":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class RequestsTransport(Transport):
+    """
+    HTTP/1.1 backend on a ``requests.Session``, with one connection per concurrent request.
+
+    :param requests.Session session: Pre-built session. Otherwise one is created with ``adapter``, or
+        with a new adapter configured by the pool options.
+    :param HTTPAdapter adapter: Transport adapter to mount on the created session.
+    :param int pool_connections: Number of host connection pools to cache.
+    :param int pool_maxsize: Maximum number of connections kept per host.
+    :param bool pool_block: Wait for a free connection instead of opening one beyond pool_maxsize.
+    """
+
+    def __init__(
+        self,
+        session: "requests.Session" = None,
+        adapter: "HTTPAdapter" = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+    ) -> None:
+        self.session = session or _new_session(
+            adapter,
+            {
+                "pool_connections": pool_connections,
+                "pool_maxsize": pool_maxsize,
+                "pool_block": pool_block,
+            },
+        )
+
+    def request(  # pylint: disable=too-many-arguments
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str] = None,
+        data: Any = None,
+        timeout: Timeout = None,
+        stream: bool = False,
+    ) -> "requests.Response":
+        return self.session.request(
+            method, url, headers=headers, data=data, timeout=timeout, stream=stream
+        )
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def _requests_error(httpx: Any, error: Exception) -> Exception:
+    """The requests exception matching an httpx transport error."""
+    import requests  # pylint: disable=import-outside-toplevel
+
+    if isinstance(error, httpx.TimeoutException):
+        return requests.Timeout(str(error))
+    return requests.ConnectionError(str(error))
+
+
+class _StreamedBody:
+    """File-like ``raw`` of a streamed response, reading the decoded body of an httpx response."""
+
+    def __init__(self, httpx: Any, response: "httpx.Response") -> None:
+        self._httpx = httpx
+        self._response = response
+
+    def stream(
+        self, amt: int = 65536, decode_content: bool = True
+    ) -> Iterator[bytes]:  # pylint: disable=unused-argument
+        try:
+            yield from self._response.iter_bytes(amt)
+        except self._httpx.TransportError as error:
+            raise _requests_error(self._httpx, error) from error
+
+    def close(self) -> None:
+        self._response.close()
+
+
+class HTTPXTransport(Transport):
+    """
+    Backend on an ``httpx.Client``. With ``http2``, concurrent requests to the API are multiplexed over
+    a single TLS connection instead of needing one connection each, which suits many threads calling
+    e.g. ``payment_status`` or ``estimate_price`` at once.
+
+    Requires httpx, and the h2 package for HTTP/2: ``pip install nowpayments-api[http2]``. HTTP/2 is
+    negotiated with TLS, plain ``http://`` URLs such as the test stub's are served over HTTP/1.1.
+
+    :param bool http2: Enable HTTP/2.
+    :param int max_connections: Maximum number of open connections.
+    :param int max_keepalive_connections: Maximum number of idle connections kept alive.
+    :param client: Pre-built ``httpx.Client`` to use instead of creating one.
+    """
+
+    def __init__(
+        self,
+        http2: bool = True,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        client: "httpx.Client" = None,
+    ) -> None:
+        try:
+            import httpx  # pylint: disable=import-outside-toplevel
+        except ImportError as error:
+            raise NowPaymentsException(
+                "HTTPXTransport requires httpx: pip install nowpayments-api[http2]"
+            ) from error
+        if client is None:
+            try:
+                client = httpx.Client(
+                    http2=http2,
+                    limits=httpx.Limits(
+                        max_connections=max_connections,
+                        max_keepalive_connections=max_keepalive_connections,
+                    ),
+                )
+            except ImportError as error:
+                raise NowPaymentsException(
+                    "HTTP/2 requires the h2 package: pip install nowpayments-api[http2]"
+                ) from error
+        self._httpx = httpx
+        self.client = client
+
+    def _timeout(self, timeout: Timeout) -> "httpx.Timeout":
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return self._httpx.Timeout(read, connect=connect)
+        return self._httpx.Timeout(timeout)
+
+    def request(  # pylint: disable=too-many-arguments
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str] = None,
+        data: Any = None,
+        timeout: Timeout = None,
+        stream: bool = False,
+    ) -> "requests.Response":
+        httpx = self._httpx
+        raw = isinstance(data, (str, bytes))
+        request = self.client.build_request(
+            method,
+            url,
+            headers=headers,
+            data=None if raw else data,
+            content=data if raw else None,
+            timeout=self._timeout(timeout),
+        )
+        try:
+            response = self.client.send(request, stream=stream)
+        except httpx.TransportError as error:
+            raise _requests_error(httpx, error) from error
+        return self._convert(request, response, stream)
+
+    def _convert(
+        self, request: "httpx.Request", response: "httpx.Response", stream: bool
+    ) -> "requests.Response":
+        import requests  # pylint: disable=import-outside-toplevel
+        from requests.structures import (  # pylint: disable=import-outside-toplevel
+            CaseInsensitiveDict,
+        )
+
+        prepared = requests.PreparedRequest()
+        prepared.method = request.method
+        prepared.url = str(request.url)
+        prepared.headers = CaseInsensitiveDict(request.headers)
+        prepared.body = request.content or None
+
+        result = requests.Response()
+        result.request = prepared
+        result.url = str(response.url)
+        result.status_code = response.status_code
+        result.reason = response.reason_phrase
+        result.headers = CaseInsensitiveDict(response.headers)
+        result.encoding = response.charset_encoding
+        if stream:
+            result.raw = _StreamedBody(self._httpx, response)
+        else:
+            # pylint: disable=protected-access
+            result._content = response.content
+            result._content_consumed = True
+        return result
+
+    def close(self) -> None:
+        self.client.close()
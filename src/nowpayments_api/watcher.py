@@ -0,0 +1,345 @@
+"""
+Polling of open payments for status changes.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+from .models.payment import ACTIVE_STATUSES, TERMINAL_STATUSES, _datetime
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StatusChange:
+    """
+    A payment whose status differs from the previous poll. ``payment`` is the payment_status response.
+    """
+
+    payment_id: int
+    previous_status: Optional[str]
+    status: str
+    payment: Dict[str, Any]
+
+    @property
+    def terminal(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+
+class _Watch:
+    __slots__ = (
+        "payment_id",
+        "status",
+        "interval",
+        "expires_at",
+        "generation",
+        "errors",
+    )
+
+    def __init__(
+        self,
+        payment_id: int,
+        status: Optional[str],
+        interval: float,
+        expires_at: Optional[float],
+        generation: int,
+    ) -> None:
+        self.payment_id = payment_id
+        self.status = status
+        self.interval = interval
+        self.expires_at = expires_at
+        self.generation = generation
+        self.errors = 0
+
+
+def _expiration(payment: Dict[str, Any]) -> Optional[float]:
+    value = payment.get("expiration_estimate_date")
+    if not value:
+        return None
+    try:
+        return _datetime(value).timestamp()
+    except ValueError:
+        return None
+
+
+def _notify(callback: Optional[Callable[..., None]], *args: Any) -> None:
+    if callback is None:
+        return
+    try:
+        callback(*args)
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("NOWPayments watcher callback failed")
+
+
+class PaymentWatcher:  # pylint: disable=too-many-instance-attributes
+    """
+    Tracks open payments and polls ``payment_status`` for each one on an adaptive schedule.
+
+    A payment is polled every ``min_interval`` seconds while it is fresh or in an active state
+    (confirming, sending...). Each poll without a change multiplies its interval by ``backoff`` up to
+    ``max_interval``; a change resets it. A poll is always scheduled at the payment's
+    ``expiration_estimate_date`` so that the expiry is noticed. Payments reaching a terminal state
+    (finished, failed, refunded, expired) are dropped after their change is reported.
+
+    Polls are ordered by a priority queue and run by a pool of ``max_workers`` threads. Changes are
+    passed to ``on_change`` and to the :meth:`changes` streams.
+
+        watcher = PaymentWatcher(api, on_change=print)
+        watcher.watch(api.create_payment(100, "usd", "btc"))
+        watcher.start()
+
+    :param api: Client whose ``payment_status`` is polled.
+    :param on_change: Called with a :class:`StatusChange` from a worker thread.
+    :param on_error: Called with the payment ID and the exception of a failed poll.
+    :param float min_interval: Seconds between polls of fresh and active payments.
+    :param float max_interval: Upper bound of the interval of idle payments.
+    :param float backoff: Factor applied to the interval after a poll without change.
+    :param int max_workers: Maximum number of polls in flight.
+    """
+
+    def __init__(
+        self,
+        api: Any,
+        on_change: Callable[[StatusChange], None] = None,
+        on_error: Callable[[int, Exception], None] = None,
+        min_interval: float = 5.0,
+        max_interval: float = 300.0,
+        backoff: float = 1.5,
+        max_workers: int = 10,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if min_interval <= 0 or max_interval < min_interval or backoff < 1:
+            raise ValueError("Invalid polling intervals")
+        self.api = api
+        self.on_change = on_change
+        self.on_error = on_error
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_workers = max_workers
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._queue: List[Tuple[float, int, int, int]] = []
+        self._watched: Dict[int, _Watch] = {}
+        self._sequence = itertools.count()
+        self._listeners: List[Callable[[Optional[StatusChange]], None]] = []
+        self._running = False
+        self._scheduler: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    def __len__(self) -> int:
+        return len(self._watched)
+
+    def __contains__(self, payment_id: int) -> bool:
+        return payment_id in self._watched
+
+    @property
+    def watched(self) -> Dict[int, Optional[str]]:
+        """Last known status of every watched payment."""
+        with self._condition:
+            return {
+                payment_id: watch.status for payment_id, watch in self._watched.items()
+            }
+
+    def watch(
+        self, payment: Union[int, Dict[str, Any]], status: Optional[str] = None
+    ) -> None:
+        """
+        Start watching a payment, given by its ID or by a create_payment/payment_status response.
+        The first poll is due after ``min_interval`` seconds.
+        """
+        expires_at = None
+        if isinstance(payment, dict):
+            status = status or payment.get("payment_status")
+            expires_at = _expiration(payment)
+            payment = payment["payment_id"]
+        payment_id = int(payment)
+        if status in TERMINAL_STATUSES:
+            return
+        with self._condition:
+            # A new generation invalidates the queue entries of a previous watch of the payment.
+            watch = _Watch(
+                payment_id,
+                status,
+                self.min_interval,
+                expires_at,
+                next(self._sequence),
+            )
+            self._watched[payment_id] = watch
+            self._schedule(watch, self._clock() + self.min_interval)
+
+    def unwatch(self, payment_id: int) -> None:
+        """Stop watching a payment."""
+        with self._condition:
+            self._watched.pop(int(payment_id), None)
+
+    def _schedule(self, watch: _Watch, due: float) -> None:
+        if watch.expires_at is not None and self._clock() < watch.expires_at:
+            due = min(due, watch.expires_at)
+        heapq.heappush(
+            self._queue,
+            (due, next(self._sequence), watch.payment_id, watch.generation),
+        )
+        self._condition.notify()
+
+    def _pop_due(self, limit: Optional[int] = None) -> List[_Watch]:
+        """Remove the watches whose poll is due from the queue. Call with the condition held."""
+        due, now = [], self._clock()
+        while self._queue and self._queue[0][0] <= now:
+            _, _, payment_id, generation = heapq.heappop(self._queue)
+            watch = self._watched.get(payment_id)
+            if watch is None or watch.generation != generation:
+                continue
+            due.append(watch)
+            if limit is not None and len(due) >= limit:
+                break
+        return due
+
+    def poll_due(self) -> List[StatusChange]:
+        """Poll the payments that are due in the calling thread, for use without :meth:`start`."""
+        with self._condition:
+            due = self._pop_due()
+        changes = [self._poll(watch) for watch in due]
+        return [change for change in changes if change is not None]
+
+    def _poll(self, watch: _Watch) -> Optional[StatusChange]:
+        try:
+            payment = self.api.payment_status(watch.payment_id)
+        except Exception as error:  # pylint: disable=broad-except
+            with self._condition:
+                watch.errors += 1
+                if self._watched.get(watch.payment_id) is watch:
+                    watch.interval = min(
+                        self.max_interval, watch.interval * self.backoff
+                    )
+                    self._schedule(watch, self._clock() + watch.interval)
+            _notify(self.on_error, watch.payment_id, error)
+            return None
+
+        status = payment.get("payment_status")
+        change = None
+        with self._condition:
+            if self._watched.get(watch.payment_id) is not watch:
+                return None
+            watch.errors = 0
+            watch.expires_at = _expiration(payment) or watch.expires_at
+            if status != watch.status:
+                change = StatusChange(watch.payment_id, watch.status, status, payment)
+                watch.status = status
+            if status in TERMINAL_STATUSES:
+                del self._watched[watch.payment_id]
+            else:
+                if change is not None or status in ACTIVE_STATUSES:
+                    watch.interval = self.min_interval
+                else:
+                    watch.interval = min(
+                        self.max_interval, watch.interval * self.backoff
+                    )
+                self._schedule(watch, self._clock() + watch.interval)
+            listeners = list(self._listeners)
+        if change is not None:
+            # The watch is already rescheduled, a failing callback cannot stop the polling.
+            _notify(self.on_change, change)
+            for listener in listeners:
+                _notify(listener, change)
+        return change
+
+    def start(self) -> "PaymentWatcher":
+        """Poll in background threads until :meth:`stop`."""
+        with self._condition:
+            if self._running:
+                return self
+            self._running = True
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="nowpayments-watcher"
+        )
+        self._scheduler = threading.Thread(
+            target=self._run, name="nowpayments-watcher", daemon=True
+        )
+        self._scheduler.start()
+        return self
+
+    def stop(self, wait: bool = True) -> None:
+        """Stop polling. Payments stay watched and are polled again after a new :meth:`start`."""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify_all()
+            listeners = list(self._listeners)
+        if self._scheduler is not None and wait:
+            self._scheduler.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+        for listener in listeners:
+            _notify(listener, None)
+
+    def __enter__(self) -> "PaymentWatcher":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._running:
+                    if self._queue and self._queue[0][0] <= self._clock():
+                        break
+                    timeout = self._queue[0][0] - self._clock() if self._queue else None
+                    self._condition.wait(timeout)
+                if not self._running:
+                    return
+                due = self._pop_due(limit=1)
+            for watch in due:
+                # Wait for a free worker so that polls are not queued behind a backlog.
+                self._slots.acquire()
+                try:
+                    self._executor.submit(self._run_poll, watch)
+                except RuntimeError:
+                    # Stopped meanwhile, keep the payment due for the next start.
+                    self._slots.release()
+                    with self._condition:
+                        self._schedule(watch, self._clock())
+                    return
+
+    def _run_poll(self, watch: _Watch) -> None:
+        try:
+            self._poll(watch)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("NOWPayments watcher poll of %s failed", watch.payment_id)
+        finally:
+            self._slots.release()
+
+    async def changes(self) -> AsyncIterator[StatusChange]:
+        """
+        Async stream of the status changes, until the watcher is stopped.
+
+            async for change in watcher.changes():
+                ...
+        """
+        loop = asyncio.get_running_loop()
+        queue: "asyncio.Queue[Optional[StatusChange]]" = asyncio.Queue()
+
+        def listener(change: Optional[StatusChange]) -> None:
+            loop.call_soon_threadsafe(queue.put_nowait, change)
+
+        with self._condition:
+            self._listeners.append(listener)
+        try:
+            while True:
+                change = await queue.get()
+                if change is None:
+                    return
+                yield change
+        finally:
+            with self._condition:
+                self._listeners.remove(listener)
@@ -0,0 +1,39 @@
+"""Fixtures shared by the test modules"""
+
+from typing import Any, Iterator
+
+import pytest
+
+from nowpayments_api import NOWPaymentsAPI
+from nowpayments_api.testing import StubServer
+
+
+class FakeClock:
+    """Clock moved forward by the tests, or by ``sleep``."""
+
+    def __init__(self, now: Any = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> Any:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def stub_server() -> Iterator[StubServer]:
+    with StubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def now_payments(stub_server: StubServer) -> NOWPaymentsAPI:
+    api = NOWPaymentsAPI("test", "test@example.org", "password")
+    api.api_uri = stub_server.url
+    return api
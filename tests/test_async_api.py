@@ -0,0 +1,84 @@
+"""Testing Module"""
+
+import asyncio
+
+import pytest
+from requests import HTTPError
+
+from nowpayments_api import AsyncNOWPaymentsAPI, NowPaymentsException
+from nowpayments_api.testing import StubServer
+
+pytest.importorskip("httpx")
+
+
+def run(stub_server: StubServer, scenario) -> object:
+    async def main() -> object:
+        async with AsyncNOWPaymentsAPI(
+            api_key="test", email="test@example.org", password="password"
+        ) as api:
+            api.api_uri = stub_server.url
+            return await scenario(api)
+
+    return asyncio.run(main())
+
+
+def test_status(stub_server: StubServer) -> None:
+    async def scenario(api: AsyncNOWPaymentsAPI) -> dict:
+        return await api.status()
+
+    assert run(stub_server, scenario) == {"message": "OK"}
+
+
+def test_create_payment_and_status(stub_server: StubServer) -> None:
+    async def scenario(api: AsyncNOWPaymentsAPI) -> tuple:
+        payment = await api.create_payment(
+            100, "usd", "btc", order_id="Order_1", is_fixed_rate=True
+        )
+        status = await api.payment_status(int(payment["payment_id"]))
+        return payment, status
+
+    payment, status = run(stub_server, scenario)
+    assert payment["order_id"] == "Order_1"
+    assert status["payment_id"] == payment["payment_id"]
+    assert status["payment_status"] == "waiting"
+
+
+def test_create_payment_by_invoice(stub_server: StubServer) -> None:
+    async def scenario(api: AsyncNOWPaymentsAPI) -> tuple:
+        invoice = await api.create_invoice(100, "usd", "btc")
+        return invoice, await api.create_payment_by_invoice(int(invoice["id"]), "btc")
+
+    invoice, response = run(stub_server, scenario)
+    assert response["uri"] == (
+        f"https://nowpayments.io/payment/?iid={invoice['id']}"
+        f"&paymentId={response['payment_id']}"
+    )
+
+
+def test_concurrent_requests_share_currency_and_token_fetches(
+    stub_server: StubServer,
+) -> None:
+    async def scenario(api: AsyncNOWPaymentsAPI) -> list:
+        await asyncio.gather(*(api.estimate_price(10, "usd", "eth") for _ in range(5)))
+        return await asyncio.gather(*(api.list_of_payments() for _ in range(5)))
+
+    pages = run(stub_server, scenario)
+    assert all(page["data"] == [] for page in pages)
+    assert stub_server.state.requests.count(("GET", "currencies")) == 1
+    assert stub_server.state.requests.count(("POST", "auth")) == 1
+
+
+def test_validation_errors(stub_server: StubServer) -> None:
+    async def scenario(api: AsyncNOWPaymentsAPI) -> None:
+        with pytest.raises(NowPaymentsException, match="Unsupported cryptocurrency"):
+            await api.estimate_price(1, "usd", "btccc")
+        with pytest.raises(NowPaymentsException, match="Amount must be greater than 0"):
+            await api.create_invoice(0, "usd", "btc")
+        with pytest.raises(HTTPError, match="404 Client Error"):
+            await api.update_payment_estimate(123_456_789)
+        for create in (api.create_payment, api.create_invoice):
+            with pytest.raises(NowPaymentsException, match="idempotency_key"):
+                await create(100, "usd", "btc", idempotency_key="order-1")
+
+    run(stub_server, scenario)
+    assert ("POST", "payment") not in stub_server.state.requests
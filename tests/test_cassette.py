@@ -0,0 +1,80 @@
+"""Testing Module"""
+
+import pytest
+
+from nowpayments_api import NOWPaymentsAPI
+from nowpayments_api.cassette import (
+    PLACEHOLDER_TOKEN,
+    CassetteAdapter,
+    CassetteError,
+)
+from nowpayments_api.testing import StubServer
+
+SECRETS = ("s3cret-key", "merchant@example.org", "hunter2")
+
+
+def session(adapter: CassetteAdapter, url: str) -> NOWPaymentsAPI:
+    api = NOWPaymentsAPI(*SECRETS, adapter=adapter)
+    api.api_uri = url
+    return api
+
+
+def exercise(api: NOWPaymentsAPI) -> list:
+    payment = api.create_payment(100, "usd", "btc", order_id="A-1")
+    return [
+        api.status(),
+        api.estimate_price(100, "usd", "btc"),
+        payment,
+        api.payment_status(int(payment["payment_id"])),
+        api.list_of_payments(),
+        list(api.list_of_payments(stream=True)),
+    ]
+
+
+@pytest.mark.parametrize("name", ["cassette.jsonl", "cassette.jsonl.gz"])
+def test_record_then_replay_offline(tmp_path, name: str) -> None:
+    path = tmp_path / name
+    with StubServer(*SECRETS) as server:
+        url = server.url
+        recorded = exercise(session(CassetteAdapter(path, mode="once"), url))
+
+    if not name.endswith(".gz"):
+        text = path.read_text()
+        for secret in (*SECRETS, *server.state.tokens):
+            assert secret not in text
+        assert PLACEHOLDER_TOKEN in text
+
+    adapter = CassetteAdapter(path, mode="once")
+    assert adapter.mode == "replay"
+    replayed = exercise(session(adapter, url))
+    assert replayed == recorded
+    assert adapter.played == 8
+
+    with pytest.raises(CassetteError):
+        session(adapter, url).minimum_payment_amount("btc", "eth")
+
+
+def test_replayed_latency(tmp_path) -> None:
+    path = tmp_path / "cassette.jsonl"
+    with StubServer(*SECRETS, latency=0.05) as server:
+        url = server.url
+        session(CassetteAdapter(path, mode="record"), url).status()
+    (exchange,) = CassetteAdapter(path).exchanges()
+    assert exchange["duration"] >= 0.05
+
+    delays = []
+    replay = CassetteAdapter(path, latency=0.01, sleep=delays.append)
+    session(replay, url).status()
+    real_time = CassetteAdapter(path, real_time=True, sleep=delays.append)
+    session(real_time, url).status()
+    assert delays == [0.01, exchange["duration"]]
+
+
+def test_invalid_cassettes(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        CassetteAdapter(tmp_path / "cassette.jsonl", mode="rewind")
+    with pytest.raises(FileNotFoundError):
+        CassetteAdapter(tmp_path / "missing.jsonl")
+    (tmp_path / "other.jsonl").write_text('{"version": 99}\n')
+    with pytest.raises(CassetteError):
+        CassetteAdapter(tmp_path / "other.jsonl")
@@ -0,0 +1,194 @@
+"""Testing Module"""
+
+import asyncio
+
+import pytest
+import requests
+
+from nowpayments_api import (
+    NO_RETRY,
+    CircuitBreaker,
+    CircuitOpenError,
+    Hooks,
+    NOWPaymentsAPI,
+    QuoteCache,
+    RateLimit,
+    RateLimiter,
+    RateLimitExceeded,
+)
+from nowpayments_api.circuit import CLOSED, HALF_OPEN, OPEN
+from nowpayments_api.hooks import BEFORE_REQUEST
+from nowpayments_api.testing import StubServer
+
+from .conftest import FakeClock
+
+
+def test_opens_on_failure_rate_and_recovers() -> None:
+    clock = FakeClock()
+    changes = []
+    breaker = CircuitBreaker(
+        failure_rate=0.5,
+        window_size=4,
+        min_calls=4,
+        open_duration=10,
+        on_state_change=lambda *change: changes.append(change),
+        clock=clock,
+    )
+    for status in (200, 500, 200):
+        breaker.acquire("estimate")
+        breaker.record("estimate", status=status)
+    assert breaker.state("estimate") == CLOSED
+    breaker.acquire("estimate")
+    breaker.record("estimate", error=requests.ConnectionError())
+    assert breaker.state("estimate") == OPEN
+    assert breaker.state("payment/{id}") == CLOSED
+
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.acquire("estimate")
+    assert raised.value.endpoint == "estimate"
+    assert raised.value.retry_after == 10
+
+    clock.now += 10
+    assert breaker.state("estimate") == HALF_OPEN
+    breaker.acquire("estimate")
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire("estimate")
+    breaker.record("estimate", status=503)
+    assert breaker.state("estimate") == OPEN
+
+    clock.now += 10
+    breaker.acquire("estimate")
+    breaker.record("estimate", status=200)
+    assert breaker.state("estimate") == CLOSED
+    assert changes == [
+        ("estimate", CLOSED, OPEN),
+        ("estimate", OPEN, HALF_OPEN),
+        ("estimate", HALF_OPEN, OPEN),
+        ("estimate", OPEN, HALF_OPEN),
+        ("estimate", HALF_OPEN, CLOSED),
+    ]
+    stats = breaker.stats()["estimate"]
+    assert (stats.state, stats.calls, stats.rejected) == (CLOSED, 0, 2)
+
+
+def test_slow_calls_count_as_failures() -> None:
+    breaker = CircuitBreaker(
+        failure_rate=1.0, window_size=2, min_calls=2, slow_call_duration=1.0
+    )
+    breaker.record("status", status=200, duration=0.5)
+    breaker.record("status", status=200, duration=1.5)
+    assert breaker.state("status") == CLOSED
+    assert breaker.stats()["status"].failure_rate == 0.5
+    breaker.record("status", status=200, duration=2.0)
+    assert breaker.state("status") == OPEN
+    breaker.reset("status")
+    assert breaker.state("status") == CLOSED
+
+
+def test_lost_probe_is_given_up() -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker(window_size=1, min_calls=1, open_duration=10, clock=clock)
+    breaker.record("estimate", status=500)
+    clock.now += 10
+    breaker.acquire("estimate")
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire("estimate")
+    clock.now += 10
+    breaker.acquire("estimate")
+
+
+def test_client_fails_fast_and_serves_stale_quotes(stub_server: StubServer) -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        failure_rate=1.0, window_size=2, min_calls=2, open_duration=30, clock=clock
+    )
+    cache = QuoteCache(ttl=5, max_stale=20, clock=clock)
+    api = NOWPaymentsAPI(
+        "test", retry_policy=NO_RETRY, circuit_breaker=breaker, quote_cache=cache
+    )
+    api.api_uri = stub_server.url
+    quote = api.estimate_price(100, "usd", "btc")
+
+    stub_server.state.fail_next(500, count=2, path="estimate")
+    clock.now += 5
+    for amount in (200, 300):
+        with pytest.raises(requests.HTTPError):
+            api.estimate_price(amount, "usd", "btc")
+    requests_made = len(stub_server.state.requests)
+    with pytest.raises(CircuitOpenError):
+        api.estimate_price(400, "usd", "btc")
+    assert api.estimate_price(100, "usd", "btc") == quote
+    assert len(stub_server.state.requests) == requests_made
+    assert cache.stats()["stale"] == 1
+    assert api.status() == {"message": "OK"}
+
+    # Too old to be served, while the circuit is still open.
+    clock.now += 20
+    with pytest.raises(CircuitOpenError):
+        api.estimate_price(100, "usd", "btc")
+
+
+def test_async_client() -> None:
+    httpx = pytest.importorskip("httpx")
+    from nowpayments_api import AsyncNOWPaymentsAPI
+
+    breaker = CircuitBreaker(window_size=1, min_calls=1)
+
+    def handler(request):
+        return httpx.Response(502, json={"message": "Bad gateway"})
+
+    async def main() -> None:
+        async with AsyncNOWPaymentsAPI(
+            "test",
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            circuit_breaker=breaker,
+        ) as api:
+            with pytest.raises(Exception):
+                await api.status()
+            with pytest.raises(CircuitOpenError):
+                await api.status()
+
+    asyncio.run(main())
+    assert breaker.state("status") == OPEN
+
+
+def test_throttled_or_interrupted_calls_keep_the_probe(stub_server: StubServer) -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        failure_rate=1.0, window_size=2, min_calls=2, open_duration=30, clock=clock
+    )
+    limiter = RateLimiter({"read": RateLimit(1, 1)}, mode="fail", clock=clock)
+    hooks = Hooks()
+    api = NOWPaymentsAPI(
+        "test",
+        retry_policy=NO_RETRY,
+        circuit_breaker=breaker,
+        rate_limiter=limiter,
+        hooks=hooks,
+    )
+    api.api_uri = stub_server.url
+    stub_server.state.fail_next(500, count=2, path="status")
+    for _ in range(2):
+        clock.now += 1
+        with pytest.raises(requests.HTTPError):
+            api.status()
+    assert breaker.state("status") == OPEN
+
+    clock.now += 30
+    limiter.acquire("GET", "status")
+    with pytest.raises(RateLimitExceeded):
+        api.status()
+    assert breaker.state("status") == HALF_OPEN
+
+    def interrupt(event) -> None:
+        raise KeyboardInterrupt
+
+    hooks.register(BEFORE_REQUEST, interrupt)
+    clock.now += 1
+    with pytest.raises(KeyboardInterrupt):
+        api.status()
+    hooks.unregister(BEFORE_REQUEST, interrupt)
+
+    clock.now += 1
+    assert api.status() == {"message": "OK"}
+    assert breaker.state("status") == CLOSED
@@ -0,0 +1,123 @@
+"""Testing Module"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from requests import HTTPError
+
+from nowpayments_api import AsyncNOWPaymentsAPI, NOWPaymentsAPI, NowPaymentsException
+from nowpayments_api.concurrency import iter_concurrently, run_concurrently
+from nowpayments_api.models.payment import InvoiceData
+from nowpayments_api.testing import StubServer
+
+
+def create_payments(server: StubServer, count: int) -> list:
+    return [
+        int(
+            server.state.create_payment(
+                {"price_amount": 10, "price_currency": "usd", "pay_currency": "btc"}
+            )["payment_id"]
+        )
+        for _ in range(count)
+    ]
+
+
+def test_iter_concurrently_bounds_parallelism() -> None:
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work(item: int) -> int:
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+        return item * 2
+
+    results = list(iter_concurrently(work, range(20), max_workers=4))
+    assert sorted(result.value for result in results) == list(range(0, 40, 2))
+    assert peak[0] <= 4
+
+
+def test_run_concurrently_keeps_input_order_and_errors() -> None:
+    def work(item: int) -> int:
+        if item == 3:
+            raise ValueError("three")
+        time.sleep(0.001 * (10 - item))
+        return item
+
+    results = run_concurrently(work, range(10), max_workers=5)
+    assert [result.key for result in results] == list(range(10))
+    assert not results[3].ok
+    assert isinstance(results[3].error, ValueError)
+    assert results[9].value == 9
+
+
+def test_payment_statuses_collects_errors(stub_server: StubServer) -> None:
+    payment_ids = create_payments(stub_server, 20)
+    api = NOWPaymentsAPI(api_key="test")
+    api.api_uri = stub_server.url
+    results = api.payment_statuses(payment_ids + [0, 123], max_workers=8)
+    assert len(results) == 22
+    assert all(results[payment_id].ok for payment_id in payment_ids)
+    assert results[payment_ids[0]].value["payment_status"] == "waiting"
+    assert isinstance(results[0].error, NowPaymentsException)
+    assert isinstance(results[123].error, HTTPError)
+
+
+def test_async_payment_statuses(stub_server: StubServer) -> None:
+    pytest.importorskip("httpx")
+    payment_ids = create_payments(stub_server, 10)
+
+    async def main() -> dict:
+        async with AsyncNOWPaymentsAPI(api_key="test") as api:
+            api.api_uri = stub_server.url
+            return await api.payment_statuses(payment_ids, max_workers=4)
+
+    results = asyncio.run(main())
+    assert all(result.ok for result in results.values())
+    assert set(results) == set(payment_ids)
+
+
+INVOICES = [
+    {"price_amount": 10, "price_currency": "usd", "pay_currency": "btc"},
+    {"price_amount": 10, "price_currency": "usd", "pay_currency": "nope"},
+    InvoiceData(20, "eur", "eth", order_id="order-2"),
+    {"price_amount": 0, "price_currency": "usd", "pay_currency": "btc"},
+    {"price_amount": 10, "currency": "usd"},
+] + [
+    InvoiceData(index + 1, "usd", "ltc", order_id=f"bulk-{index}")
+    for index in range(20)
+]
+
+
+def check_invoice_results(server: StubServer, results: list) -> None:
+    assert [result.index for result in results] == list(range(len(INVOICES)))
+    assert [result.ok for result in results[:5]] == [True, False, True, False, False]
+    assert all(result.ok for result in results[5:])
+    assert results[2].value["order_id"] == "order-2"
+    assert isinstance(results[1].error, NowPaymentsException)
+    assert isinstance(results[4].error, TypeError)
+    assert results[24].key.order_id == "bulk-19"
+    assert len(server.state.invoices) == 22
+    assert server.state.requests.count(("GET", "currencies")) == 1
+
+
+def test_create_invoices(stub_server: StubServer) -> None:
+    api = NOWPaymentsAPI(api_key="test")
+    api.api_uri = stub_server.url
+    check_invoice_results(stub_server, api.create_invoices(INVOICES, max_workers=4))
+
+
+def test_async_create_invoices(stub_server: StubServer) -> None:
+    pytest.importorskip("httpx")
+
+    async def main() -> list:
+        async with AsyncNOWPaymentsAPI(api_key="test") as api:
+            api.api_uri = stub_server.url
+            return await api.create_invoices(INVOICES, max_workers=4)
+
+    check_invoice_results(stub_server, asyncio.run(main()))
@@ -0,0 +1,64 @@
+"""Testing Module"""
+
+import asyncio
+
+import pytest
+
+from nowpayments_api import ConversionEngine, NOWPaymentsAPI, NowPaymentsException
+from nowpayments_api.testing import RATES, StubServer
+
+from .conftest import FakeClock
+
+CRYPTOS = ["btc", "eth", "ltc", "xmr"]
+
+
+def test_refresh_and_convert(
+    now_payments: NOWPaymentsAPI, stub_server: StubServer
+) -> None:
+    engine = ConversionEngine(now_payments, ["usd", "eur"], CRYPTOS, max_workers=4)
+    with pytest.raises(NowPaymentsException):
+        engine.convert(100, "usd", "btc")
+    assert engine.refresh() == {}
+    assert stub_server.state.requests.count(("GET", "estimate")) == 8
+    assert engine.convert(600, "usd", "btc") == pytest.approx(0.01, rel=1e-4)
+    assert engine.convert(100, "eur", "eth") == pytest.approx(
+        100 * RATES["eur"] / RATES["eth"]
+    )
+    assert list(engine.convert_many([60, 600, 6000], "usd", "btc")) == pytest.approx(
+        [0.001, 0.01, 0.1], rel=1e-4
+    )
+    with pytest.raises(NowPaymentsException):
+        engine.convert(100, "gbp", "btc")
+
+
+def test_failed_pairs_keep_previous_rate(now_payments: NOWPaymentsAPI) -> None:
+    clock = FakeClock()
+    engine = ConversionEngine(now_payments, ["usd"], ["btc", "doge"], clock=clock)
+    assert engine.stale_pairs(60) == [("usd", "btc"), ("usd", "doge")]
+    engine.refresh()
+    assert engine.age("usd", "btc") == 0
+    assert engine.stale_pairs(60) == []
+
+    clock.now += 120
+    rate = engine.rate("usd", "doge")
+    now_payments.currency_catalog._store(["btc"])
+    errors = engine.refresh()
+    assert list(errors) == [("usd", "doge")]
+    assert isinstance(errors[("usd", "doge")], NowPaymentsException)
+    assert engine.rate("usd", "doge") == rate
+    assert engine.age("usd", "doge") == 120
+    assert engine.stale_pairs(60) == [("usd", "doge")]
+
+
+def test_arefresh(stub_server: StubServer) -> None:
+    pytest.importorskip("httpx")
+    from nowpayments_api import AsyncNOWPaymentsAPI
+
+    async def main() -> ConversionEngine:
+        async with AsyncNOWPaymentsAPI("test") as api:
+            api.api_uri = stub_server.url
+            engine = ConversionEngine(api, ["usd"], CRYPTOS)
+            assert await engine.arefresh() == {}
+            return engine
+
+    assert asyncio.run(main()).convert(160, "usd", "xmr") == pytest.approx(1, rel=1e-4)
@@ -0,0 +1,82 @@
+"""Testing Module"""
+
+import pytest
+
+from nowpayments_api import CurrencyCatalog, NOWPaymentsAPI, NowPaymentsException
+
+from .conftest import FakeClock
+
+
+@pytest.fixture
+def fetch_calls() -> list:
+    return []
+
+
+@pytest.fixture
+def catalog(clock: FakeClock, fetch_calls: list) -> CurrencyCatalog:
+    def fetch() -> list:
+        fetch_calls.append(clock.now)
+        return ["btc", "eth", "ltc"]
+
+    return CurrencyCatalog(fetch, ttl=60, stale_ttl=30, clock=clock)
+
+
+def test_catalog_caches_until_ttl(
+    catalog: CurrencyCatalog, clock: FakeClock, fetch_calls: list
+) -> None:
+    assert "btc" in catalog
+    assert "doge" not in catalog
+    clock.now += 59
+    assert "eth" in catalog
+    assert len(fetch_calls) == 1
+    assert catalog.stats()["hits"] == 2
+    assert catalog.stats()["misses"] == 1
+
+
+def test_catalog_refetches_after_stale_window(
+    catalog: CurrencyCatalog, clock: FakeClock, fetch_calls: list
+) -> None:
+    assert "btc" in catalog
+    clock.now += 120
+    assert "btc" in catalog
+    assert len(fetch_calls) == 2
+
+
+def test_catalog_serves_stale_while_revalidating(
+    catalog: CurrencyCatalog, clock: FakeClock, fetch_calls: list
+) -> None:
+    assert "btc" in catalog
+    clock.now += 70
+    assert "btc" in catalog
+    assert catalog.stats()["stale_hits"] == 1
+    assert catalog.stats()["misses"] == 1
+
+
+def test_catalog_invalidate(
+    catalog: CurrencyCatalog, clock: FakeClock, fetch_calls: list
+) -> None:
+    assert catalog.currencies == frozenset({"btc", "eth", "ltc"})
+    catalog.invalidate()
+    assert catalog.age is None
+    clock.now += 1
+    assert "btc" in catalog
+    assert len(fetch_calls) == 2
+
+
+def test_validation_uses_cached_catalog() -> None:
+    api = NOWPaymentsAPI(api_key="test")
+    calls = []
+
+    def currencies(fixed_rate: bool = True) -> dict:
+        calls.append(fixed_rate)
+        return {"currencies": ["btc", "eth"]}
+
+    api.currencies = currencies
+    api._get_request = lambda endpoint, bearer=None: {"endpoint": endpoint}
+    for _ in range(3):
+        api.estimate_price(100, "usd", "btc")
+    with pytest.raises(NowPaymentsException, match="Unsupported cryptocurrency"):
+        api.estimate_price(100, "usd", "btccc")
+    assert len(calls) == 1
+    api.refresh_currencies()
+    assert len(calls) == 2
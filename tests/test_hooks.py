@@ -0,0 +1,114 @@
+"""Testing Module"""
+
+import asyncio
+
+import pytest
+
+from nowpayments_api import Hooks, MetricsCollector, NOWPaymentsAPI, RetryPolicy
+from nowpayments_api.hooks import AFTER_RESPONSE, BEFORE_REQUEST, endpoint_template
+from nowpayments_api.testing import StubServer
+
+
+def test_endpoint_template() -> None:
+    assert endpoint_template("payment/5077125051") == "payment/{id}"
+    assert (
+        endpoint_template("payment/12/update-merchant-estimate")
+        == "payment/{id}/update-merchant-estimate"
+    )
+    assert endpoint_template("payment?limit=10&page=2") == "payment"
+    assert endpoint_template("estimate?amount=100") == "estimate"
+
+
+def test_events_of_retried_request(stub_server: StubServer) -> None:
+    events = []
+    hooks = Hooks()
+    hooks.register(BEFORE_REQUEST, events.append)
+    hooks.register(AFTER_RESPONSE, events.append)
+    api = NOWPaymentsAPI(
+        "test",
+        hooks=hooks,
+        retry_policy=RetryPolicy(sleep=lambda _: None),
+    )
+    api.api_uri = server_url = stub_server.url
+    payment = stub_server.state.create_payment(
+        {"price_amount": 10, "price_currency": "usd", "pay_currency": "btc"}
+    )
+    stub_server.state.fail_next(503)
+    api.payment_status(int(payment["payment_id"]))
+
+    assert server_url not in str(events)
+    assert [(event.endpoint, event.attempt, event.status) for event in events] == [
+        ("payment/{id}", 1, None),
+        ("payment/{id}", 1, 503),
+        ("payment/{id}", 2, None),
+        ("payment/{id}", 2, 200),
+    ]
+    assert events[-1].retries == 1
+    assert events[-1].duration > 0
+    assert events[-1].response_bytes > 0
+
+
+def test_failing_hook_does_not_break_request(stub_server: StubServer) -> None:
+    def fail(_) -> None:
+        raise RuntimeError("broken hook")
+
+    hooks = Hooks()
+    hooks.register(BEFORE_REQUEST, fail)
+    api = NOWPaymentsAPI("test", hooks=hooks)
+    api.api_uri = stub_server.url
+    assert api.status() == {"message": "OK"}
+
+
+def test_unknown_event() -> None:
+    with pytest.raises(ValueError):
+        Hooks().register("after_request", print)
+
+
+def test_metrics_collector(stub_server: StubServer) -> None:
+    hooks = Hooks()
+    metrics = MetricsCollector(buckets=(0.5, 0.1)).install(hooks)
+    api = NOWPaymentsAPI("test", hooks=hooks)
+    api.api_uri = stub_server.url
+    api.status()
+    api.status()
+    api.create_payment(100, "usd", "btc")
+
+    assert metrics.requests() == {
+        ("GET", "status", "200"): 2,
+        ("GET", "currencies", "200"): 1,
+        ("POST", "payment", "201"): 1,
+    }
+    text = metrics.to_prometheus()
+    assert "# TYPE nowpayments_request_duration_seconds histogram" in text
+    assert (
+        'nowpayments_request_duration_seconds_bucket{method="GET",endpoint="status",le="+Inf"} 2'
+        in text
+    )
+    assert (
+        'nowpayments_request_duration_seconds_bucket{method="GET",endpoint="status",le="0.1"}'
+        in text
+    )
+    assert (
+        'nowpayments_requests_total{method="POST",endpoint="payment",status="201"} 1'
+        in text
+    )
+    assert 'nowpayments_request_bytes_total{method="POST",endpoint="payment"}' in text
+
+    metrics.reset()
+    assert metrics.requests() == {}
+
+
+def test_async_hooks(stub_server: StubServer) -> None:
+    pytest.importorskip("httpx")
+    from nowpayments_api import AsyncNOWPaymentsAPI
+
+    hooks = Hooks()
+    metrics = MetricsCollector().install(hooks)
+
+    async def scenario() -> None:
+        async with AsyncNOWPaymentsAPI("test", hooks=hooks) as api:
+            api.api_uri = stub_server.url
+            await api.status()
+
+    asyncio.run(scenario())
+    assert metrics.requests() == {("GET", "status", "200"): 1}
@@ -0,0 +1,195 @@
+"""Testing Module"""
+
+import threading
+import time
+
+import pytest
+from requests import HTTPError, ReadTimeout, Response
+
+from nowpayments_api import (
+    NO_RETRY,
+    MemoryIdempotencyStore,
+    NOWPaymentsAPI,
+    OutcomeUnknown,
+    RequestInProgress,
+    SQLiteIdempotencyStore,
+)
+from nowpayments_api.idempotency import IdempotencyStore
+from nowpayments_api.testing import StubServer
+
+from .conftest import FakeClock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryIdempotencyStore(wait_timeout=2)
+    return SQLiteIdempotencyStore(tmp_path / "idempotency.db", wait_timeout=2)
+
+
+def test_run_stores_response(store) -> None:
+    calls = []
+
+    def create() -> dict:
+        calls.append(1)
+        return {"payment_id": "1"}
+
+    assert store.run("order-1", create) == {"payment_id": "1"}
+    assert store.run("order-1", create) == {"payment_id": "1"}
+    assert len(calls) == 1
+
+
+def test_error_response_releases_key(store) -> None:
+    def fail() -> dict:
+        response = Response()
+        response.status_code = 400
+        raise HTTPError("boom", response=response)
+
+    with pytest.raises(HTTPError):
+        store.run("order-1", fail)
+    assert store.run("order-1", lambda: {"payment_id": "2"}) == {"payment_id": "2"}
+
+    def gateway_error() -> dict:
+        response = Response()
+        response.status_code = 502
+        raise HTTPError("bad gateway", response=response)
+
+    with pytest.raises(HTTPError):
+        store.run("order-3", gateway_error)
+    with pytest.raises(OutcomeUnknown):
+        store.run("order-3", lambda: {"payment_id": "duplicate"})
+
+
+def test_unknown_outcome_keeps_key(store) -> None:
+    def timeout() -> dict:
+        raise ReadTimeout("no answer")
+
+    with pytest.raises(ReadTimeout):
+        store.run("order-1", timeout)
+    with pytest.raises(OutcomeUnknown):
+        store.run("order-1", lambda: {"payment_id": "duplicate"})
+    store.complete("order-1", {"payment_id": "1"})
+    assert store.run("order-1", timeout) == {"payment_id": "1"}
+
+    with pytest.raises(ReadTimeout):
+        store.run("order-2", timeout)
+    store.abort("order-2")
+    assert store.run("order-2", lambda: {"payment_id": "2"}) == {"payment_id": "2"}
+
+
+def test_duplicate_waits_for_call_in_flight(store) -> None:
+    started = threading.Event()
+    results = []
+
+    def slow() -> dict:
+        started.set()
+        time.sleep(0.2)
+        return {"payment_id": "3"}
+
+    first = threading.Thread(target=lambda: results.append(store.run("k", slow)))
+    first.start()
+    started.wait()
+    results.append(store.run("k", lambda: {"payment_id": "duplicate"}))
+    first.join()
+    assert results == [{"payment_id": "3"}, {"payment_id": "3"}]
+
+
+def test_wait_timeout() -> None:
+    store = MemoryIdempotencyStore(wait_timeout=0.05)
+    assert store.begin("k") is None
+    with pytest.raises(RequestInProgress):
+        store.begin("k")
+
+
+def test_memory_store_ttl_and_lru() -> None:
+    clock = FakeClock()
+    store = MemoryIdempotencyStore(maxsize=2, ttl=60, clock=clock)
+    for key in ("a", "b", "c"):
+        store.begin(key)
+        store.complete(key, {"key": key})
+    assert len(store) == 2
+    assert store.begin("a") is None
+    store.abort("a")
+    assert store.begin("c") == {"key": "c"}
+    clock.now += 61
+    assert store.begin("c") is None
+
+
+def test_sqlite_store_takes_over_abandoned_key(tmp_path) -> None:
+    clock = FakeClock()
+    path = tmp_path / "idempotency.db"
+    crashed = SQLiteIdempotencyStore(path, lease=10, clock=clock)
+    assert crashed.begin("k") is None
+    store = SQLiteIdempotencyStore(path, lease=10, wait_timeout=0, clock=clock)
+    with pytest.raises(RequestInProgress):
+        store.begin("k")
+    clock.now += 11
+    assert store.begin("k") is None
+    store.complete("k", {"payment_id": "4"})
+    assert crashed.begin("k") == {"payment_id": "4"}
+
+
+def test_create_payment_is_deduplicated_by_order_id(
+    store, stub_server: StubServer
+) -> None:
+    api = NOWPaymentsAPI("test", idempotency_store=store)
+    api.api_uri = stub_server.url
+    first = api.create_payment(100, "usd", "btc", order_id="order-1")
+    assert api.create_payment(100, "usd", "btc", order_id="order-1") == first
+    other = api.create_payment(100, "usd", "btc", order_id="order-2")
+    assert other["payment_id"] != first["payment_id"]
+    api.create_payment(100, "usd", "btc")
+    api.create_payment(100, "usd", "btc")
+    assert len(stub_server.state.payments) == 4
+
+    invoice = api.create_invoice(100, "usd", "btc", idempotency_key="invoice-1")
+    assert api.create_invoice(50, "usd", "btc", idempotency_key="invoice-1") == invoice
+    assert len(stub_server.state.invoices) == 1
+
+
+def test_rejected_creation_is_not_stored(stub_server: StubServer) -> None:
+    api = NOWPaymentsAPI("test", idempotency_store=MemoryIdempotencyStore())
+    api.api_uri = stub_server.url
+    stub_server.state.fail_next(400, path="payment")
+    with pytest.raises(HTTPError):
+        api.create_payment(100, "usd", "btc", order_id="order-1")
+    assert api.create_payment(100, "usd", "btc", order_id="order-1")["order_id"] == (
+        "order-1"
+    )
+
+
+def test_timed_out_creation_is_not_sent_again(store) -> None:
+    with StubServer() as server:
+        api = NOWPaymentsAPI(
+            "test", idempotency_store=store, retry_policy=NO_RETRY, timeout=0.1
+        )
+        api.api_uri = server.url
+        api.currency_catalog.get()
+        server.state.latency = 0.3
+        with pytest.raises(ReadTimeout):
+            api.create_payment(100, "usd", "btc", order_id="order-1")
+        with pytest.raises(OutcomeUnknown):
+            api.create_payment(100, "usd", "btc", order_id="order-1")
+        time.sleep(0.4)
+        assert len(server.state.payments) == 1
+
+
+def test_server_error_on_creation_is_not_sent_again(store) -> None:
+    with StubServer() as server:
+        api = NOWPaymentsAPI("test", idempotency_store=store, retry_policy=NO_RETRY)
+        api.api_uri = server.url
+        server.state.fail_next(502, path="payment")
+        with pytest.raises(HTTPError):
+            api.create_payment(100, "usd", "btc", idempotency_key="key-1")
+        with pytest.raises(OutcomeUnknown):
+            api.create_payment(100, "usd", "btc", idempotency_key="key-1")
+        assert server.state.requests.count(("POST", "payment")) == 1
+
+
+def test_stores_implement_the_whole_interface() -> None:
+    class PartialStore(IdempotencyStore):
+        def begin(self, key: str) -> None:
+            return None
+
+    with pytest.raises(TypeError):
+        PartialStore(60, 1)
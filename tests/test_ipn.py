@@ -0,0 +1,79 @@
+"""Testing Module"""
+
+import hashlib
+import hmac
+import json
+
+import pytest
+
+from nowpayments_api.ipn import (
+    InvalidSignature,
+    IPNVerifier,
+    PaymentEvent,
+    parse_callback,
+    verify_signature,
+)
+
+SECRET = "ipn-secret"
+PAYLOAD = {
+    "payment_id": 5077125051,
+    "payment_status": "finished",
+    "pay_address": "0xd1cDE08A07cD25adEbEd35c3867a59228C09B606",
+    "price_amount": 170,
+    "price_currency": "usd",
+    "pay_amount": 155.38559757,
+    "actually_paid": 155.38559757,
+    "pay_currency": "mana",
+    "order_id": "2",
+    "order_description": "Café x 1",
+    "outcome_amount": 1131.7812095,
+    "outcome_currency": "trx",
+    "fee": {"withdrawalFee": 0, "currency": "btc", "depositFee": 0.09},
+}
+
+
+def reference_signature(payload: dict) -> str:
+    """Signature computed like the NOWPayments documentation example."""
+
+    def sort(value):
+        if isinstance(value, dict):
+            return {key: sort(value[key]) for key in sorted(value)}
+        return value
+
+    message = json.dumps(sort(payload), separators=(",", ":"), ensure_ascii=False)
+    return hmac.new(SECRET.encode(), message.encode(), hashlib.sha512).hexdigest()
+
+
+def test_verify_signature_of_unsorted_body() -> None:
+    body = json.dumps(PAYLOAD, indent=2).encode()
+    signature = reference_signature(PAYLOAD)
+    assert verify_signature(body, signature, SECRET)
+    assert verify_signature(body, signature.upper(), SECRET)
+    assert IPNVerifier(SECRET).sign(PAYLOAD) == signature
+
+
+def test_reject_invalid_signatures() -> None:
+    verifier = IPNVerifier(SECRET)
+    body = json.dumps(PAYLOAD)
+    assert not verifier.verify(body, None)
+    assert not verifier.verify(body, "abc")
+    assert not verifier.verify(body, "0" * 128)
+    assert not verifier.verify("[1, 2]", reference_signature(PAYLOAD))
+    tampered = dict(PAYLOAD, price_amount=1)
+    assert not verifier.verify(json.dumps(tampered), reference_signature(PAYLOAD))
+
+
+def test_parse_callback() -> None:
+    event = parse_callback(
+        json.dumps(PAYLOAD).encode(),
+        {"X-Nowpayments-Sig": reference_signature(PAYLOAD)},
+        SECRET,
+    )
+    assert isinstance(event, PaymentEvent)
+    assert event.payment_id == 5077125051
+    assert event.payment_status == "finished"
+    assert event.raw["fee"]["currency"] == "btc"
+    with pytest.raises(InvalidSignature):
+        parse_callback(json.dumps(PAYLOAD), {}, SECRET)
+    with pytest.raises(InvalidSignature):
+        IPNVerifier(SECRET).parse("not json", reference_signature(PAYLOAD))
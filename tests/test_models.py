@@ -0,0 +1,116 @@
+"""Testing Module"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from nowpayments_api.models.payment import (
+    Base,
+    Currency,
+    Estimate,
+    Invoice,
+    InvoiceData,
+    InvoicePaymentData,
+    Payment,
+    PaymentData,
+    PaymentPage,
+)
+
+
+def test_clean_data_to_dict_drops_only_none() -> None:
+    payment = PaymentData(
+        price_amount=100,
+        price_currency="usd",
+        pay_currency="btc",
+        purchase_id=0,
+        is_fixed_rate=False,
+    )
+    assert payment.clean_data_to_dict() == {
+        "price_amount": 100,
+        "price_currency": "usd",
+        "pay_currency": "btc",
+        "purchase_id": 0,
+        "is_fixed_rate": False,
+    }
+    assert InvoicePaymentData(iid=1, pay_currency="btc").clean_data_to_dict() == {
+        "iid": 1,
+        "pay_currency": "btc",
+    }
+
+
+@pytest.mark.parametrize("model", [PaymentData, InvoiceData, InvoicePaymentData])
+def test_models_are_slotted(model: type) -> None:
+    instance = model(1, "usd", "btc")
+    assert not hasattr(instance, "__dict__")
+    with pytest.raises(AttributeError):
+        instance.unexpected = "argument"
+
+
+def test_serializer_of_undecorated_subclass() -> None:
+    @dataclass
+    class Custom(Base):
+        name: str
+        note: str = None
+
+    assert Custom("x").clean_data_to_dict() == {"name": "x"}
+
+
+PAYMENT = {
+    "payment_id": "5745459419",
+    "payment_status": "waiting",
+    "pay_address": "3EZ2uTdVDAMFXTfc6uLDDKR6o8qKBZXVkj",
+    "price_amount": 3999.5,
+    "price_currency": "usd",
+    "pay_amount": "0.17070286",
+    "pay_currency": "btc",
+    "created_at": "2020-12-22T15:00:22.742Z",
+    "updated_at": "2020-12-22T15:00:22.742Z",
+    "invoice_id": None,
+}
+
+
+def test_payment_fields_are_decoded_lazily() -> None:
+    payment = Payment(PAYMENT)
+    assert payment._decoded is None
+    assert payment.payment_status == "waiting"
+    assert payment._decoded is None
+    assert payment.payment_id == 5745459419
+    assert payment.price_amount == Decimal("3999.5")
+    assert payment.pay_amount == Decimal("0.17070286")
+    assert payment.created_at == datetime(
+        2020, 12, 22, 15, 0, 22, 742000, tzinfo=timezone.utc
+    )
+    assert payment.created_at is payment.created_at
+    assert payment.invoice_id is None
+    assert payment.outcome_amount is None
+    assert payment.to_dict() is PAYMENT
+    assert payment["pay_currency"] == "btc"
+    assert not hasattr(payment, "__dict__")
+    with pytest.raises(AttributeError):
+        payment.payment_status = "finished"
+    assert Payment.from_dict(dict(PAYMENT)) == payment
+
+
+def test_payment_page() -> None:
+    page = PaymentPage(
+        {"data": [PAYMENT, PAYMENT], "limit": 2, "page": 0, "pagesCount": 3, "total": 5}
+    )
+    assert len(page) == 2
+    assert page.pages_count == 3
+    assert [payment.payment_id for payment in page] == [5745459419] * 2
+    assert page.payments[0].raw is PAYMENT
+
+
+def test_other_responses() -> None:
+    invoice = Invoice(
+        {"id": "4522625843", "price_amount": "1000", "pay_currency": None}
+    )
+    assert invoice.id == 4522625843
+    assert invoice.price_amount == Decimal(1000)
+    currency = Currency({"id": 1, "code": "BTC", "network_precision": "8"})
+    assert currency.network_precision == 8
+    estimate = Estimate({"amount_from": 0.1, "estimated_amount": 1.5e-06})
+    assert estimate.amount_from == Decimal("0.1")
+    assert estimate.estimated_amount == Decimal("0.0000015")
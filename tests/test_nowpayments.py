@@ -1,26 +1,48 @@
 """Testing Module"""
+
 import datetime
+import os
+from typing import Iterator
 
 import dotenv
 import pytest
 from requests import HTTPError
 
 from nowpayments_api import NOWPaymentsAPI, NowPaymentsException
+from nowpayments_api.cassette import CassetteAdapter
+
+# Credentials are only checked by the sandbox, replaying a cassette works without them.
+config = {
+    "API_KEY": "replay",
+    "EMAIL": "replay@example.org",
+    "PASSWORD": "replay",
+    "CASSETTE": os.path.join(os.path.dirname(__file__), "cassettes", "sandbox.jsonl"),
+    **dotenv.dotenv_values(),
+}
+
 
-config = dotenv.dotenv_values()
+@pytest.fixture(scope="module")
+def adapter() -> Iterator[CassetteAdapter]:
+    """
+    Replays the committed cassette offline. With CASSETTE set in .env to a file that does not exist,
+    the sandbox exchanges are recorded to it on the first run and replayed afterwards.
+    """
+    adapter = CassetteAdapter(config["CASSETTE"], mode="once")
+    yield adapter
+    adapter.close()
 
 
 @pytest.fixture
-def now_payments_api_key() -> NOWPaymentsAPI:
+def now_payments_api_key(adapter: CassetteAdapter) -> NOWPaymentsAPI:
     """
     NOWPayments class fixture.
     :return: NOWPayments class.
     """
-    return NOWPaymentsAPI(api_key=config["API_KEY"], sandbox=True)
+    return NOWPaymentsAPI(api_key=config["API_KEY"], sandbox=True, adapter=adapter)
 
 
 @pytest.fixture
-def now_payments_email_password() -> NOWPaymentsAPI:
+def now_payments_email_password(adapter: CassetteAdapter) -> NOWPaymentsAPI:
     """
     NOWPayments class fixture.
     :return: NOWPayments class.
@@ -30,6 +52,7 @@ def now_payments_email_password() -> NOWPaymentsAPI:
         email=config["EMAIL"],
         password=config["PASSWORD"],
         sandbox=True,
+        adapter=adapter,
     )
 
 
@@ -0,0 +1,55 @@
+"""Testing Module"""
+
+import asyncio
+
+import pytest
+
+from nowpayments_api import AsyncNOWPaymentsAPI, NOWPaymentsAPI, PaymentCursor
+from nowpayments_api.testing import StubServer
+
+
+@pytest.fixture
+def stub_server(stub_server: StubServer) -> StubServer:
+    for _ in range(25):
+        stub_server.state.create_payment(
+            {"price_amount": 10, "price_currency": "usd", "pay_currency": "btc"}
+        )
+    return stub_server
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_iter_payments_walks_every_page(
+    now_payments: NOWPaymentsAPI, stub_server: StubServer, prefetch: bool
+) -> None:
+    payments = list(now_payments.iter_payments(limit=10, prefetch=prefetch))
+    assert [p["payment_id"] for p in payments] == sorted(
+        str(payment_id) for payment_id in stub_server.state.payments
+    )
+    assert stub_server.state.requests.count(("GET", "payment")) == 3
+
+
+def test_iter_payments_resumes_from_cursor(now_payments: NOWPaymentsAPI) -> None:
+    iterator = now_payments.iter_payments(limit=10, prefetch=True)
+    first = [next(iterator) for _ in range(13)]
+    iterator.close()
+    assert iterator.cursor == PaymentCursor(1, 3)
+    rest = list(now_payments.iter_payments(limit=10, cursor=iterator.cursor))
+    assert len(first) + len(rest) == 25
+    assert first[-1]["payment_id"] < rest[0]["payment_id"]
+
+
+def test_iter_payments_start_page(now_payments: NOWPaymentsAPI) -> None:
+    assert len(list(now_payments.iter_payments(limit=10, start_page=2))) == 5
+
+
+def test_async_iter_payments(stub_server: StubServer) -> None:
+    pytest.importorskip("httpx")
+
+    async def main() -> list:
+        async with AsyncNOWPaymentsAPI(
+            api_key="test", email="test@example.org", password="password"
+        ) as api:
+            api.api_uri = stub_server.url
+            return [p async for p in api.iter_payments(limit=10, prefetch=True)]
+
+    assert len(asyncio.run(main())) == 25
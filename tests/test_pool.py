@@ -0,0 +1,177 @@
+"""Testing Module"""
+
+import pytest
+import requests
+
+from nowpayments_api import (
+    NO_RETRY,
+    MemoryIdempotencyStore,
+    NOWPaymentsClientPool,
+    QuoteCache,
+    RateLimit,
+    RateLimiter,
+    RateLimitExceeded,
+)
+from nowpayments_api.testing import StubServer
+
+
+@pytest.fixture
+def stub_server() -> StubServer:
+    with StubServer("key-a", currencies=["btc", "eth"]) as server:
+        yield server
+
+
+def test_clients_share_one_session(stub_server: StubServer) -> None:
+    with NOWPaymentsClientPool(retry_policy=NO_RETRY, timeout=2) as pool:
+        pool.register("a", "key-a")
+        pool.register("b", "key-b")
+        first, second = pool.client("a"), pool["b"]
+        assert first.session is second.session is pool.session
+        assert first.token_manager is not second.token_manager
+        assert first.currency_catalog is not second.currency_catalog
+        assert first.timeout == 2
+
+        first.api_uri = second.api_uri = stub_server.url
+        assert first.status() == {"message": "OK"}
+        with pytest.raises(requests.HTTPError):
+            second.currencies()
+
+
+def test_currencies_are_validated_against_merchant_coins(
+    stub_server: StubServer,
+) -> None:
+    pool = NOWPaymentsClientPool()
+    pool.register("a", "key-a")
+    client = pool.client("a")
+    client.api_uri = stub_server.url
+    assert client.currency_catalog.get() == {"btc", "eth"}
+    assert ("GET", "merchant/coins") in stub_server.state.requests
+
+
+def test_least_recently_used_clients_are_evicted() -> None:
+    pool = NOWPaymentsClientPool(max_clients=2)
+    for merchant in "abc":
+        pool.register(merchant, f"key-{merchant}")
+    first = pool.client("a")
+    pool.client("b")
+    assert pool.client("a") is first
+    pool.client("c")
+    assert pool.stats() == {
+        "merchants": 3,
+        "clients": 2,
+        "hits": 1,
+        "misses": 3,
+        "evictions": 1,
+    }
+    assert pool.client("a") is first
+    assert pool.client("b") is not None
+    assert pool.stats()["misses"] == 4
+
+    pool.register("a", "new-key")
+    assert pool.client("a") is not first
+    assert pool.client("a")._api_key == "new-key"
+
+    pool.unregister("a")
+    assert "a" not in pool
+    with pytest.raises(KeyError):
+        pool.client("a")
+
+
+def test_rate_limiter_per_merchant() -> None:
+    pool = NOWPaymentsClientPool(
+        rate_limiter_factory=lambda merchant: RateLimiter(
+            {"read": RateLimit(1, 1)}, mode="fail"
+        )
+    )
+    pool.register("a", "key-a")
+    pool.register("b", "key-b")
+    first, second = pool.client("a"), pool.client("b")
+    assert first.rate_limiter is not second.rate_limiter
+    first.rate_limiter.acquire("GET", "status")
+    with pytest.raises(RateLimitExceeded):
+        first.rate_limiter.acquire("GET", "status")
+    second.rate_limiter.acquire("GET", "status")
+
+
+def test_rate_limiters_outlive_evicted_clients(stub_server: StubServer) -> None:
+    pool = NOWPaymentsClientPool(
+        max_clients=1,
+        rate_limiter_factory=lambda merchant: RateLimiter(
+            {"read": RateLimit(0.001, 1)}, mode="fail"
+        ),
+    )
+    pool.register("a", "key-a")
+    pool.register("b", "key-a")
+    passed = 0
+    for merchant in "abababab":
+        client = pool.client(merchant)
+        client.api_uri = stub_server.url
+        try:
+            client.status()
+        except RateLimitExceeded:
+            continue
+        passed += 1
+    assert passed == 2
+    assert pool.stats()["evictions"] == 7
+
+    pool.unregister("a")
+    pool.register("a", "key-a")
+    pool.client("a").api_uri = stub_server.url
+    assert pool.client("a").status() == {"message": "OK"}
+
+
+def test_rate_limiters_are_closed_with_their_merchant() -> None:
+    closed = []
+
+    class Limiter(RateLimiter):
+        def __init__(self, name: str) -> None:
+            super().__init__({"read": RateLimit(1, 1)})
+            self.name = name
+
+        def close(self) -> None:
+            closed.append(self.name)
+
+    shared = Limiter("shared")
+    pool = NOWPaymentsClientPool(
+        rate_limiter_factory=lambda merchant: (
+            shared if merchant in "ab" else Limiter(merchant)
+        )
+    )
+    for merchant in "abc":
+        pool.register(merchant, f"key-{merchant}")
+        pool.client(merchant)
+    pool.unregister("c")
+    pool.unregister("a")
+    assert closed == ["c"]
+    pool.close()
+    assert closed == ["c", "shared"]
+
+
+def test_close_keeps_a_given_session() -> None:
+    session = requests.Session()
+    pool = NOWPaymentsClientPool(session=session)
+    pool.register("a", "key-a")
+    assert pool.client("a").session is session
+    pool.close()
+    assert pool.session is session
+    assert pool.stats()["clients"] == 0
+
+
+def test_shared_store_and_cache_are_scoped_by_merchant() -> None:
+    store, cache = MemoryIdempotencyStore(), QuoteCache(ttl=60)
+    pool = NOWPaymentsClientPool(idempotency_store=store, quote_cache=cache)
+    with StubServer("key-a") as first_server, StubServer("key-b") as second_server:
+        pool.register("a", "key-a")
+        pool.register("b", "key-b")
+        first, second = pool.client("a"), pool.client("b")
+        first.api_uri, second.api_uri = first_server.url, second_server.url
+
+        first_payment = first.create_payment(100, "usd", "btc", order_id="A-1")
+        second.create_payment(100, "usd", "btc", order_id="A-1")
+        assert len(first_server.state.payments) == 1
+        assert len(second_server.state.payments) == 1
+        assert first.create_payment(100, "usd", "btc", order_id="A-1") == first_payment
+
+        first.minimum_payment_amount("usd", "btc")
+        second.minimum_payment_amount("usd", "btc")
+        assert ("GET", "min-amount") in second_server.state.requests
@@ -0,0 +1,110 @@
+"""Testing Module"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from nowpayments_api import AsyncQuoteCache, NOWPaymentsAPI, QuoteCache
+from nowpayments_api.quotes import bucket_amount, scale_estimate
+from nowpayments_api.testing import StubServer
+
+from .conftest import FakeClock
+
+
+def test_bucket_amount() -> None:
+    assert bucket_amount(1234.56, None) == 1234.56
+    assert bucket_amount(1234.56, 3) == 1230.0
+    assert bucket_amount(0.00123456, 2) == 0.0012
+
+
+def test_scale_estimate() -> None:
+    quote = {"amount_from": 100.0, "estimated_amount": 0.002}
+    assert scale_estimate(quote, 101.0) == {
+        "amount_from": 101.0,
+        "estimated_amount": pytest.approx(0.00202),
+    }
+    assert quote["amount_from"] == 100.0
+
+
+def test_ttl_and_lru() -> None:
+    clock = FakeClock()
+    cache = QuoteCache(ttl=5, maxsize=2, clock=clock)
+    calls = []
+
+    def fetch(key: str):
+        return lambda: calls.append(key) or key
+
+    for key in ("a", "b", "a", "c", "a", "b"):
+        assert cache.get(key, fetch(key)) == key
+    assert calls == ["a", "b", "c", "b"]
+    clock.now += 5
+    cache.get("a", fetch("a"))
+    assert calls[-1] == "a"
+    assert cache.stats() == {"hits": 2, "misses": 5, "coalesced": 0, "stale": 0}
+
+
+def test_concurrent_lookups_are_coalesced() -> None:
+    cache = QuoteCache()
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def fetch() -> dict:
+        calls.append(1)
+        time.sleep(0.1)
+        return {"min_amount": 1}
+
+    def lookup() -> None:
+        barrier.wait()
+        assert cache.get("key", fetch) == {"min_amount": 1}
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert cache.coalesced == 7
+
+
+def test_errors_are_shared_but_not_cached() -> None:
+    cache = QuoteCache()
+
+    def fail() -> dict:
+        raise ValueError("down")
+
+    with pytest.raises(ValueError):
+        cache.get("key", fail)
+    assert cache.get("key", lambda: 1) == 1
+
+
+def test_client_quotes_are_cached(stub_server: StubServer) -> None:
+    api = NOWPaymentsAPI("test", quote_cache=QuoteCache(significant_digits=2))
+    api.api_uri = stub_server.url
+    estimate = api.estimate_price(100, "usd", "btc")
+    close = api.estimate_price(101, "usd", "btc")
+    assert close["amount_from"] == 101
+    assert close["estimated_amount"] == pytest.approx(
+        estimate["estimated_amount"] * 1.01
+    )
+    api.minimum_payment_amount("usd", "btc")
+    api.minimum_payment_amount("usd", "btc")
+    assert stub_server.state.requests.count(("GET", "estimate")) == 1
+    assert stub_server.state.requests.count(("GET", "min-amount")) == 1
+
+
+def test_async_client_quotes_are_coalesced(stub_server: StubServer) -> None:
+    pytest.importorskip("httpx")
+    from nowpayments_api import AsyncNOWPaymentsAPI
+
+    async def main() -> list:
+        async with AsyncNOWPaymentsAPI("test", quote_cache=AsyncQuoteCache()) as api:
+            api.api_uri = stub_server.url
+            return await asyncio.gather(
+                *(api.estimate_price(100, "usd", "btc") for _ in range(10))
+            )
+
+    results = asyncio.run(main())
+    assert len({result["estimated_amount"] for result in results}) == 1
+    assert stub_server.state.requests.count(("GET", "estimate")) == 1
@@ -0,0 +1,88 @@
+"""Testing Module"""
+
+import os
+
+import pytest
+
+from nowpayments_api import (
+    NOWPaymentsAPI,
+    RateLimit,
+    RateLimiter,
+    RateLimitExceeded,
+)
+from nowpayments_api.ratelimit import TokenBucket, endpoint_class
+from nowpayments_api.testing import StubServer
+
+from .conftest import FakeClock
+
+
+def test_endpoint_class() -> None:
+    assert endpoint_class("GET", "payment/123") == "read"
+    assert endpoint_class("POST", "payment") == "create"
+    assert endpoint_class("POST", "invoice-payment") == "create"
+    assert endpoint_class("POST", "payment/123/update-merchant-estimate") == "write"
+
+
+def test_token_bucket_refills() -> None:
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock, sleep=clock.sleep)
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    clock.now += 1
+    assert bucket.try_acquire(2) == 0
+    assert bucket.acquire(timeout=0.1) is False
+    assert bucket.acquire() is True
+    assert clock.now == pytest.approx(1001.5)
+
+
+def test_file_bucket_is_shared(tmp_path) -> None:
+    clock = FakeClock()
+    path = str(tmp_path / "bucket")
+    first = TokenBucket(rate=1, burst=2, path=path, clock=clock)
+    second = TokenBucket(rate=1, burst=2, path=path, clock=clock)
+    assert first.try_acquire() == 0
+    assert second.try_acquire() == 0
+    assert first.try_acquire() > 0
+    assert second.try_acquire() > 0
+    first.close()
+    second.close()
+
+
+def test_limiter_closes_its_bucket_files(tmp_path) -> None:
+    with RateLimiter(
+        {"read": RateLimit(1, 1), "create": RateLimit(1, 1)}, lock_dir=str(tmp_path)
+    ) as limiter:
+        fds = [bucket._state._fd for bucket in limiter.buckets.values()]
+        limiter.acquire("GET", "status")
+    assert all(bucket._state._fd is None for bucket in limiter.buckets.values())
+    for fd in fds:
+        with pytest.raises(OSError):
+            os.fstat(fd)
+    limiter.close()
+
+
+def test_limiter_fail_mode_raises() -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(
+        {"create": RateLimit(1, 1)}, mode="fail", clock=clock, sleep=clock.sleep
+    )
+    limiter.acquire("POST", "payment")
+    limiter.acquire("GET", "status")
+    with pytest.raises(RateLimitExceeded) as error:
+        limiter.acquire("POST", "payment")
+    assert error.value.retry_after == pytest.approx(1)
+
+
+def test_limiter_is_applied_to_requests() -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(
+        {"read": RateLimit(10, 2)}, mode="wait", timeout=0.05, clock=clock
+    )
+    with StubServer() as server:
+        api = NOWPaymentsAPI(api_key="test", rate_limiter=limiter)
+        api.api_uri = server.url
+        api.status()
+        api.status()
+        with pytest.raises(RateLimitExceeded):
+            api.status()
+        assert len(server.state.requests) == 2
@@ -0,0 +1,133 @@
+"""Testing Module"""
+
+import io
+import json
+
+import pytest
+import requests
+from requests import HTTPError
+
+from nowpayments_api import NO_RETRY, NOWPaymentsAPI, RetryPolicy
+from nowpayments_api.retry import parse_retry_after
+
+
+def make_response(
+    status: int, payload: dict, headers: dict = None
+) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(payload).encode()
+    response.raw = io.BytesIO()
+    response.headers.update(headers or {})
+    response.url = "https://api.nowpayments.io/v1/"
+    return response
+
+
+class FakeSession:
+    def __init__(self, *outcomes) -> None:
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        self.calls.append((method, url))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def make_api(policy: RetryPolicy, *outcomes) -> tuple:
+    sleeps = []
+    policy.sleep = sleeps.append
+    api = NOWPaymentsAPI(api_key="test", retry_policy=policy)
+    api.session = FakeSession(*outcomes)
+    return api, sleeps
+
+
+def test_parse_retry_after() -> None:
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert (
+        parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=lambda: 1445412470) == 10
+    )
+    assert parse_retry_after("soon") is None
+
+
+def test_backoff_is_exponential_and_capped() -> None:
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+    assert [policy.backoff(attempt) for attempt in range(1, 5)] == [1, 2, 4, 5]
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5)
+    assert all(0 <= policy.backoff(3) <= 4 for _ in range(20))
+
+
+def test_get_is_retried_on_server_errors_and_connection_errors() -> None:
+    api, sleeps = make_api(
+        RetryPolicy(max_attempts=3, jitter=False),
+        make_response(503, {"message": "Unavailable"}),
+        requests.ConnectionError("reset"),
+        make_response(200, {"message": "OK"}),
+    )
+    assert api.status() == {"message": "OK"}
+    assert len(api.session.calls) == 3
+    assert sleeps == [0.5, 1.0]
+
+
+def test_retry_after_is_honored() -> None:
+    api, sleeps = make_api(
+        RetryPolicy(),
+        make_response(429, {"message": "Too many requests"}, {"Retry-After": "2"}),
+        make_response(200, {"message": "OK"}),
+    )
+    assert api.status() == {"message": "OK"}
+    assert sleeps == [2.0]
+
+
+def test_gives_up_after_max_attempts() -> None:
+    api, _ = make_api(
+        RetryPolicy(max_attempts=2),
+        make_response(500, {"message": "Boom"}),
+        make_response(500, {"message": "Boom"}),
+    )
+    with pytest.raises(HTTPError, match="Boom"):
+        api.status()
+    assert len(api.session.calls) == 2
+
+
+def test_deadline_limits_retries() -> None:
+    api, sleeps = make_api(
+        RetryPolicy(max_attempts=5, deadline=1.0),
+        make_response(503, {"message": "Unavailable"}, {"Retry-After": "5"}),
+    )
+    with pytest.raises(HTTPError, match="Unavailable"):
+        api.status()
+    assert sleeps == []
+
+
+def test_client_errors_and_disabled_policy_are_not_retried() -> None:
+    api, _ = make_api(RetryPolicy(), make_response(404, {"message": "Not found"}))
+    with pytest.raises(HTTPError):
+        api.status()
+    api = NOWPaymentsAPI(api_key="test", retry_policy=NO_RETRY)
+    api.session = FakeSession(make_response(503, {"message": "Unavailable"}))
+    with pytest.raises(HTTPError):
+        api.status()
+
+
+def test_post_is_only_retried_with_idempotency_key() -> None:
+    api, _ = make_api(
+        RetryPolicy(retry_idempotent_posts=True),
+        make_response(502, {"message": "Bad gateway"}),
+    )
+    with pytest.raises(HTTPError, match="502"):
+        api.update_payment_estimate(1)
+    assert len(api.session.calls) == 1
+
+    api, sleeps = make_api(
+        RetryPolicy(retry_idempotent_posts=True),
+        make_response(502, {"message": "Bad gateway"}),
+        make_response(201, {"payment_id": "1"}),
+    )
+    api.currency_catalog._store(["btc"])
+    response = api.create_payment(10, "usd", "btc", idempotency_key="order-1")
+    assert response == {"payment_id": "1"}
+    assert len(sleeps) == 1
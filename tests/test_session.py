@@ -0,0 +1,77 @@
+"""Testing Module"""
+
+import socket
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from nowpayments_api import NO_RETRY, NOWPaymentsAPI, RetryPolicy
+from nowpayments_api.nowpayments_api import _attempt_timeout
+from nowpayments_api.testing import StubServer
+
+
+def test_adapter_is_mounted_with_pool_options() -> None:
+    api = NOWPaymentsAPI(api_key="test", pool_connections=4, pool_maxsize=32)
+    adapter = api.session.get_adapter("https://api.nowpayments.io/v1/")
+    assert adapter._pool_connections == 4
+    assert adapter._pool_maxsize == 32
+    assert adapter.max_retries.total == 0
+
+
+def test_shared_session_and_adapter() -> None:
+    session = requests.Session()
+    first = NOWPaymentsAPI(api_key="a", session=session)
+    second = NOWPaymentsAPI(api_key="b", session=session)
+    assert first.session is second.session
+
+    adapter = HTTPAdapter(pool_maxsize=50)
+    first = NOWPaymentsAPI(api_key="a", adapter=adapter)
+    second = NOWPaymentsAPI(api_key="b", adapter=adapter)
+    assert first.session.get_adapter("https://x") is adapter
+    assert second.session.get_adapter("https://x") is adapter
+
+
+def test_attempt_timeout_is_capped_by_deadline() -> None:
+    assert _attempt_timeout((5, 30), None) == (5, 30)
+    assert _attempt_timeout((5, 30), 10) == (5, 10)
+    assert _attempt_timeout(None, 2) == 2
+    assert _attempt_timeout(3, 2) == 2
+
+
+def test_with_options_overrides_timeout_and_shares_state() -> None:
+    api = NOWPaymentsAPI(api_key="test", timeout=(1, 2))
+    fast = api.with_options(timeout=0.5)
+    assert fast.timeout == 0.5
+    assert api.timeout == (1, 2)
+    assert fast.session is api.session
+    assert fast.currency_catalog is api.currency_catalog
+    assert api.with_options().timeout == (1, 2)
+    assert api.with_options(timeout=None).timeout is None
+
+
+def test_read_timeout_is_enforced() -> None:
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        api = NOWPaymentsAPI(api_key="test", timeout=(1, 0.2), retry_policy=NO_RETRY)
+        api.api_uri = f"http://127.0.0.1:{listener.getsockname()[1]}/v1/"
+        with pytest.raises(requests.Timeout):
+            api.status()
+
+
+def test_requests_use_configured_timeout() -> None:
+    with StubServer() as server:
+        api = NOWPaymentsAPI(
+            api_key="test", timeout=(2, 5), retry_policy=RetryPolicy(deadline=3)
+        )
+        api.api_uri = server.url
+        sent = []
+        request = api.session.request
+        api.session.request = lambda *args, **kwargs: sent.append(
+            kwargs["timeout"]
+        ) or request(*args, **kwargs)
+        assert api.status() == {"message": "OK"}
+        connect, read = sent[0]
+        assert connect == 2
+        assert 2.9 < read <= 3
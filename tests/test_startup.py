@@ -0,0 +1,56 @@
+"""Testing Module"""
+
+import os
+import subprocess
+import sys
+from typing import List
+
+import pytest
+
+import nowpayments_api
+from nowpayments_api import NOWPaymentsAPI
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(nowpayments_api.__file__)))
+HEAVY_MODULES = ("requests", "urllib3", "httpx", "asyncio", "sqlite3", "orjson")
+
+
+def _loaded_modules(code: str) -> List[str]:
+    """Modules in ``sys.modules`` after running ``code`` in a fresh interpreter."""
+    env = dict(os.environ, PYTHONPATH=SRC)
+    process = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport sys\nprint('\\n'.join(sys.modules))"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return process.stdout.splitlines()
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import nowpayments_api",
+        "from nowpayments_api import IPNVerifier, NOWPaymentsAPI\nNOWPaymentsAPI('key')",
+    ],
+)
+def test_import_does_not_load_heavy_modules(code: str) -> None:
+    modules = _loaded_modules(code)
+    assert "nowpayments_api" in modules
+    for module in HEAVY_MODULES:
+        assert module not in modules, f"{module} is imported eagerly"
+
+
+def test_session_is_created_on_first_use() -> None:
+    api = NOWPaymentsAPI(api_key="test")
+    assert api._session is None
+    clone = api.with_options(timeout=1)
+    assert clone.session is api.session
+    assert api._session is not None
+
+
+def test_lazy_exports() -> None:
+    assert "PaymentSync" in dir(nowpayments_api)
+    assert nowpayments_api.PaymentSync.__module__ == "nowpayments_api.sync"
+    with pytest.raises(AttributeError):
+        nowpayments_api.Missing  # pylint: disable=pointless-statement
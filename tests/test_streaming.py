@@ -0,0 +1,108 @@
+"""Testing Module"""
+
+import asyncio
+import json
+
+import pytest
+
+from nowpayments_api import NOWPaymentsAPI
+from nowpayments_api.streaming import JSONArrayParser, iter_json_array
+from nowpayments_api.testing import StubServer
+
+DOCUMENT = {
+    "meta": {"data": ["nested", "ignored"]},
+    "tricky": 'quote " comma , bracket ] { and \\ backslash',
+    "data": [
+        {"id": index, "text": 'a\\"],{', "nested": [1, {"deep": [index]}]}
+        for index in range(30)
+    ]
+    + [1, 2.5, "text", None, True, [1, [2]], "ünïcode"],
+    "pagesCount": 1,
+}
+
+
+def chunked(raw: bytes, size: int) -> list:
+    return [raw[start : start + size] for start in range(0, len(raw), size)]
+
+
+@pytest.fixture
+def stub_server(stub_server: StubServer) -> StubServer:
+    for index in range(25):
+        stub_server.state.create_payment(
+            {"price_amount": index + 1, "price_currency": "usd", "pay_currency": "btc"}
+        )
+    return stub_server
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 1 << 20])
+def test_items_across_chunk_boundaries(size: int) -> None:
+    raw = json.dumps(DOCUMENT, ensure_ascii=False).encode()
+    assert list(iter_json_array(chunked(raw, size), "data")) == DOCUMENT["data"]
+
+
+def test_top_level_array_and_empty_array() -> None:
+    assert list(iter_json_array([b" [1, ", b'{"a": 2} ]'], None)) == [1, {"a": 2}]
+    assert list(iter_json_array([b'{"data": [ ]}'], "data")) == []
+
+
+def test_stdlib_backend() -> None:
+    raw = json.dumps(DOCUMENT).encode()
+    assert list(iter_json_array([raw], "data", loads=json.loads)) == DOCUMENT["data"]
+
+
+def test_errors() -> None:
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"data": [1, 2'], "data"))
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"other": [1, 2]}'], "data"))
+    parser = JSONArrayParser("data")
+    assert parser.feed(b'{"data": "not an array", "x": [1]}') == []
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_stream_list_of_payments(now_payments: NOWPaymentsAPI) -> None:
+    expected = now_payments.list_of_payments(limit=10, page=1)["data"]
+    records = now_payments.list_of_payments(limit=10, page=1, stream=True)
+    assert list(records) == expected
+
+
+def test_stream_currencies_full(now_payments: NOWPaymentsAPI) -> None:
+    expected = now_payments.currencies_full()["currencies"]
+    assert list(now_payments.currencies_full(stream=True)) == expected
+
+
+@pytest.mark.parametrize("limit", [5, 10, 30])
+def test_iter_payments_streamed(
+    now_payments: NOWPaymentsAPI, stub_server: StubServer, limit: int
+) -> None:
+    payments = list(now_payments.iter_payments(limit=limit, stream=True))
+    assert [payment["payment_id"] for payment in payments] == [
+        str(payment_id) for payment_id in stub_server.state.payments
+    ]
+
+    iterator = now_payments.iter_payments(limit=limit, stream=True)
+    first = [next(iterator) for _ in range(7)]
+    iterator.close()
+    rest = list(now_payments.iter_payments(limit=limit, cursor=iterator.cursor))
+    assert first + rest == payments
+
+
+def test_async_streaming(stub_server: StubServer) -> None:
+    pytest.importorskip("httpx")
+    from nowpayments_api import AsyncNOWPaymentsAPI
+
+    async def main() -> tuple:
+        async with AsyncNOWPaymentsAPI("test", "test@example.org", "password") as api:
+            api.api_uri = stub_server.url
+            currencies = [
+                currency async for currency in await api.currencies_full(stream=True)
+            ]
+            payments = [
+                payment async for payment in api.iter_payments(limit=10, stream=True)
+            ]
+            return currencies, payments
+
+    currencies, payments = asyncio.run(main())
+    assert len(currencies) == len(stub_server.state.currencies)
+    assert len(payments) == 25
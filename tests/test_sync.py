@@ -0,0 +1,182 @@
+"""Testing Module"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from nowpayments_api import (
+    NO_RETRY,
+    MemoryPaymentStore,
+    NOWPaymentsAPI,
+    PaymentSync,
+    SQLitePaymentStore,
+)
+from nowpayments_api.nowpayments_api import _format_date, _list_of_payments_endpoint
+from nowpayments_api.sync import PaymentStore
+from nowpayments_api.testing import StubServer
+
+from .conftest import FakeClock
+
+NOW = datetime(2024, 3, 10, 12, tzinfo=timezone.utc)
+
+
+def add_payment(server: StubServer, created_at: datetime, status: str) -> dict:
+    payment = server.state.create_payment(
+        {"price_amount": 10, "price_currency": "usd", "pay_currency": "btc"}
+    )
+    payment["created_at"] = payment["updated_at"] = _format_date(created_at)
+    payment["payment_status"] = status
+    return payment
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock(NOW)
+
+
+@pytest.fixture
+def stub_server(stub_server: StubServer) -> StubServer:
+    for hours in range(1, 97, 4):
+        add_payment(stub_server, NOW - timedelta(hours=hours), "finished")
+    return stub_server
+
+
+@pytest.fixture
+def now_payments(now_payments: NOWPaymentsAPI) -> NOWPaymentsAPI:
+    now_payments.retry_policy = NO_RETRY
+    return now_payments
+
+
+def page_requests(server: StubServer) -> int:
+    return server.state.requests.count(("GET", "payment"))
+
+
+def test_date_parameters() -> None:
+    endpoint = _list_of_payments_endpoint(
+        10,
+        0,
+        "created_at",
+        "asc",
+        date_to=datetime(
+            2024, 1, 2, 4, 4, 5, 678901, tzinfo=timezone(timedelta(hours=1))
+        ),
+    )
+    assert endpoint.endswith("orderBy=asc&dateTo=2024-01-02T03:04:05.678Z")
+    endpoint = _list_of_payments_endpoint(
+        10, 0, "created_at", "asc", datetime(2024, 1, 2), datetime(2024, 1, 3)
+    )
+    assert endpoint.endswith(
+        "&dateFrom=2024-01-02T00:00:00.000Z&dateTo=2024-01-03T00:00:00.000Z"
+    )
+
+
+@pytest.mark.parametrize("sqlite", [True, False])
+def test_incremental_sync(
+    now_payments: NOWPaymentsAPI, stub_server: StubServer, tmp_path, sqlite: bool
+) -> None:
+    store = (
+        SQLitePaymentStore(tmp_path / "payments.db") if sqlite else MemoryPaymentStore()
+    )
+    clock = FakeClock(NOW)
+    sync = PaymentSync(
+        now_payments,
+        store,
+        slice_length=timedelta(hours=1),
+        overlap=timedelta(minutes=10),
+        limit=5,
+        clock=clock,
+    )
+    result = sync.run()
+    assert (result.windows, result.fetched, result.changed) == (1, 24, 24)
+    assert result.ok and result.watermark == NOW
+    assert len(store) == 24
+
+    clock.now += timedelta(hours=3)
+    new = add_payment(stub_server, NOW + timedelta(hours=2), "waiting")
+    old_page_requests = page_requests(stub_server)
+    result = sync.run()
+    assert result.windows == 4
+    assert page_requests(stub_server) - old_page_requests == 4
+    assert (result.fetched, result.changed) == (1, 1)
+    assert store.get(new["payment_id"])["payment_status"] == "waiting"
+
+    # The open payment is refreshed by the next run even though it precedes the watermark.
+    clock.now += timedelta(hours=3)
+    new["payment_status"] = "finished"
+    result = sync.run()
+    assert result.windows == 4 and result.changed == 1
+    assert store.get(new["payment_id"])["payment_status"] == "finished"
+    assert sync.windows()[0][0] == clock.now - timedelta(minutes=10)
+
+
+def test_first_run_is_sliced_from_start(
+    now_payments: NOWPaymentsAPI, stub_server: StubServer
+) -> None:
+    store = MemoryPaymentStore()
+    sync = PaymentSync(
+        now_payments,
+        store,
+        slice_length=timedelta(days=1),
+        start=NOW - timedelta(days=4),
+        clock=FakeClock(NOW),
+    )
+    assert sync.windows() == [
+        (NOW - timedelta(days=days), NOW - timedelta(days=days - 1))
+        for days in range(4, 0, -1)
+    ]
+    result = sync.run()
+    assert (result.windows, result.fetched) == (4, 24)
+    assert page_requests(stub_server) == 4
+    assert result.ok and result.watermark == NOW
+    assert len(store) == 24
+
+
+def test_naive_dates_are_taken_as_utc(
+    now_payments: NOWPaymentsAPI, stub_server: StubServer
+) -> None:
+    store = MemoryPaymentStore()
+    naive = NOW.replace(tzinfo=None)
+    sync = PaymentSync(
+        now_payments,
+        store,
+        slice_length=timedelta(days=2),
+        start=naive - timedelta(days=4),
+        clock=FakeClock(NOW),
+    )
+    assert sync.windows(naive)[0] == (NOW - timedelta(days=4), NOW - timedelta(days=2))
+    add_payment(stub_server, NOW - timedelta(minutes=30), "waiting")
+    assert sync.run(naive).ok and store.watermark() == NOW
+    assert sync.windows(naive + timedelta(hours=1))[-1][1] == NOW + timedelta(hours=1)
+
+
+def test_failed_slices_hold_the_watermark(
+    now_payments: NOWPaymentsAPI, stub_server: StubServer
+) -> None:
+    store = MemoryPaymentStore()
+    store.set_watermark(NOW - timedelta(hours=10))
+    sync = PaymentSync(
+        now_payments,
+        store,
+        slice_length=timedelta(hours=4),
+        overlap=timedelta(0),
+        max_workers=1,
+        clock=FakeClock(NOW),
+    )
+    stub_server.state.fail_next(500, path="payment")
+    result = sync.run()
+    assert result.windows == 3 and len(result.errors) == 1
+    (failed,) = result.errors
+    assert failed[0] == NOW - timedelta(hours=10) == result.watermark
+
+    result = sync.run()
+    assert result.ok and result.watermark == NOW
+    assert len(store) == 3
+
+
+def test_stores_implement_the_whole_interface() -> None:
+    class PartialStore(PaymentStore):
+        def upsert(self, payments) -> int:
+            return 0
+
+    with pytest.raises(TypeError):
+        PartialStore()
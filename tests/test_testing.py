@@ -0,0 +1,41 @@
+"""Testing Module"""
+
+import time
+
+import requests
+
+from nowpayments_api.testing import StubServer
+
+
+def get(server: StubServer, endpoint: str = "status") -> requests.Response:
+    return requests.get(f"{server.url}{endpoint}", headers={"x-api-key": "test"})
+
+
+def test_latency() -> None:
+    with StubServer(latency=0.05) as server:
+        start = time.monotonic()
+        assert get(server).status_code == 200
+        assert time.monotonic() - start >= 0.05
+
+
+def test_fail_next() -> None:
+    with StubServer() as server:
+        server.state.fail_next(503, count=2, path="currencies")
+        assert get(server).status_code == 200
+        assert get(server, "currencies").status_code == 503
+        assert get(server, "currencies").status_code == 503
+        assert get(server, "currencies").status_code == 200
+
+
+def test_error_rate() -> None:
+    with StubServer(error_rate=1.0, error_status=502) as server:
+        assert get(server).status_code == 502
+        server.state.error_rate = 0.0
+        assert get(server).status_code == 200
+
+
+def test_throttle() -> None:
+    with StubServer(throttle=2) as server:
+        statuses = [get(server) for _ in range(3)]
+        assert [response.status_code for response in statuses] == [200, 200, 429]
+        assert float(statuses[-1].headers["Retry-After"]) > 0
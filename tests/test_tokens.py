@@ -0,0 +1,99 @@
+"""Testing Module"""
+
+import base64
+import json
+import threading
+import time
+
+import pytest
+from requests import HTTPError, Response
+
+from nowpayments_api import NOWPaymentsAPI, TokenManager
+from nowpayments_api.tokens import jwt_expiry
+
+from .conftest import FakeClock
+
+
+def make_jwt(exp: float) -> str:
+    claims = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode()
+    return f"header.{claims.rstrip('=')}.signature"
+
+
+def test_jwt_expiry() -> None:
+    assert jwt_expiry(make_jwt(1700000000)) == 1700000000
+    assert jwt_expiry("not-a-jwt") is None
+
+
+def test_token_is_reused_until_refresh_margin() -> None:
+    clock = FakeClock()
+    tokens = iter(["first", "second"])
+    manager = TokenManager(
+        lambda: next(tokens), lifetime=300, refresh_margin=30, clock=clock
+    )
+    assert manager.token() == "first"
+    clock.now += 200
+    assert manager.token() == "first"
+    clock.now += 80
+    assert manager.token() == "second"
+    assert manager.refreshes == 2
+
+
+def test_token_expiry_from_jwt_claim() -> None:
+    token = make_jwt(time.time() + 60)
+    manager = TokenManager(lambda: token, lifetime=300, refresh_margin=0)
+    manager.token()
+    assert manager.expires_in <= 60
+
+
+def test_concurrent_callers_share_one_refresh() -> None:
+    calls = []
+    started = threading.Event()
+
+    def fetch() -> str:
+        calls.append(1)
+        started.wait(0.1)
+        return "token"
+
+    manager = TokenManager(fetch)
+    threads = [threading.Thread(target=manager.token) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    started.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+
+
+def test_list_of_payments_reuses_token_and_retries_on_401() -> None:
+    api = NOWPaymentsAPI(api_key="test", email="e", password="p")
+    auth_calls = []
+    api.auth = lambda: auth_calls.append(1) or {"token": f"t{len(auth_calls)}"}
+    bearers = []
+
+    def get_request(endpoint: str, bearer: str = None) -> dict:
+        bearers.append(bearer)
+        if bearer == "t1" and len(bearers) == 3:
+            response = Response()
+            response.status_code = 401
+            raise HTTPError("Unauthorized", response=response)
+        return {"data": []}
+
+    api._get_request = get_request
+    for _ in range(3):
+        api.list_of_payments()
+    assert bearers == ["t1", "t1", "t1", "t2"]
+    assert len(auth_calls) == 2
+
+
+def test_list_of_payments_does_not_retry_other_errors() -> None:
+    api = NOWPaymentsAPI(api_key="test", email="e", password="p")
+    api.auth = lambda: {"token": "t"}
+
+    def get_request(endpoint: str, bearer: str = None) -> dict:
+        response = Response()
+        response.status_code = 500
+        raise HTTPError("Server error", response=response)
+
+    api._get_request = get_request
+    with pytest.raises(HTTPError, match="Server error"):
+        api.list_of_payments()
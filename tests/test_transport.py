@@ -0,0 +1,130 @@
+"""Testing Module"""
+
+import socket
+
+import pytest
+import requests
+
+from nowpayments_api import (
+    NO_RETRY,
+    HTTPXTransport,
+    Hooks,
+    MetricsCollector,
+    NOWPaymentsAPI,
+    NowPaymentsException,
+    RequestsTransport,
+    Transport,
+)
+from nowpayments_api.testing import StubServer
+
+httpx = pytest.importorskip("httpx")
+
+SECRETS = ("s3cret-key", "merchant@example.org", "password")
+
+
+@pytest.fixture
+def stub_server() -> StubServer:
+    with StubServer(*SECRETS) as server:
+        yield server
+
+
+@pytest.fixture(params=["requests", "httpx"])
+def transport(request) -> RequestsTransport:
+    if request.param == "requests":
+        transport = RequestsTransport()
+    else:
+        transport = HTTPXTransport(http2=False)
+    with transport:
+        yield transport
+
+
+def make_api(server: StubServer, transport, **kwargs) -> NOWPaymentsAPI:
+    api = NOWPaymentsAPI(*SECRETS, transport=transport, **kwargs)
+    api.api_uri = server.url
+    return api
+
+
+def test_backends_are_interchangeable(stub_server: StubServer, transport) -> None:
+    collector = MetricsCollector()
+    hooks = Hooks()
+    collector.install(hooks)
+    api = make_api(stub_server, transport, hooks=hooks)
+    assert api.status() == {"message": "OK"}
+    payment = api.create_payment(100, "usd", "btc", order_id="A-1")
+    assert api.payment_status(int(payment["payment_id"]))["order_id"] == "A-1"
+    assert [p["payment_id"] for p in api.iter_payments(stream=True)] == [
+        payment["payment_id"]
+    ]
+    assert list(api.currencies_full(stream=True)) == api.currencies_full()["currencies"]
+    assert api.with_options(timeout=1).transport is transport
+    assert api._session is None
+    assert collector.requests()[("POST", "payment", "201")] == 1
+    assert collector._request_bytes[("POST", "payment")] > 0
+
+
+def test_errors_are_raised_as_requests_errors(
+    stub_server: StubServer, transport
+) -> None:
+    api = make_api(stub_server, transport, retry_policy=NO_RETRY)
+    stub_server.state.fail_next(503, path="status")
+    with pytest.raises(requests.HTTPError) as error:
+        api.status()
+    assert error.value.response.status_code == 503
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    api.api_uri = f"http://127.0.0.1:{port}/v1/"
+    with pytest.raises(requests.ConnectionError):
+        api.status()
+
+    stub_server.state.latency = 0.5
+    api = make_api(stub_server, transport, retry_policy=NO_RETRY, timeout=0.05)
+    with pytest.raises(requests.Timeout):
+        api.status()
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (httpx.ReadTimeout("stalled"), requests.Timeout),
+        (httpx.RemoteProtocolError("peer closed"), requests.ConnectionError),
+    ],
+)
+def test_errors_while_streaming_are_raised_as_requests_errors(
+    error: Exception, expected: type
+) -> None:
+    class FailingStream(httpx.SyncByteStream):
+        def __iter__(self):
+            yield b'{"data": ['
+            raise error
+
+    client = httpx.Client(
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, stream=FailingStream())
+        )
+    )
+    with HTTPXTransport(client=client) as transport:
+        response = transport.request("GET", "http://stub/v1/payment", stream=True)
+        with pytest.raises(expected):
+            list(response.iter_content(1024))
+
+
+def test_http2_requires_h2() -> None:
+    try:
+        import h2  # pylint: disable=import-outside-toplevel,unused-import
+    except ImportError:
+        with pytest.raises(NowPaymentsException):
+            HTTPXTransport(http2=True)
+    else:
+        with HTTPXTransport(http2=True) as transport:
+            assert transport.client is not None
+
+
+def test_transports_implement_request() -> None:
+    class PartialTransport(Transport):
+        def close(self) -> None:
+            pass
+
+    with pytest.raises(TypeError):
+        PartialTransport()
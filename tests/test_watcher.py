@@ -0,0 +1,193 @@
+"""Testing Module"""
+
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+from nowpayments_api import NOWPaymentsAPI, NowPaymentsException, PaymentWatcher
+from nowpayments_api.testing import StubServer
+
+from .conftest import FakeClock
+
+
+class FakeAPI:
+    def __init__(self) -> None:
+        self.statuses = {}
+        self.polls = []
+
+    def payment_status(self, payment_id: int) -> dict:
+        self.polls.append(payment_id)
+        status = self.statuses[payment_id]
+        if isinstance(status, Exception):
+            raise status
+        return {"payment_id": payment_id, "payment_status": status}
+
+
+def test_idle_payments_back_off() -> None:
+    api, clock = FakeAPI(), FakeClock()
+    watcher = PaymentWatcher(
+        api, min_interval=1, max_interval=4, backoff=2, clock=clock
+    )
+    api.statuses[1] = "waiting"
+    watcher.watch(1, "waiting")
+    assert watcher.poll_due() == []
+    polled_at = []
+    for _ in range(40):
+        clock.now += 0.5
+        count = len(api.polls)
+        watcher.poll_due()
+        if len(api.polls) > count:
+            polled_at.append(clock.now)
+    gaps = [after - before for before, after in zip(polled_at, polled_at[1:])]
+    assert gaps[:3] == [2, 4, 4]
+
+
+def test_changes_reset_interval_and_terminal_payments_are_dropped() -> None:
+    api, clock = FakeAPI(), FakeClock()
+    changes = []
+    watcher = PaymentWatcher(
+        api, on_change=changes.append, min_interval=1, max_interval=60, clock=clock
+    )
+    api.statuses.update({1: "waiting", 2: "waiting"})
+    watcher.watch(1)
+    watcher.watch({"payment_id": "2", "payment_status": "waiting"})
+    clock.now += 1
+    assert [
+        (c.payment_id, c.previous_status, c.status) for c in watcher.poll_due()
+    ] == [(1, None, "waiting")]
+    api.statuses[2] = "confirming"
+    clock.now += 1.5
+    assert [change.status for change in watcher.poll_due()] == ["confirming"]
+    api.statuses[2] = "finished"
+    clock.now += 1
+    change = watcher.poll_due()[0]
+    assert change.terminal and change.previous_status == "confirming"
+    assert 2 not in watcher and len(watcher) == 1
+    assert [change.payment_id for change in changes] == [1, 2, 2]
+
+    watcher.watch({"payment_id": 3, "payment_status": "expired"})
+    assert 3 not in watcher
+
+
+def test_polls_are_scheduled_at_expiration() -> None:
+    api, clock = FakeAPI(), FakeClock()
+    watcher = PaymentWatcher(
+        api, min_interval=1, max_interval=1000, backoff=10, clock=clock
+    )
+    expiration = datetime.fromtimestamp(clock.now + 50, timezone.utc)
+    api.statuses[1] = "waiting"
+    watcher.watch(
+        {
+            "payment_id": 1,
+            "payment_status": "waiting",
+            "expiration_estimate_date": expiration.isoformat(),
+        }
+    )
+    clock.now += 1
+    watcher.poll_due()
+    clock.now += 10
+    watcher.poll_due()
+    assert len(api.polls) == 2
+    clock.now = 1049
+    watcher.poll_due()
+    assert len(api.polls) == 2
+    api.statuses[1] = "expired"
+    clock.now = 1050
+    assert watcher.poll_due()[0].status == "expired"
+    assert len(watcher) == 0
+
+
+def test_failed_polls_are_retried_and_unwatch() -> None:
+    api, clock = FakeAPI(), FakeClock()
+    errors = []
+    watcher = PaymentWatcher(
+        api,
+        on_error=lambda payment_id, error: errors.append(payment_id),
+        min_interval=1,
+        clock=clock,
+    )
+    api.statuses[1] = NowPaymentsException("down")
+    watcher.watch(1, "waiting")
+    clock.now += 1
+    assert watcher.poll_due() == []
+    assert errors == [1] and 1 in watcher
+    api.statuses[1] = "waiting"
+    clock.now += 1.5
+    watcher.poll_due()
+    assert api.polls == [1, 1]
+    watcher.unwatch(1)
+    clock.now += 100
+    watcher.poll_due()
+    assert api.polls == [1, 1] and len(watcher) == 0
+
+
+def test_failing_callbacks_are_logged_and_polling_continues(caplog) -> None:
+    api, clock = FakeAPI(), FakeClock()
+
+    def fail(*args) -> None:
+        raise RuntimeError("callback failed")
+
+    watcher = PaymentWatcher(
+        api, on_change=fail, on_error=fail, min_interval=1, clock=clock
+    )
+    api.statuses[1] = NowPaymentsException("down")
+    watcher.watch(1, "waiting")
+    clock.now += 1
+    assert watcher.poll_due() == []
+    api.statuses[1] = "confirming"
+    clock.now += 1.5
+    assert [change.status for change in watcher.poll_due()] == ["confirming"]
+    clock.now += 1
+    watcher.poll_due()
+    assert api.polls == [1, 1, 1] and 1 in watcher
+    assert len(caplog.records) == 2
+
+
+def test_invalid_intervals() -> None:
+    with pytest.raises(ValueError):
+        PaymentWatcher(FakeAPI(), min_interval=10, max_interval=1)
+
+
+def test_background_polling(stub_server: StubServer) -> None:
+    api = NOWPaymentsAPI("test")
+    api.api_uri = stub_server.url
+    payments = [api.create_payment(100, "usd", "btc") for _ in range(5)]
+    finished = threading.Event()
+    changes = []
+
+    def on_change(change) -> None:
+        changes.append(change)
+        if len(changes) == 5:
+            finished.set()
+
+    with PaymentWatcher(
+        api, on_change=on_change, min_interval=0.01, max_workers=3
+    ) as watcher:
+        for payment in payments:
+            watcher.watch(payment)
+        for payment in payments:
+            stub_server.state.payments[int(payment["payment_id"])][
+                "payment_status"
+            ] = "finished"
+        assert finished.wait(5)
+    assert len(watcher) == 0
+    assert {change.status for change in changes} == {"finished"}
+
+
+def test_async_stream() -> None:
+    api, clock = FakeAPI(), FakeClock()
+    watcher = PaymentWatcher(api, min_interval=1, clock=clock)
+    api.statuses[1] = "finished"
+    watcher.watch(1, "waiting")
+
+    async def main() -> list:
+        stream = watcher.changes()
+        received = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        clock.now += 1
+        watcher.poll_due()
+        return [await received]
+
+    assert [change.status for change in asyncio.run(main())] == ["finished"]